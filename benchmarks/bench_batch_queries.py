@@ -0,0 +1,111 @@
+"""
+Throughput of /products/batch and /outlets/batch vs. one request per query, per batch size.
+Embeddings and LLM calls are fakes with fixed latency (EMBED_MS per embeddings call,
+LLM_MS per generation), so the numbers show round trips saved, not model speed.
+
+Run: python -m benchmarks.bench_batch_queries
+"""
+from unittest.mock import patch, Mock
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from chatbot import services
+from chatbot.outlet_db import OutletDB
+from chatbot.product_index import ProductIndex
+from chatbot.semantic_cache import SemanticAnswerCache
+from chatbot.sql_cache import SQLTranslationCache
+import asyncio
+import sqlite3
+import tempfile
+import shutil
+import time
+import os
+
+BATCH_SIZES = [1, 10, 50, 200]
+EMBED_MS = 20
+LLM_MS = 50
+DIM = 256
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    async def aembed_query(self, text):
+        await asyncio.sleep(EMBED_MS / 1000)
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(EMBED_MS / 1000)
+        return self.embed_documents(texts)
+
+
+class SlowChain:
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(LLM_MS / 1000)
+        return "answer"
+
+
+class SlowSQLLLM:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(LLM_MS / 1000)
+        return Mock(content="SELECT * FROM outlets LIMIT 5")
+
+
+async def sequential(search, queries):
+    for q in queries:
+        await search(q)
+
+
+def measure(run, n):
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return f"{elapsed * 1000:8.1f} ms ({n / elapsed:7.1f} q/s)"
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, "product_kb")
+        docs = [Document(page_content=f"Product {i}", metadata={"title": f"Product {i}", "price": "RM 1"}) for i in range(2000)]
+        FAISS.from_documents(docs, DeterministicFakeEmbedding(size=DIM)).save_local(path)
+        index = ProductIndex(path=path, embeddings=SlowEmbeddings(size=DIM))
+
+        db_path = os.path.join(tmpdir, "outlets.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)",
+                         [(f"ZUS Coffee - {i}", f"Jalan {i}", "8:00 AM - 10:00 PM", "Dine-in") for i in range(500)])
+        conn.commit()
+        conn.close()
+        db = OutletDB(db_path=db_path)
+
+        print(f"fake latency: {EMBED_MS} ms per embeddings call, {LLM_MS} ms per LLM call, "
+              f"LLM concurrency {services.BATCH_LLM_CONCURRENCY}")
+        with patch('chatbot.services.MOCK_MODE', False), \
+                patch('chatbot.services.get_product_index', return_value=index), \
+                patch('chatbot.services._product_chain', return_value=SlowChain()), \
+                patch('chatbot.services.get_outlet_db', return_value=db), \
+                patch('chatbot.services.ChatOpenAI', SlowSQLLLM):
+            for size in BATCH_SIZES:
+                queries = [f"query {size} {i}" for i in range(size)]
+                # Fresh caches per run so every query pays for generation
+                with patch('chatbot.services.get_semantic_cache', return_value=SemanticAnswerCache()):
+                    one_by_one = measure(lambda: sequential(services.asearch_products, queries), size)
+                with patch('chatbot.services.get_semantic_cache', return_value=SemanticAnswerCache()):
+                    batched = measure(lambda: services.asearch_products_batch(queries), size)
+                print(f"products batch={size:<4} sequential {one_by_one}   batch {batched}")
+
+                with patch('chatbot.services.get_sql_cache', return_value=SQLTranslationCache(db_path, path=None)):
+                    one_by_one = measure(lambda: sequential(services.asearch_outlets, queries), size)
+                with patch('chatbot.services.get_sql_cache', return_value=SQLTranslationCache(db_path, path=None)):
+                    batched = measure(lambda: services.asearch_outlets_batch(queries), size)
+                print(f"outlets  batch={size:<4} sequential {one_by_one}   batch {batched}")
+        db.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
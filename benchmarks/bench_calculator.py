@@ -0,0 +1,46 @@
+"""
+Calculator throughput: one /calculate request per expression vs. one /calculate/batch request,
+and the time to reject a pathological power tower.
+
+Run: python -m benchmarks.bench_calculator
+"""
+from fastapi.testclient import TestClient
+from chatbot import calculator
+from main import app
+import random
+import time
+
+N_EXPRS = 5000
+
+
+def main():
+    random.seed(0)
+    exprs = [f"({random.randint(-99, 99)} + {random.randint(1, 9)}) * {round(random.uniform(0, 9), 2)}"
+             for _ in range(N_EXPRS)]
+    client = TestClient(app)
+
+    start = time.perf_counter()
+    for expr in exprs:
+        client.post("/calculate", json={"expr": expr})
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = client.post("/calculate/batch", json={"exprs": exprs}).json()
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = calculator.calculate_batch(exprs)
+    in_process = time.perf_counter() - start
+
+    print(f"{N_EXPRS} expressions")
+    print(f"  /calculate x{N_EXPRS:<5}  {single * 1000:8.1f} ms  ({N_EXPRS / single:8.0f} expr/s)")
+    print(f"  /calculate/batch   {batch * 1000:8.1f} ms  ({N_EXPRS / batch:8.0f} expr/s, {data['vectorized']} vectorized)")
+    print(f"  calculate_batch()  {in_process * 1000:8.1f} ms  ({engine['vectorized']} vectorized)")
+
+    start = time.perf_counter()
+    resp = client.post("/calculate", json={"expr": "9**9**9**9"})
+    print(f"  9**9**9**9 rejected in {(time.perf_counter() - start) * 1000:.2f} ms: {resp.json()['detail']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+/chat throughput vs concurrent clients with a simulated 200 ms LLM call.
+"sync" calls process_turn on the event loop, as /chat did before it was async;
+"async" goes through the real /chat route, which awaits aprocess_turn.
+
+Run: python -m benchmarks.bench_chat_concurrency
+"""
+from unittest.mock import Mock
+from chatbot.agent import ConversationAgent
+from chatbot.sessions import get_session_manager
+from main import app
+import asyncio
+import httpx
+import time
+
+LLM_LATENCY = 0.2
+CLIENTS = [1, 4, 16, 64]
+
+
+class SlowLLM:
+    def invoke(self, prompt):
+        time.sleep(LLM_LATENCY)
+        return Mock(content="ok")
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(LLM_LATENCY)
+        return Mock(content="ok")
+
+
+def prototype() -> ConversationAgent:
+    # Force the LLM fallback path even without an API key
+    agent = ConversationAgent()
+    agent.llm = SlowLLM()
+    agent.mock_mode = False
+    return agent
+
+
+async def sync_handler(agent, message):
+    return agent.process_turn(message)
+
+
+async def run_sync(n):
+    agents = [prototype().fork() for _ in range(n)]
+    await asyncio.gather(*(sync_handler(a, "tell me a joke") for a in agents))
+
+
+async def run_async(n):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await asyncio.gather(*(
+            client.post("/chat", json={"message": "tell me a joke"}, headers={"X-Session-ID": f"bench-{i}"})
+            for i in range(n)
+        ))
+
+
+def main():
+    get_session_manager().prototype = prototype()
+    print(f"simulated LLM latency {LLM_LATENCY * 1000:.0f} ms")
+    for n in CLIENTS:
+        row = []
+        for name, runner in [("sync", run_sync), ("async", run_async)]:
+            start = time.perf_counter()
+            asyncio.run(runner(n))
+            elapsed = time.perf_counter() - start
+            row.append(f"{name}: {n / elapsed:6.1f} turns/s")
+        print(f"{n:>3} clients  " + "   ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Crawl throughput against a local stand-in shop (paginated collection + product pages, with a fixed
+per-request server latency): the former scrape loop (sequential requests.get, a new connection per
+page, time.sleep(1) between products) vs the Crawler at several worker counts, and reading the same
+catalog from the Shopify products.json feed instead.
+
+Run: python -m benchmarks.bench_crawler
+"""
+from ingest.crawler import Crawler
+from ingest.scrape_products import feed_urls, handle_feed, handle_page, parse_collection, parse_product
+from tests.fixture_site import FixtureSite, feed_product, products_feed, shop_routes
+import contextlib
+import requests
+import time
+import io
+
+N_PRODUCTS = 200
+LATENCY = 0.02
+WORKERS = [1, 4, 8, 16]
+OLD_SLEEP = 1.0
+
+
+def sequential(site_url):
+    """The old loop minus its sleep(1); the sleep is added back arithmetically"""
+    start = time.perf_counter()
+    pages, products, url = 0, [], f"{site_url}/collections/tumbler"
+    while url:
+        links, next_pages = parse_collection(url, requests.get(url, timeout=10).content)
+        pages += 1
+        for product_url in links:
+            products.append(parse_product(product_url, requests.get(product_url, timeout=10).content))
+            pages += 1
+        url = next_pages[0] if next_pages else None
+    return pages, time.perf_counter() - start, len(products)
+
+
+def main():
+    routes = shop_routes(N_PRODUCTS, per_page=24)
+    routes["/collections/tumbler/products.json"] = products_feed([feed_product(i) for i in range(N_PRODUCTS)])
+    with FixtureSite(routes, latency=LATENCY) as site:
+        pages, seconds, _ = sequential(site.url)
+        print(f"{N_PRODUCTS} products, {pages} pages, {LATENCY * 1000:.0f} ms server latency")
+        print(f"{'sequential (old, + sleep(1))':<30} {seconds + N_PRODUCTS * OLD_SLEEP:8.2f} s "
+              f"{pages / (seconds + N_PRODUCTS * OLD_SLEEP):8.1f} pages/s")
+        print(f"{'sequential (no sleep)':<30} {seconds:8.2f} s {pages / seconds:8.1f} pages/s  connections={site.connections}")
+        for workers in WORKERS:
+            before = site.connections
+            with Crawler(workers=workers, rate=1000, burst=workers) as crawler, contextlib.redirect_stdout(io.StringIO()):
+                result = crawler.crawl([f"{site.url}/collections/tumbler"], handle_page)
+            stats = result.stats()
+            print(f"{f'Crawler workers={workers}':<30} {stats['seconds']:8.2f} s {stats['pages_per_second']:8.1f} pages/s  "
+                  f"connections={site.connections - before}")
+        with Crawler(workers=WORKERS[-1], rate=1000, burst=WORKERS[-1]) as crawler, contextlib.redirect_stdout(io.StringIO()):
+            result = crawler.crawl(feed_urls(site.url, "tumbler")[:1], handle_feed)
+        stats = result.stats()
+        print(f"{'products.json feed':<30} {stats['seconds']:8.2f} s {stats['pages']:8d} requests  items={stats['items']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Re-ingesting an unchanged catalog through the HTTP response cache: a cold crawl (every page
+downloaded and parsed) vs a warm one (conditional requests answered 304, cached parses reused)
+vs --replay (no network at all), on a local stand-in shop with ETags and fixed server latency.
+
+Run: python -m benchmarks.bench_http_cache
+"""
+from ingest.crawler import Crawler
+from ingest.http_cache import ResponseCache
+from ingest.scrape_products import PARSER, handle_page
+from tests.fixture_site import FixtureSite, shop_routes
+from tests.test_http_cache import with_etags
+import contextlib
+import tempfile
+import shutil
+import io
+
+N_PRODUCTS = 500
+LATENCY = 0.02
+WORKERS = 8
+
+
+def crawl(site_url, cache, replay=False):
+    with Crawler(workers=WORKERS, rate=1000, burst=WORKERS, cache=cache, replay=replay) as crawler, \
+            contextlib.redirect_stdout(io.StringIO()):
+        return crawler.crawl([f"{site_url}/collections/tumbler"], handle_page, parser=PARSER).stats()
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    cache = ResponseCache(tmpdir)
+    try:
+        with FixtureSite(with_etags(shop_routes(N_PRODUCTS, per_page=24)), latency=LATENCY) as site:
+            runs = [("cold", crawl(site.url, cache)), ("warm (304 + cached parse)", crawl(site.url, cache))]
+        runs.append(("replay (offline)", crawl(site.url, cache, replay=True)))
+        print(f"{N_PRODUCTS} products, {LATENCY * 1000:.0f} ms server latency, {WORKERS} workers")
+        for name, stats in runs:
+            print(f"{name:<28} {stats['seconds']:8.3f} s  pages={stats['pages']}  bytes={stats['bytes']}  "
+                  f"not_modified={stats['not_modified']}  parsed={stats['parsed']}")
+        print(f"cache: {cache.stats()}")
+    finally:
+        cache.close()
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
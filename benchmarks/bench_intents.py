@@ -0,0 +1,65 @@
+"""
+Per-turn cost of intent/slot/expression recognition, old vs new, split in two parts:
+- intent + expression: the former substring scans (parse_intent + extract_calculation) vs. the
+  compiled recognizer. CPython's substring search is cheap enough that the scans stay faster on
+  chat-sized messages; the recognizer is kept for its single keyword table and one-pass scan.
+- slots: the former case-insensitive name regexes vs. the gazetteer trie, at the 8 built-in
+  outlets and at OUTLETS outlets. The regex grows with every outlet; the trie walk does not.
+A repeated message skips the recognizer: recognize() is cached per message.
+
+Run: python -m benchmarks.bench_intents
+"""
+from chatbot import intents
+from chatbot.gazetteer import Gazetteer, DEFAULT_CITIES, DEFAULT_OUTLETS
+from benchmarks.legacy_intents import legacy_parse_intent, legacy_slots, legacy_extract_calculation
+import timeit
+import re
+
+MESSAGES = [
+    "Calculate 5 * 6",
+    "Is there an outlet in Petaling Jaya?",
+    "SS 2, whats the opening time?",
+    "Tell me about ZUS tumblers and the price of the OG CUP 2.0",
+    "Hello! I was wondering whether you could help me plan a coffee meetup next week somewhere near Mont Kiara",
+]
+N = 20000
+OUTLETS = 2000
+
+MANY_OUTLETS = DEFAULT_OUTLETS + [f"Outlet {i}" for i in range(OUTLETS)]
+GAZETTEER = Gazetteer(DEFAULT_CITIES, DEFAULT_OUTLETS)
+LARGE_GAZETTEER = Gazetteer(DEFAULT_CITIES, MANY_OUTLETS)
+LARGE_SLOT_REGEX = re.compile("(" + "|".join(re.escape(name) for name in MANY_OUTLETS) + ")", re.IGNORECASE)
+
+
+def keyword_scans(text):
+    legacy_parse_intent(text)
+    legacy_extract_calculation(text)
+
+
+def recognizer(text):
+    # Bypass the per-message cache so every call scans the input
+    intents.recognize.__wrapped__(text)
+
+
+def per_call_us(fn, text):
+    return timeit.timeit(lambda: fn(text), number=N) / N * 1e6
+
+
+def main():
+    print(f"{'':>6}  {'intent + expression':^25}  {'slots, 8 outlets':^25}  {f'slots, {OUTLETS} outlets':^25}")
+    print(f"{'chars':>6}  {'scans':>11}  {'recognizer':>11}  {'regexes':>11}  {'gazetteer':>11}  "
+          f"{'regex':>11}  {'gazetteer':>11}")
+    for text in MESSAGES:
+        row = [
+            per_call_us(keyword_scans, text),
+            per_call_us(recognizer, text),
+            per_call_us(legacy_slots, text),
+            per_call_us(GAZETTEER.resolve, text),
+            per_call_us(LARGE_SLOT_REGEX.search, text),
+            per_call_us(LARGE_GAZETTEER.resolve, text),
+        ]
+        print(f"{len(text):>6}  " + "  ".join(f"{us:>8.2f} us" for us in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Prompt size and build latency across a 200-turn LLM-fallback conversation: the former
+ConversationBufferMemory prompt (whole history joined every turn) vs. TokenBudgetMemory.
+LLM latency grows with prompt tokens, so flat prompt tokens mean flat per-turn latency.
+
+Run: python -m benchmarks.bench_memory
+"""
+from langchain.memory import ConversationBufferMemory
+from chatbot.memory import TokenBudgetMemory, count_tokens
+import time
+
+TURNS = 200
+REPORT = [1, 25, 50, 100, 150, 200]
+ANSWER = "Our tumblers keep drinks hot for six hours and cold for twelve; the OG Cup 2.0 is the most popular."
+
+
+def legacy_prompt(memory, user_input):
+    history = memory.load_memory_variables({}).get("history", [])
+    history_text = "\n".join([str(msg) for msg in history])
+    return f"{history_text}\nUser: {user_input}\nBot:"
+
+
+def main():
+    legacy = ConversationBufferMemory(return_messages=True)
+    budgeted = TokenBudgetMemory()
+
+    print(f"{'turn':>5}  {'buffer tokens':>13}  {'buffer build':>12}  {'budget tokens':>13}  {'budget build':>12}")
+    for turn in range(1, TURNS + 1):
+        user_input = f"Tell me something new about drinkware, turn {turn}"
+
+        start = time.perf_counter()
+        prompt = legacy_prompt(legacy, user_input)
+        old_us = (time.perf_counter() - start) * 1e6
+        legacy.save_context({"input": user_input}, {"output": ANSWER})
+
+        start = time.perf_counter()
+        _, tokens = budgeted.prompt(user_input)
+        new_us = (time.perf_counter() - start) * 1e6
+        budgeted.save_turn(user_input, ANSWER)
+
+        if turn in REPORT:
+            print(f"{turn:>5}  {count_tokens(prompt):>13}  {old_us:>9.1f} us  {tokens:>13}  {new_us:>9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
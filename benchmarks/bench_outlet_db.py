@@ -0,0 +1,49 @@
+"""
+Outlet lookup latency under concurrent load: per-request create_engine vs the pooled
+OutletDB (on-disk and in-memory replica). Mirrors the MOCK_MODE LIKE query.
+
+Run: python -m benchmarks.bench_outlet_db
+"""
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from chatbot.outlet_db import OutletDB, OUTLET_DB_PATH
+import statistics
+import time
+
+N_QUERIES = 2000
+CONCURRENCY = 8
+QUERIES = ["SS 2", "Bangsar", "Sentul", "Wangsa Maju", "KLCC", "Kuala Lumpur"]
+
+
+def per_request_lookup(query):
+    engine = create_engine(f"sqlite:///{OUTLET_DB_PATH}")
+    with engine.connect() as conn:
+        sql = text("SELECT * FROM outlets WHERE name LIKE :query OR address LIKE :query LIMIT 5")
+        return [dict(row._mapping) for row in conn.execute(sql, {"query": f"%{query}%"})]
+
+
+def run(name, fn):
+    def timed(i):
+        start = time.perf_counter()
+        fn(QUERIES[i % len(QUERIES)])
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        samples = list(pool.map(timed, range(N_QUERIES)))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} p50={statistics.median(samples):7.3f} ms  throughput={N_QUERIES / elapsed:9.0f} q/s")
+
+
+def main():
+    print(f"{N_QUERIES} lookups, {CONCURRENCY} threads")
+    run("per-request engine", per_request_lookup)
+    for in_memory in (False, True):
+        db = OutletDB(in_memory=in_memory)
+        db.connect()
+        run("pooled in-memory" if in_memory else "pooled on-disk", db.search)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
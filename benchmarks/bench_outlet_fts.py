@@ -0,0 +1,80 @@
+"""
+Outlet search on a synthetic 50k-row outlets table: the MOCK_MODE LIKE scan vs the FTS5
+index (BM25-ranked, multi-word, prefix-aware) that OutletDB.search uses when it is present.
+LIKE stops at LIMIT, so a word found in every few rows is cheap for it; multi-word and rare or
+missing words make it scan the whole table, where the index answers from its postings.
+
+Run: python -m benchmarks.bench_outlet_fts
+"""
+from chatbot.outlet_db import OutletDB, create_fts_index
+import statistics
+import tempfile
+import sqlite3
+import random
+import time
+import os
+
+N_OUTLETS = 50000
+REPEAT = 50
+AREAS = ["Bangsar", "SS 2", "Subang", "Damansara", "KLCC", "Mont Kiara", "Sentul", "Puchong", "Cheras",
+         "Kepong", "Ampang", "Setapak", "Seri Kembangan", "Kajang", "Rawang", "Klang", "Shah Alam", "Cyberjaya"]
+CITIES = ["Kuala Lumpur", "Petaling Jaya", "Subang Jaya", "Shah Alam", "Johor Bahru", "Ipoh", "George Town"]
+STREETS = ["Telawi", "Ipoh", "Ampang", "Kiara", "Puteri", "Radin Anum", "Tun Razak", "Sultan Ismail", "Bukit Bintang"]
+SERVICES = ["Dine-in, Takeaway", "Dine-in, Takeaway, Delivery", "Dine-in, Takeaway, Delivery, Drive-thru"]
+QUERIES = ["Bangsar", "bangsar hours", "jalan telawi", "drive-thru cheras", "mont kia", "ZUS Coffee - Kepong 12", "penang"]
+
+
+def build(path):
+    rng = random.Random(0)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+    rows = []
+    for i in range(N_OUTLETS):
+        area = rng.choice(AREAS)
+        rows.append((
+            f"ZUS Coffee - {area} {i % 500}",
+            f"No. {rng.randint(1, 200)}, Jalan {rng.choice(STREETS)} {rng.randint(1, 30)}, {area}, "
+            f"{rng.randint(10000, 99999)} {rng.choice(CITIES)}",
+            "8:00 AM - 10:00 PM",
+            rng.choice(SERVICES),
+        ))
+    conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    start = time.perf_counter()
+    create_fts_index(conn)
+    conn.close()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(fn, query):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        rows = fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(rows)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "outlets.db")
+        build_ms = build(path)
+        print(f"{N_OUTLETS} outlets, FTS5 index built in {build_ms:.0f} ms, p50 of {REPEAT} runs")
+
+        like = OutletDB(db_path=path)
+        like.connect()
+        like.has_fts = False
+        fts = OutletDB(db_path=path)
+        fts.connect()
+
+        print(f"{'query':<24} {'LIKE':>10} {'rows':>5}  {'FTS5':>10} {'rows':>5}")
+        for query in QUERIES:
+            like_ms, like_rows = measure(like.search, query)
+            fts_ms, fts_rows = measure(fts.search, query)
+            print(f"{query:<24} {like_ms:>7.3f} ms {like_rows:>5}  {fts_ms:>7.3f} ms {fts_rows:>5}")
+        like.close()
+        fts.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Nearest-outlet lookup on synthetic outlets spread over Malaysia: brute force (haversine over every
+row fetched from SQLite, as a Python loop and vectorized) vs the R*Tree box search used by
+OutletDB.nearby, which only pulls the candidates near the point before ranking them with NumPy.
+
+Run: python -m benchmarks.bench_outlet_nearby
+"""
+from chatbot.geo import GEO_SCHEMA, haversine_km, insert_locations, nearest
+import statistics
+import sqlite3
+import random
+import math
+import time
+import numpy as np
+
+SIZES = [1000, 100000]
+REPEAT = 30
+K = 5
+# Peninsular Malaysia plus Sabah/Sarawak, weighted towards the Klang Valley like the real outlet list
+REGIONS = [((2.9, 3.3, 101.4, 101.8), 0.6), ((1.3, 6.6, 100.1, 103.5), 0.3), ((1.0, 7.0, 109.5, 119.0), 0.1)]
+ALL_ROWS = "SELECT outlet_id, latitude, longitude FROM outlet_locations"
+
+
+def build(n):
+    rng = random.Random(0)
+    conn = sqlite3.connect(":memory:")
+    for statement in GEO_SCHEMA:
+        conn.execute(statement)
+    points = []
+    for i in range(1, n + 1):
+        (lat0, lat1, lon0, lon1), = rng.choices([r for r, _ in REGIONS], weights=[w for _, w in REGIONS])
+        points.append((i, rng.uniform(lat0, lat1), rng.uniform(lon0, lon1), None))
+    insert_locations(conn, points)
+    return conn
+
+
+def brute_python(conn, lat, lon, k):
+    def km(lat2, lon2):
+        p1, p2 = math.radians(lat), math.radians(lat2)
+        a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon) / 2) ** 2
+        return 2 * 6371.0088 * math.asin(math.sqrt(a))
+    return sorted((km(la, lo), i) for i, la, lo in conn.execute(ALL_ROWS))[:k]
+
+
+def brute_numpy(conn, lat, lon, k):
+    rows = np.array(conn.execute(ALL_ROWS).fetchall())
+    distances = haversine_km(lat, lon, rows[:, 1], rows[:, 2])
+    top = np.argpartition(distances, k - 1)[:k]
+    return rows[top[np.argsort(distances[top])], 0]
+
+
+def measure(fn, queries):
+    samples = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        fn(lat, lon)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    rng = random.Random(1)
+    queries = [(rng.uniform(1.5, 6.5), rng.uniform(100.5, 103.5)) for _ in range(REPEAT)]
+    print(f"k={K}, p50 over {REPEAT} query points")
+    print(f"{'outlets':>8} {'python loop':>14} {'numpy scan':>12} {'R*Tree+numpy':>14}")
+    for n in SIZES:
+        conn = build(n)
+        fetch = lambda sql, params: conn.execute(sql, params).fetchall()
+        loop_ms = measure(lambda lat, lon: brute_python(conn, lat, lon, K), queries)
+        numpy_ms = measure(lambda lat, lon: brute_numpy(conn, lat, lon, K), queries)
+        rtree_ms = measure(lambda lat, lon: nearest(fetch, lat, lon, K), queries)
+        print(f"{n:>8} {loop_ms:>11.3f} ms {numpy_ms:>9.3f} ms {rtree_ms:>11.3f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare /products retrieval latency: per-request FAISS.load_local vs the shared ProductIndex.
+Uses a deterministic fake embedding so no OpenAI calls are made.
+
+Run: python -m benchmarks.bench_product_index
+"""
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from chatbot.product_index import ProductIndex
+import statistics
+import tempfile
+import shutil
+import time
+import os
+
+N_DOCS = 2000
+N_QUERIES = 200
+DIM = 1536
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, samples):
+    print(f"{name:<28} p50={statistics.median(samples):8.3f} ms  p95={percentile(samples, 95):8.3f} ms")
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "product_kb")
+    try:
+        docs = [Document(page_content=f"Product {i} tumbler mug cup", metadata={"title": f"Product {i}"}) for i in range(N_DOCS)]
+        FAISS.from_documents(docs, DeterministicFakeEmbedding(size=DIM)).save_local(path)
+        queries = [f"tumbler {i}" for i in range(N_QUERIES)]
+
+        per_request = []
+        for q in queries:
+            start = time.perf_counter()
+            vectorstore = FAISS.load_local(path, DeterministicFakeEmbedding(size=DIM), allow_dangerous_deserialization=True)
+            vectorstore.as_retriever(search_kwargs={"k": 3}).invoke(q)
+            per_request.append((time.perf_counter() - start) * 1000)
+
+        index = ProductIndex(path=path, embeddings=DeterministicFakeEmbedding(size=DIM))
+        index.load()
+        shared = []
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q, k=3)
+            shared.append((time.perf_counter() - start) * 1000)
+
+        print(f"{N_DOCS} docs, dim={DIM}, {N_QUERIES} queries (one-time load: {index.load_time_ms} ms)")
+        report("per-request load_local", per_request)
+        report("shared ProductIndex", shared)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
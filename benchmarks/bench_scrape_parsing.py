@@ -0,0 +1,112 @@
+"""
+Product page parsing on a saved corpus of a few thousand theme-sized pages (head scripts, mega
+menu, recommendations, footer): the former full html.parser DOM vs a full lxml DOM vs lxml with
+the SoupStrainer the scraper uses, inline and in the crawler's process pool. Each variant runs in
+a fresh interpreter so its peak RSS (parent + pool processes) is its own.
+
+Run: python -m benchmarks.bench_scrape_parsing
+"""
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+import multiprocessing
+import subprocess
+import resource
+import tempfile
+import shutil
+import json
+import glob
+import time
+import sys
+import os
+
+from ingest.crawler import CRAWL_PARSE_WORKERS
+from ingest.scrape_products import parse_product
+
+N_PAGES = 3000
+# The scrapers' default leaves no pool on one CPU; measure one worker there anyway
+POOL_WORKERS = CRAWL_PARSE_WORKERS or 1
+VARIANTS = ["full html.parser (old)", "full lxml", "strained lxml", f"strained lxml, pool x{POOL_WORKERS}"]
+
+
+def theme_page(i: int) -> str:
+    menu = "".join(f'<li class="menu__item"><a href="/collections/c{n}">Collection {n}</a></li>' for n in range(150))
+    cards = "".join(
+        f'<div class="product-card"><a href="/products/p{n}"><img src="/img/{n}.jpg" alt="p{n}">'
+        f'<span class="product-card__title">Product {n}</span><span class="money">RM {n}.90</span></a></div>'
+        for n in range(24)
+    )
+    return f"""<!doctype html><html><head><title>Cup {i}</title>
+        <script>{'window.theme = {};' * 400}</script><style>{'.a{{color:red}}' * 400}</style></head>
+        <body><header><nav><ul>{menu}</ul></nav></header>
+        <main><div class="product"><div class="product-meta">
+            <h1 class="product-meta__title">Cup {i} | 500ml</h1>
+            <div class="price-list"><span class="price">RM {40 + i % 30}.90</span></div>
+            <div class="product-meta__description"><p>Insulated cup number {i}.</p><ul><li>Keeps drinks hot</li></ul></div>
+        </div></div><section class="recommendations">{cards}</section></main>
+        <footer>{'<div class="footer__block"><p>Footer text</p><a href="/pages/about">About</a></div>' * 40}</footer>
+    </body></html>"""
+
+
+def old_parse_product(url: str, html: bytes) -> dict:
+    soup = BeautifulSoup(html, 'html.parser')
+    title_elem = soup.find('h1', class_='product-meta__title') or soup.find('h1')
+    price_elem = soup.find('span', class_='price')
+    desc_elem = soup.find('div', class_='product-meta__description') or soup.find('div', class_='rte')
+    return {"title": title_elem.get_text(strip=True), "price": price_elem.get_text(strip=True),
+            "description": desc_elem.get_text(strip=True)[:500], "url": url}
+
+
+def full_lxml_parse_product(url: str, html: bytes) -> dict:
+    soup = BeautifulSoup(html, 'lxml')
+    return {"title": soup.find('h1', class_='product-meta__title').get_text(strip=True),
+            "price": soup.find('span', class_='price').get_text(strip=True),
+            "description": soup.find('div', class_='product-meta__description').get_text(strip=True)[:500], "url": url}
+
+
+def parse_file(path: str) -> dict:
+    with open(path, "rb") as f:
+        return parse_product(path, f.read())
+
+
+def run_variant(variant: str, corpus: str) -> dict:
+    paths = sorted(glob.glob(os.path.join(corpus, "*.html")))
+    start = time.perf_counter()
+    if variant.startswith("strained lxml, pool"):
+        with ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+            products = list(pool.map(parse_file, paths, chunksize=16))
+    else:
+        parse = {"full html.parser (old)": old_parse_product, "full lxml": full_lxml_parse_product,
+                 "strained lxml": parse_product}[variant]
+        products = []
+        for path in paths:
+            with open(path, "rb") as f:
+                products.append(parse(path, f.read()))
+    seconds = time.perf_counter() - start
+    assert all(p["price"].startswith("RM") for p in products)
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"pages": len(products), "seconds": seconds, "peak_rss_mb": rss_kb / 1024}
+
+
+def main():
+    corpus = tempfile.mkdtemp()
+    try:
+        for i in range(N_PAGES):
+            with open(os.path.join(corpus, f"{i:05d}.html"), "w", encoding="utf-8") as f:
+                f.write(theme_page(i))
+        size = sum(os.path.getsize(p) for p in glob.glob(os.path.join(corpus, "*.html")))
+        print(f"{N_PAGES} saved pages, {size / N_PAGES / 1024:.0f} KB each, {os.cpu_count()} CPUs")
+        for variant in VARIANTS:
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_scrape_parsing", variant, corpus],
+                                 capture_output=True, text=True, check=True).stdout
+            stats = json.loads(out)
+            print(f"{variant:<26} {stats['seconds']:7.2f} s {stats['pages'] / stats['seconds']:8.1f} pages/s  "
+                  f"peak RSS {stats['peak_rss_mb']:6.1f} MB")
+    finally:
+        shutil.rmtree(corpus)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        print(json.dumps(run_variant(sys.argv[1], sys.argv[2])))
+    else:
+        main()
@@ -0,0 +1,32 @@
+"""
+Semantic answer cache lookup latency as the cache grows (1536-dim, OpenAI embedding size).
+
+Run: python -m benchmarks.bench_semantic_cache
+"""
+from chatbot.semantic_cache import SemanticAnswerCache
+import numpy as np
+import statistics
+import time
+
+DIM = 1536
+SIZES = [1000, 10000, 50000]
+N_LOOKUPS = 200
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for size in SIZES:
+        cache = SemanticAnswerCache(max_entries=size)
+        for v in rng.normal(size=(size, DIM)).astype(np.float32):
+            cache.store(v, "answer", [])
+        queries = rng.normal(size=(N_LOOKUPS, DIM)).astype(np.float32)
+        samples = []
+        for q in queries:
+            start = time.perf_counter()
+            cache.lookup(q)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>6} entries  p50 lookup={statistics.median(samples):7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Share of outlet questions the rule-based Text2SQL templates answer without an LLM call, and what a
+template match costs, on a sample of the question shapes the /outlets endpoint sees (the agent
+sends "<outlet> outlet"; the rest are typed by users).
+
+Run: python -m benchmarks.bench_text2sql_templates
+"""
+from chatbot.gazetteer import Gazetteer, DEFAULT_CITIES, DEFAULT_OUTLETS
+from chatbot.sql_templates import LLM, TEMPLATE, SQLTemplates
+import timeit
+
+QUESTIONS = [
+    "SS 2 outlet", "Bangsar outlet", "KLCC outlet", "Mont Kiara outlet", "Subang outlet",
+    "outlets in Petaling Jaya", "Is there an outlet in KL?", "any stores around Bangsar",
+    "SS2 opening hours", "what time does Damansara open", "when does KLCC close",
+    "which outlets have drive-thru", "delivery outlets in Kuala Lumpur", "dine in at Sentul",
+    "list all outlets",
+    "how many outlets are in Kuala Lumpur", "which outlets close after 10pm", "outlets open now",
+    "outlets in Petaling Jaya without drive thru", "what's the nearest outlet to Mid Valley",
+]
+N = 20000
+
+
+def main():
+    templates = SQLTemplates(resolve=Gazetteer(DEFAULT_CITIES, DEFAULT_OUTLETS).resolve)
+    for question in QUESTIONS:
+        matched = templates.match(question)
+        templates.record(TEMPLATE if matched else LLM, matched[0] if matched else None)
+        print(f"{question:<45} {matched[0] if matched else '-> LLM'}")
+    stats = templates.stats()
+    per_match = timeit.timeit(lambda: [templates.match(q) for q in QUESTIONS], number=N // len(QUESTIONS))
+    print(f"\nLLM avoidance: {stats['llm_avoidance_rate']:.0%} ({stats['template_hits']}/{stats['queries']})")
+    print(f"Template match: {per_match / N * 1e6:.1f} us per question (vs one gpt-3.5-turbo round trip otherwise)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-turn /chat agent latency with tools over HTTP loopback vs in-process, in MOCK_MODE.
+Starts the API with uvicorn on a local port for the HTTP transport.
+
+Run: MOCK_MODE=true python -m benchmarks.bench_tool_transport
+"""
+from chatbot.agent import ConversationAgent
+from chatbot.tools import build_tools, HTTP, INPROCESS
+import statistics
+import threading
+import socket
+import time
+import uvicorn
+
+N_TURNS = 300
+TURNS = ["Calculate 12 * 7", "Tell me about tumblers", "SS 2 opening hours", "What about Bangsar?"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    from main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def bench(transport: str, base_url: str = None):
+    tools = build_tools(transport)
+    if base_url:
+        for tool in tools.values():
+            tool.base_url = base_url
+    agent = ConversationAgent(tools=tools)
+    samples = []
+    for i in range(N_TURNS):
+        start = time.perf_counter()
+        agent.process_turn(TURNS[i % len(TURNS)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    port = free_port()
+    server = start_server(port)
+    try:
+        for name, transport, url in [("http loopback", HTTP, f"http://127.0.0.1:{port}"), ("in-process", INPROCESS, None)]:
+            samples = bench(transport, url)
+            print(f"{name:<14} p50={statistics.median(samples):7.3f} ms  mean={statistics.mean(samples):7.3f} ms")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
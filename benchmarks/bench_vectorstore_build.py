@@ -0,0 +1,65 @@
+"""
+Product index build time vs catalog size: a full rebuild against an incremental update after a
+small scrape delta (a few changed, added and removed products). The fake embedding charges a
+fixed per-request and per-text latency so the numbers track embedding API calls, not FAISS.
+
+Run: python -m benchmarks.bench_vectorstore_build
+"""
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from ingest.build_product_vectorstore import update_vectorstore
+from chatbot.lexical_index import product_document
+import tempfile
+import shutil
+import time
+import os
+
+SIZES = [500, 2000, 8000]
+CHANGES = 10
+DIM = 1536
+REQUEST_LATENCY = 0.05
+TEXT_LATENCY = 0.0005
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    texts: int = 0
+
+    def embed_documents(self, texts):
+        time.sleep(REQUEST_LATENCY + TEXT_LATENCY * len(texts))
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+def catalog(n, version=0):
+    records = [{"title": f"Cup {i}", "price": f"RM {40 + i % 30}.90", "url": f"/products/cup-{i}",
+                "description": f"Insulated cup number {i}, keeps drinks hot for 6 hours."} for i in range(n)]
+    for record in records[:CHANGES]:
+        record["price"] = f"RM {version}.00"
+    return {r["url"]: product_document(r) for r in records}
+
+
+def timed(documents, path, **kwargs):
+    embeddings = SlowEmbeddings(size=DIM)
+    start = time.perf_counter()
+    stats = update_vectorstore(documents, embeddings, path, **kwargs)
+    return time.perf_counter() - start, embeddings.texts, stats
+
+
+def main():
+    print(f"{CHANGES} changed + {CHANGES} added + {CHANGES} removed products per update")
+    for n in SIZES:
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "product_kb")
+        try:
+            full_seconds, full_texts, _ = timed(catalog(n), path, full=True)
+            delta = catalog(n + CHANGES, version=1)
+            for i in range(CHANGES, 2 * CHANGES):
+                del delta[f"/products/cup-{i}"]
+            inc_seconds, inc_texts, stats = timed(delta, path)
+            print(f"{n:>6} products  full rebuild {full_seconds:7.2f} s ({full_texts} embedded)   "
+                  f"incremental {inc_seconds:6.2f} s ({inc_texts} embedded, {stats['removed']} removed)")
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+The keyword scans and slot regexes that chatbot.intents and chatbot.gazetteer replaced, kept as
+the reference the intent tests compare against and the baseline bench_intents measures.
+"""
+import re
+
+
+def legacy_parse_intent(user_input: str) -> str:
+    """The keyword-scan classifier the recognizer replaced"""
+    user_lower = user_input.lower()
+    if any(w in user_lower for w in ["calculate", "add", "subtract", "multiply", "divide", "+", "-", "*", "/"]):
+        if re.search(r'\d+\s*[\+\-\*/]\s*\d+', user_input):
+            return "calculate"
+        if any(w in user_lower for w in ["calculate", "add", "subtract", "multiply", "divide"]):
+            return "calculate"
+    if any(w in user_lower for w in ["product", "drinkware", "tumbler", "mug", "cup", "bottle", "price", "buy", "sell"]):
+        return "product"
+    if any(w in user_lower for w in ["outlet", "store", "location", "branch", "open", "hours", "where", "address"]):
+        return "outlet"
+    if any(name in user_lower for name in ["ss 2", "ss2", "bangsar", "klcc", "subang", "damansara", "mont kiara"]):
+        return "outlet"
+    if any(city in user_lower for city in ["petaling jaya", "kuala lumpur", "kl", "selangor"]):
+        return "outlet"
+    return "unknown"
+
+
+def legacy_slots(user_input: str):
+    city = re.search(r'(Petaling Jaya|Kuala Lumpur|SS 2|Bangsar|Subang)', user_input, re.IGNORECASE)
+    outlet = re.search(r'(SS 2|Bangsar|Subang|Damansara|KLCC|Mont Kiara|Sentul|Puchong)', user_input, re.IGNORECASE)
+    return (city.group(1) if city else None), (outlet.group(1) if outlet else None)
+
+
+def legacy_extract_calculation(user_input: str) -> str:
+    match = re.search(r'([\d\+\-\*/\(\)\.\s]+)', user_input)
+    if match:
+        expr = match.group(1).strip()
+        if any(op in expr for op in "+-*/"):
+            return expr
+    return ""
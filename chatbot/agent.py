@@ -1,10 +1,14 @@
-from langchain.memory import ConversationBufferMemory
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
-from typing import Optional
-import re
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import asyncio
+import copy
 import os
-from .tools import CalculatorTool, ProductRAGTool, OutletSQLTool
+import sys
+from .tools import build_tools
+from .intents import Recognition, recognize
+from .gazetteer import get_gazetteer
+from .memory import TokenBudgetMemory
 
 
 MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
@@ -18,8 +22,11 @@ class MockLLM:
             content = "I'm here to help! I can assist you with outlet locations, product information, or calculations. What would you like to know?"
         return MockResponse()
 
+    async def ainvoke(self, prompt: str):
+        return self.invoke(prompt)
+
 class ConversationAgent:
-    def __init__(self, llm: Optional[BaseChatModel] = None):
+    def __init__(self, llm: Optional[BaseChatModel] = None, tools: Optional[Dict[str, Any]] = None):
         """Initialize conversation agent with optional mock mode"""
         
         if MOCK_MODE or not os.getenv("OPENAI_API_KEY"):
@@ -31,28 +38,42 @@ class ConversationAgent:
             self.mock_mode = False
             print("🤖 Agent initialized with OpenAI")
         
-        self.memory = ConversationBufferMemory(return_messages=True)
-        self.slots = {
+        self.memory = TokenBudgetMemory()
+        self.last_prompt_tokens = None
+        self.slots = self._new_slots()
+        self.tools = tools or build_tools()
+
+    @staticmethod
+    def _new_slots() -> Dict[str, Any]:
+        return {
             "current_city": None,
             "current_outlet": None,
             "last_intent": None,
             "last_user_input": "",
-        }
-        self.tools = {
-            "calculator": CalculatorTool(),
-            "products": ProductRAGTool(),
-            "outlets": OutletSQLTool()
+            "calc_expr": None
         }
 
-    def update_slots(self, user_input: str) -> None:
-        """Extract and update slot values from user input"""
-        city_match = re.search(r'(Petaling Jaya|Kuala Lumpur|SS 2|Bangsar|Subang)', user_input, re.IGNORECASE)
-        if city_match:
-            self.slots["current_city"] = city_match.group(1)
-        
-        outlet_match = re.search(r'(SS 2|Bangsar|Subang|Damansara|KLCC|Mont Kiara|Sentul|Puchong)', user_input, re.IGNORECASE)
-        if outlet_match:
-            self.slots["current_outlet"] = outlet_match.group(1)
+    def fork(self) -> "ConversationAgent":
+        """Create a fresh conversation that shares this agent's LLM and tools"""
+        agent = copy.copy(self)
+        agent.memory = TokenBudgetMemory(self.memory.max_tokens, self.memory.summary_tokens, self.memory.summarize)
+        agent.last_prompt_tokens = None
+        agent.slots = self._new_slots()
+        return agent
+
+    def memory_bytes(self) -> int:
+        """Approximate size of this conversation's own state (slots and history)"""
+        size = sys.getsizeof(self.slots) + sum(sys.getsizeof(v) for v in self.slots.values())
+        return size + self.memory.nbytes()
+
+    def update_slots(self, user_input: str) -> Dict[str, str]:
+        """Extract and update slot values from user input; returns the places found"""
+        places = get_gazetteer().resolve(user_input)
+        if "city" in places:
+            self.slots["current_city"] = places["city"]
+        if "outlet" in places:
+            self.slots["current_outlet"] = places["outlet"]
+        return places
 
     def get_followup_prompt(self, intent: str) -> str:
         """Generate follow-up questions based on intent"""
@@ -62,44 +83,25 @@ class ConversationAgent:
             return "What would you like to calculate? (e.g., 5 * 6)"
         return ""
 
-    def parse_intent(self, user_input: str) -> str:
-        """Classify user intent from input"""
-        user_lower = user_input.lower()
-        
-        # Calculator intent
-        if any(w in user_lower for w in ["calculate", "add", "subtract", "multiply", "divide", "+", "-", "*", "/"]):
-            if re.search(r'\d+\s*[\+\-\*/]\s*\d+', user_input):
-                return "calculate"
-            if any(w in user_lower for w in ["calculate", "add", "subtract", "multiply", "divide"]):
-                return "calculate"     
-        # Product intent
-        if any(w in user_lower for w in ["product", "drinkware", "tumbler", "mug", "cup", "bottle", "price", "buy", "sell"]):
-            return "product"
-        # Outlet intent
-        if any(w in user_lower for w in ["outlet", "store", "location", "branch", "open", "hours", "where", "address"]):
+    def parse_intent(self, user_input: str, places: Optional[Dict[str, str]] = None,
+                     recognition: Optional[Recognition] = None) -> str:
+        """Classify user intent from input; places and recognition reuse this turn's results, if already known"""
+        intent = (recognition or recognize(user_input)).intent
+        if places is None:
+            places = get_gazetteer().resolve(user_input)
+        # Any known outlet or city (not just the keyword list) means the user is asking about outlets
+        if intent == "unknown" and places:
             return "outlet"
-        # Check for specific outlet names
-        if any(name in user_lower for name in ["ss 2", "ss2", "bangsar", "klcc", "subang", "damansara", "mont kiara"]):
-            return "outlet"
-        # Check for city names
-        if any(city in user_lower for city in ["petaling jaya", "kuala lumpur", "kl", "selangor"]):
-            return "outlet"
-        
-        return "unknown"
+        return intent
 
-    def extract_calculation(self, user_input: str) -> str:
+    def extract_calculation(self, user_input: str, recognition: Optional[Recognition] = None) -> str:
         """Extract mathematical expression from user input"""
-        match = re.search(r'([\d\+\-\*/\(\)\.\s]+)', user_input)
-        if match:
-            expr = match.group(1).strip()
-            if any(op in expr for op in "+-*/"):
-                return expr
-        return ""
+        return (recognition or recognize(user_input)).calc_expr
 
-    def plan_action(self, intent: str, user_input: str) -> str:
+    def plan_action(self, intent: str, user_input: str, recognition: Optional[Recognition] = None) -> str:
         """Decide what action to take based on intent and context"""
         if intent == "calculate":
-            expr = self.extract_calculation(user_input)
+            expr = self.extract_calculation(user_input, recognition)
             if expr:
                 self.slots["calc_expr"] = expr
                 return "execute_calculator"
@@ -118,47 +120,100 @@ class ConversationAgent:
         else:
             return "fallback_llm"
 
+    def _tool_call(self, action: str):
+        """Map an execute_* action to the tool name and input it needs"""
+        if action == "execute_calculator":
+            return "calculator", self.slots.get("calc_expr", "")
+        elif action == "execute_products":
+            return "products", self.slots.get("last_user_input", "")
+        elif action == "execute_outlets":
+            return "outlets", self.slots.get("current_outlet", "") + " outlet"
+        return None
+
+    def _format_result(self, action: str, result: dict) -> str:
+        """Turn a tool result into the reply text"""
+        if "error" in result:
+            return result["error"]
+        
+        if action == "execute_calculator":
+            return f"The result is {result['result']}"
+        
+        elif action == "execute_products":
+            return result.get("answer", "No information found.")
+        
+        if not result.get("results"):
+            return f"I couldn't find information about the {self.slots.get('current_outlet')} outlet. Please try another location."
+        
+        outlet = result["results"][0]
+        return f"{outlet['name']} is located at {outlet['address']}. Operating hours: {outlet['opening_hours']}. Services: {outlet.get('services', 'Dine-in, Takeaway')}."
+
     def execute_action(self, action: str) -> str:
         """Execute the planned action"""
         try:
-            if action == "execute_calculator":
-                result = self.tools["calculator"].run(self.slots.get("calc_expr", ""))
-                if "error" in result:
-                    return result["error"]
-                return f"The result is {result['result']}"
-            
-            elif action == "execute_products":
-                result = self.tools["products"].run(self.slots.get("last_user_input", ""))
-                if "error" in result:
-                    return result["error"]
-                return result.get("answer", "No information found.")
-            
-            elif action == "execute_outlets":
-                outlet_query = self.slots.get("current_outlet", "") + " outlet"
-                result = self.tools["outlets"].run(outlet_query)
-                
-                if "error" in result:
-                    return result["error"]
-                
-                if not result.get("results"):
-                    return f"I couldn't find information about the {self.slots.get('current_outlet')} outlet. Please try another location."
-                
-                outlet = result["results"][0]
-                return f"{outlet['name']} is located at {outlet['address']}. Operating hours: {outlet['opening_hours']}. Services: {outlet.get('services', 'Dine-in, Takeaway')}."
-            
-            return "I'm not sure how to help with that."
+            call = self._tool_call(action)
+            if call is None:
+                return "I'm not sure how to help with that."
+            name, tool_input = call
+            return self._format_result(action, self.tools[name].run(tool_input))
+        
+        except Exception as e:
+            return f"I encountered an error: {str(e)}. Please try rephrasing your question."
+
+    async def aexecute_action(self, action: str) -> str:
+        """Execute the planned action, awaiting the tool"""
+        try:
+            call = self._tool_call(action)
+            if call is None:
+                return "I'm not sure how to help with that."
+            name, tool_input = call
+            return self._format_result(action, await self.tools[name].arun(tool_input))
         
         except Exception as e:
             return f"I encountered an error: {str(e)}. Please try rephrasing your question."
 
+    def _plan_turn(self, user_input: str) -> str:
+        """Update slots and intent for this turn and return the planned action"""
+        self.slots["last_user_input"] = user_input
+        self.last_prompt_tokens = None
+        places = self.update_slots(user_input)
+        # One recognizer pass per turn, shared by intent and calculation extraction
+        recognition = recognize(user_input)
+        intent = self.parse_intent(user_input, places, recognition)
+        self.slots["last_intent"] = intent
+        return self.plan_action(intent, user_input, recognition)
+
+    def _mock_reply(self, user_input: str) -> str:
+        user_lower = user_input.lower()
+        
+        if any(greeting in user_lower for greeting in ["hello", "hi", "hey"]):
+            return "Hello! I'm your ZUS Coffee assistant. I can help you find outlets, learn about our products, or do calculations. What would you like to know?"
+        
+        if "thank" in user_lower:
+            return "You're welcome! Is there anything else I can help you with?"
+        
+        if any(word in user_lower for word in ["help", "what can you do", "how"]):
+            return "I can help you with:\n• Finding ZUS Coffee outlet locations and hours\n• Information about our drinkware products (tumblers, mugs, accessories)\n• Simple calculations\n\nWhat would you like to know?"
+        
+        return "I'm here to help with ZUS Coffee outlets, products, or calculations. What would you like to know?"
+
+    def _fallback_prompt(self, user_input: str) -> str:
+        """Budgeted history plus the new message; records the prompt's token count for this turn"""
+        prompt, self.last_prompt_tokens = self.memory.prompt(user_input)
+        return prompt
+
+    async def _allm_reply(self, user_input: str) -> str:
+        prompt = self._fallback_prompt(user_input)
+        if hasattr(self.llm, "ainvoke"):
+            response = await self.llm.ainvoke(prompt)
+        else:
+            response = await asyncio.to_thread(self.llm.invoke, prompt)
+        self.memory.save_turn(user_input, response.content)
+        return response.content
+
     def process_turn(self, user_input: str) -> str:
         """Process a single conversation turn"""
         try:
-            self.slots["last_user_input"] = user_input
-            self.update_slots(user_input)
-            intent = self.parse_intent(user_input)
-            self.slots["last_intent"] = intent
-            action = self.plan_action(intent, user_input)
+            action = self._plan_turn(user_input)
             if action == "ask_calc_expr":
                 return self.get_followup_prompt("calculate")
             
@@ -168,38 +223,76 @@ class ConversationAgent:
             elif action.startswith("execute_"):
                 return self.execute_action(action)
             
+            elif self.mock_mode:
+                return self._mock_reply(user_input)
+            
+            else:
+                response = self.llm.invoke(self._fallback_prompt(user_input))
+                self.memory.save_turn(user_input, response.content)
+                return response.content
+        
+        except Exception as e:
+            return f"I apologize, but I encountered an error. Please try asking in a different way. (Error: {str(e)})"
+
+    async def aprocess_turn(self, user_input: str) -> str:
+        """Async process_turn: tool calls and the LLM fallback are awaited instead of blocking"""
+        try:
+            action = self._plan_turn(user_input)
+            if action == "ask_calc_expr":
+                return self.get_followup_prompt("calculate")
+            
+            elif action == "ask_outlet":
+                return self.get_followup_prompt("outlet")
+            
+            elif action.startswith("execute_"):
+                return await self.aexecute_action(action)
+            
+            elif self.mock_mode:
+                return self._mock_reply(user_input)
+            
             else:
-                if self.mock_mode:
-                    user_lower = user_input.lower()
-                    
-                    if any(greeting in user_lower for greeting in ["hello", "hi", "hey"]):
-                        return "Hello! I'm your ZUS Coffee assistant. I can help you find outlets, learn about our products, or do calculations. What would you like to know?"
-                    
-                    if "thank" in user_lower:
-                        return "You're welcome! Is there anything else I can help you with?"
-                    
-                    if any(word in user_lower for word in ["help", "what can you do", "how"]):
-                        return "I can help you with:\n• Finding ZUS Coffee outlet locations and hours\n• Information about our drinkware products (tumblers, mugs, accessories)\n• Simple calculations\n\nWhat would you like to know?"
-                    
-                    return "I'm here to help with ZUS Coffee outlets, products, or calculations. What would you like to know?"
-                else:
-                    history = self.memory.load_memory_variables({}).get("history", [])
-                    history_text = "\n".join([str(msg) for msg in history])
-                    prompt = f"{history_text}\nUser: {user_input}\nBot:"
-                    response = self.llm.invoke(prompt)
-                    self.memory.save_context({"input": user_input}, {"output": response.content})
-                    return response.content
+                return await self._allm_reply(user_input)
         
         except Exception as e:
             return f"I apologize, but I encountered an error. Please try asking in a different way. (Error: {str(e)})"
 
+    async def astream_turn(self, user_input: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Streaming aprocess_turn. Yields ("token", text) chunks for LLM-generated replies
+        (product answers and the fallback) and a single ("message", text) for everything else.
+        """
+        try:
+            action = self._plan_turn(user_input)
+            if action == "execute_products":
+                async for chunk in self.tools["products"].astream(self.slots.get("last_user_input", "")):
+                    yield "token", chunk
+            
+            elif action == "fallback_llm" and not self.mock_mode and hasattr(self.llm, "astream"):
+                chunks = []
+                async for chunk in self.llm.astream(self._fallback_prompt(user_input)):
+                    chunks.append(chunk.content)
+                    yield "token", chunk.content
+                self.memory.save_turn(user_input, "".join(chunks))
+            
+            elif action.startswith("execute_"):
+                yield "message", await self.aexecute_action(action)
+            
+            elif action == "ask_calc_expr":
+                yield "message", self.get_followup_prompt("calculate")
+            
+            elif action == "ask_outlet":
+                yield "message", self.get_followup_prompt("outlet")
+            
+            elif self.mock_mode:
+                yield "message", self._mock_reply(user_input)
+            
+            else:
+                yield "message", await self._allm_reply(user_input)
+        
+        except Exception as e:
+            yield "message", f"I apologize, but I encountered an error. Please try asking in a different way. (Error: {str(e)})"
+
     def reset(self):
         """Reset conversation state"""
         self.memory.clear()
-        self.slots = {
-            "current_city": None,
-            "current_outlet": None,
-            "last_intent": None,
-            "last_user_input": "",
-            "calc_expr": None
-        }
\ No newline at end of file
+        self.slots = self._new_slots()
\ No newline at end of file
@@ -0,0 +1,299 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import ast
+import math
+import operator
+import time
+import re
+import os
+
+MAX_EXPR_LENGTH = int(os.getenv("CALC_MAX_LENGTH", "1000"))
+MAX_DEPTH = int(os.getenv("CALC_MAX_DEPTH", "32"))
+MAX_OPERAND_DIGITS = int(os.getenv("CALC_MAX_OPERAND_DIGITS", "30"))
+MAX_EXPONENT = int(os.getenv("CALC_MAX_EXPONENT", "1000"))
+MAX_RESULT_BITS = int(os.getenv("CALC_MAX_RESULT_BITS", "4096"))
+TIME_LIMIT = float(os.getenv("CALC_TIME_LIMIT", "0.5"))
+BATCH_TIME_LIMIT = float(os.getenv("CALC_BATCH_TIME_LIMIT", "5"))
+MAX_BATCH = int(os.getenv("CALC_MAX_BATCH", "10000"))
+COMPILE_CACHE_SIZE = int(os.getenv("CALC_CACHE_SIZE", "4096"))
+# Groups of identically-shaped expressions at least this large are evaluated as NumPy columns
+VECTORIZE_MIN = int(os.getenv("CALC_VECTORIZE_MIN", "8"))
+
+ALLOWED_CHARS = re.compile(r'^[\d+\-*/().\s]+$')
+# Largest magnitude at which every integer is exactly representable as a float64
+EXACT_INT = 2 ** 53
+
+BINARY_OPS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.FloorDiv: "//", ast.Pow: "**"}
+UNARY_OPS = {ast.USub: "neg", ast.UAdd: "pos"}
+CONST = "c"
+NUMBER = re.compile(r'[\d.]+')
+PLACEHOLDER = "x"
+
+
+class CalculationError(ValueError):
+    """Expression rejected by the parser or by an evaluation limit"""
+
+
+class Program:
+    """
+    A validated expression compiled to postfix code. Constants are kept apart from the
+    code, so expressions with the same shape share a signature and can be evaluated together.
+    """
+    __slots__ = ("code", "constants", "signature")
+
+    def __init__(self, code: Tuple[str, ...], constants: Sequence[Any]):
+        self.code = code
+        self.constants = tuple(constants)
+        self.signature = (code, tuple([type(c) is int for c in self.constants]))
+
+
+def _emit(node: ast.AST, code: List[str], depth: int) -> None:
+    if depth > MAX_DEPTH:
+        raise CalculationError(f"Expression nested too deeply (max {MAX_DEPTH})")
+
+    # A left-associative chain ("1 + 2 + 3 ...") is walked in a loop and counts as one level;
+    # MAX_EXPR_LENGTH bounds its length. Only right operands and unary operators nest deeper.
+    chain = []
+    while isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+        chain.append(node)
+        node = node.left
+
+    if isinstance(node, ast.Name) and node.id == PLACEHOLDER:
+        code.append(CONST)
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+        _emit(node.operand, code, depth + 1)
+        code.append(UNARY_OPS[type(node.op)])
+    else:
+        raise CalculationError("Unsupported expression")
+
+    for binop in reversed(chain):
+        _emit(binop.right, code, depth + 1)
+        code.append(BINARY_OPS[type(binop.op)])
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_shape(shape: str) -> Tuple[str, ...]:
+    """Parse an expression with its numbers replaced by placeholders into postfix code"""
+    try:
+        tree = ast.parse(shape.strip(), mode="eval")
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise CalculationError("Malformed expression")
+
+    code = []
+    _emit(tree.body, code, 0)
+    return tuple(code)
+
+
+def _parse_number(literal: str):
+    if len(literal) > MAX_OPERAND_DIGITS:
+        raise CalculationError(f"Number too long (max {MAX_OPERAND_DIGITS} digits)")
+    if "." in literal:
+        try:
+            return float(literal)
+        except ValueError:
+            raise CalculationError("Malformed expression")
+    if len(literal) > 1 and literal[0] == "0" and literal.strip("0"):
+        # Python rejects leading zeros on non-zero integers ("007")
+        raise CalculationError("Malformed expression")
+    return int(literal)
+
+
+def compile_expression(expr: str) -> Program:
+    """
+    Validate an expression and compile it to a Program. Parsing is cached per shape
+    ("12 * 3" and "4 * 5" share one parse), so only the numbers are read per call.
+    """
+    if len(expr) > MAX_EXPR_LENGTH:
+        raise CalculationError(f"Expression too long (max {MAX_EXPR_LENGTH} characters)")
+    if not ALLOWED_CHARS.match(expr):
+        raise CalculationError("Invalid characters in expression")
+
+    constants = [_parse_number(literal) for literal in NUMBER.findall(expr)]
+    return Program(_compile_shape(NUMBER.sub(PLACEHOLDER, expr)), constants)
+
+
+def _check_size(value):
+    if isinstance(value, complex):
+        raise CalculationError("Result is not a real number")
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise CalculationError("Result too large")
+    elif value.bit_length() > MAX_RESULT_BITS:
+        raise CalculationError("Result too large")
+    return value
+
+
+def _power(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculationError(f"Exponent too large (max {MAX_EXPONENT})")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        if (base.bit_length() - 1) * exponent > MAX_RESULT_BITS:
+            raise CalculationError("Result too large")
+    return base ** exponent
+
+
+def _multiply(a, b):
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > MAX_RESULT_BITS + 1:
+        raise CalculationError("Result too large")
+    return a * b
+
+
+SCALAR_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": _multiply,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "**": _power,
+}
+
+
+def evaluate(program: Program, deadline: Optional[float] = None):
+    """Run a compiled program on Python numbers, enforcing size and time limits at every step"""
+    deadline = deadline or time.perf_counter() + TIME_LIMIT
+    stack = []
+    constants = iter(program.constants)
+    try:
+        for step, op in enumerate(program.code):
+            if step % 64 == 63 and time.perf_counter() > deadline:
+                raise CalculationError("Calculation took too long")
+            if op == CONST:
+                stack.append(next(constants))
+            elif op == "neg":
+                stack.append(-stack.pop())
+            elif op == "pos":
+                stack.append(+stack.pop())
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                stack.append(_check_size(SCALAR_OPS[op](a, b)))
+    except ZeroDivisionError:
+        raise CalculationError("Cannot divide by zero")
+    except OverflowError:
+        raise CalculationError("Result too large")
+    return stack.pop()
+
+
+def calculate(expr: str):
+    """Compile (cached) and evaluate a single expression"""
+    return evaluate(compile_expression(expr))
+
+
+def _evaluate_columns(signature, programs: List[Program], results: List[Optional[Dict[str, Any]]],
+                      indices: List[int], deadline: float) -> List[int]:
+    """
+    Evaluate programs that share a signature as float64 columns. Integer-typed values are only
+    trusted while they stay below 2**53; rows that leave that range (or hit an error) are
+    reported per row exactly as the scalar engine would. Returns the rows that need the scalar path.
+    """
+    code, int_kinds = signature
+    n = len(programs)
+    constants = np.array([p.constants for p in programs], dtype=np.float64).reshape(n, len(int_kinds))
+    errors = [None] * n
+    failed = np.zeros(n, dtype=bool)
+    inexact = np.zeros(n, dtype=bool)
+    stack = []
+    column = 0
+
+    with np.errstate(all="ignore"):
+        for op in code:
+            if op == CONST:
+                values = constants[:, column]
+                is_int = int_kinds[column]
+                if is_int:
+                    inexact |= np.abs(values) >= EXACT_INT
+                stack.append((values, is_int))
+                column += 1
+            elif op == "neg":
+                values, is_int = stack.pop()
+                stack.append((-values, is_int))
+            elif op == "pos":
+                continue
+            else:
+                b, b_int = stack.pop()
+                a, a_int = stack.pop()
+                is_int = a_int and b_int and op != "/"
+                if op in ("/", "//"):
+                    zero = (b == 0) & ~failed
+                    for row in np.flatnonzero(zero):
+                        errors[row] = "Cannot divide by zero"
+                    failed |= zero
+                    b = np.where(b == 0, 1.0, b)
+                    values = a / b if op == "/" else np.floor_divide(a, b)
+                elif op == "+":
+                    values = a + b
+                elif op == "-":
+                    values = a - b
+                else:
+                    values = a * b
+
+                overflow = ~np.isfinite(values) & ~failed
+                for row in np.flatnonzero(overflow):
+                    errors[row] = "Result too large"
+                failed |= overflow
+                if is_int:
+                    inexact |= np.abs(values) >= EXACT_INT
+                stack.append((values, is_int))
+
+    values, is_int = stack.pop()
+    scalar_rows = []
+    for row, index in enumerate(indices):
+        if inexact[row]:
+            scalar_rows.append(index)
+        elif failed[row]:
+            results[index] = {"error": errors[row]}
+        else:
+            value = values[row].item()
+            results[index] = {"result": int(value) if is_int else value}
+    return scalar_rows
+
+
+def calculate_batch(exprs: Sequence[str]) -> Dict[str, Any]:
+    """
+    Evaluate many expressions; results are in request order with an error per failed item.
+    Expressions are grouped by shape and large groups of plain arithmetic are vectorized.
+    """
+    if len(exprs) > MAX_BATCH:
+        raise CalculationError(f"Too many expressions (max {MAX_BATCH})")
+
+    deadline = time.perf_counter() + BATCH_TIME_LIMIT
+    results: List[Optional[Dict[str, Any]]] = [None] * len(exprs)
+    programs: List[Optional[Program]] = [None] * len(exprs)
+    groups: Dict[Any, List[int]] = {}
+
+    for i, expr in enumerate(exprs):
+        try:
+            programs[i] = compile_expression(expr)
+        except CalculationError as e:
+            results[i] = {"error": str(e)}
+            continue
+        groups.setdefault(programs[i].signature, []).append(i)
+
+    scalar = []
+    vectorized = 0
+    for signature, indices in groups.items():
+        if len(indices) < VECTORIZE_MIN or "**" in signature[0]:
+            scalar.extend(indices)
+            continue
+        fallback = _evaluate_columns(signature, [programs[i] for i in indices], results, indices, deadline)
+        vectorized += len(indices) - len(fallback)
+        scalar.extend(fallback)
+
+    for i in scalar:
+        if time.perf_counter() > deadline:
+            results[i] = {"error": "Calculation took too long"}
+            continue
+        try:
+            results[i] = {"result": evaluate(programs[i], min(deadline, time.perf_counter() + TIME_LIMIT))}
+        except CalculationError as e:
+            results[i] = {"error": str(e)}
+
+    for expr, result in zip(exprs, results):
+        result["expression"] = expr
+    return {"results": results, "count": len(results), "vectorized": vectorized}
+
+
+def cache_stats() -> Dict[str, Any]:
+    info = _compile_shape.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
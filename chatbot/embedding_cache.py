@@ -0,0 +1,193 @@
+from langchain_core.embeddings import Embeddings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import contextlib
+import asyncio
+import hashlib
+import threading
+import fcntl
+import json
+import os
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings")
+KEY_BYTES = 32
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store for one model.
+    keys.bin holds 32-byte SHA-256 digests and vectors.f32 the matching float32 rows;
+    vectors are read through a memory map, nothing is pickled. Appends and tail repairs hold an
+    exclusive lock on the store's lock file, so ingestion and the API can share one store.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.keys_path = os.path.join(directory, "keys.bin")
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "lock")
+        self.dim = None
+        self._rows = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+        if os.path.exists(self.meta_path):
+            with self._lock, self._file_lock():
+                self._sync()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """
+        Re-read the key index from disk (other processes may have appended). Called with the file
+        lock held, so any mismatch between the two files is the tail of an interrupted append:
+        both files are cut back to the rows that were completely written.
+        """
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path) as f:
+            self.dim = json.load(f)["dim"]
+        key_bytes = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        n = min(key_bytes // KEY_BYTES, vector_bytes // (4 * self.dim))
+        if key_bytes != n * KEY_BYTES:
+            os.truncate(self.keys_path, n * KEY_BYTES)
+        if vector_bytes != n * 4 * self.dim:
+            os.truncate(self.vectors_path, n * 4 * self.dim)
+        keys = np.fromfile(self.keys_path, dtype=f"S{KEY_BYTES}", count=n) if n else []
+        self._rows = {bytes(k): i for i, k in enumerate(keys)}
+        self._mmap = None
+
+    def _grown(self) -> bool:
+        """Whether another process appended keys since this one last read them"""
+        try:
+            return os.path.getsize(self.keys_path) > len(self._rows) * KEY_BYTES
+        except FileNotFoundError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _vectors(self) -> np.ndarray:
+        n = len(self._rows)
+        if self._mmap is None or self._mmap.shape[0] < n:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        return self._mmap
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            rows = [self._rows.get(k) for k in keys]
+            if None in rows and self._grown():
+                with self._file_lock():
+                    self._sync()
+                rows = [self._rows.get(k) for k in keys]
+            if all(r is None for r in rows):
+                return [None] * len(keys)
+            vectors = self._vectors()
+            return [None if r is None else np.array(vectors[r]) for r in rows]
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        with self._lock, self._file_lock():
+            # Row numbers come from the files as they are now, not from this process's last view
+            self._sync()
+            new = {}
+            for k, v in zip(keys, vectors):
+                if k not in self._rows and k not in new:
+                    new[k] = v
+            if not new:
+                return
+            array = np.asarray(list(new.values()), dtype=np.float32)
+            if self.dim is None:
+                self.dim = array.shape[1]
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            elif array.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {array.shape[1]} does not match cache dimension {self.dim}")
+            # Vectors first: a crash after this leaves rows without keys, which _sync cuts off
+            with open(self.vectors_path, "ab") as f:
+                f.write(array.tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new.keys()))
+            start = len(self._rows)
+            for i, k in enumerate(new):
+                self._rows[k] = start + i
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingStore keyed on content hash"""
+
+    def __init__(self, embeddings: Embeddings, namespace: str, cache_dir: str = CACHE_DIR):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.store = EmbeddingStore(os.path.join(cache_dir, namespace))
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[str], list, List[int]]:
+        """Content keys, the cached vectors (None where missing) and the indices still to embed"""
+        keys = [content_key(t) for t in texts]
+        cached = self.store.get_many(keys)
+        missing = [i for i, v in enumerate(cached) if v is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return keys, cached, missing
+
+    def _fill(self, keys: List[str], cached: list, missing: List[int], fresh) -> List[List[float]]:
+        """Store the freshly embedded vectors and return every vector in input order"""
+        if missing:
+            self.store.put_many([keys[i] for i in missing], fresh)
+            # Round fresh vectors through float32 so hits and misses return identical values
+            for i, v in zip(missing, np.asarray(fresh, dtype=np.float32)):
+                cached[i] = v
+        return [v.tolist() for v in cached]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._lookup(texts)
+        fresh = self.embeddings.embed_documents([texts[i] for i in missing]) if missing else []
+        return self._fill(keys, cached, missing, fresh)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # The store reads files, takes a file lock and appends, so it runs in a worker thread
+        keys, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        if not missing:
+            return self._fill(keys, cached, missing, [])
+        fresh = await self.embeddings.aembed_documents([texts[i] for i in missing])
+        return await asyncio.to_thread(self._fill, keys, cached, missing, fresh)
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, missing = self._lookup([text])
+        fresh = [self.embeddings.embed_query(text)] if missing else []
+        return self._fill(keys, cached, missing, fresh)[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, cached, missing = await asyncio.to_thread(self._lookup, [text])
+        if not missing:
+            return self._fill(keys, cached, missing, [])[0]
+        fresh = [await self.embeddings.aembed_query(text)]
+        return (await asyncio.to_thread(self._fill, keys, cached, missing, fresh))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "entries": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def cached_openai_embeddings(model: str = "text-embedding-ada-002") -> CachedEmbeddings:
+    """OpenAIEmbeddings wrapped in the shared disk cache, as used by ingestion and /products"""
+    from langchain_openai import OpenAIEmbeddings
+    return CachedEmbeddings(OpenAIEmbeddings(model=model), namespace=model)
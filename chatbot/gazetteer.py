@@ -0,0 +1,198 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import threading
+import time
+import re
+import os
+
+from .outlet_db import OUTLET_DB_PATH
+from .sql_cache import OUTLET_ALIASES
+
+CITY = "city"
+OUTLET = "outlet"
+
+# The DB file is stat'ed for changes at most this often (seconds)
+CHECK_INTERVAL = float(os.getenv("GAZETTEER_CHECK_INTERVAL", "5"))
+# Resolved places are cached per message text, per build of the gazetteer
+RESOLVE_CACHE_SIZE = int(os.getenv("GAZETTEER_CACHE_SIZE", "1024"))
+
+# Places the agent knew before the gazetteer was data-driven; kept so it still resolves them
+# when the outlets table is missing or does not list them
+DEFAULT_CITIES = ["Petaling Jaya", "Kuala Lumpur", "SS 2", "Bangsar", "Subang"]
+DEFAULT_OUTLETS = ["SS 2", "Bangsar", "Subang", "Damansara", "KLCC", "Mont Kiara", "Sentul", "Puchong"]
+
+# Words split at letter/digit boundaries, so "SS2", "ss 2" and "SS-2" all read as ["ss", "2"]
+TOKEN = re.compile(r'[^\W\d_]+|\d+')
+OUTLET_NAME = re.compile(r'^\s*ZUS Coffee\s*[-–—]\s*(.+?)\s*$', re.IGNORECASE)
+# "..., 47300 Petaling Jaya, Selangor" -> "Petaling Jaya"
+ADDRESS_CITY = re.compile(r'\b\d{5}\s+([A-Z][a-z]+(?: [A-Z][a-z]+){0,2})(?=\s*(?:,|$))')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+
+def outlet_label(name: str) -> Optional[str]:
+    """Short outlet name users type ("ZUS Coffee - SS 2" -> "SS 2")"""
+    match = OUTLET_NAME.match(name or "")
+    return match.group(1) if match else None
+
+
+def address_city(address: str) -> Optional[str]:
+    match = ADDRESS_CITY.search(address or "")
+    return match.group(1) if match else None
+
+
+class Gazetteer:
+    """
+    Token trie of city and outlet names with their aliases and spacing variants.
+    Resolution walks the trie from each input token, so its cost depends on the input length
+    and the longest name (in tokens), not on how many places are indexed.
+    """
+
+    def __init__(self, cities: Iterable[str] = (), outlets: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        self.labels = {CITY: set(), OUTLET: set()}
+        for city in cities:
+            self.add(city, CITY)
+        for outlet in outlets:
+            self.add(outlet, OUTLET)
+        self._add_aliases()
+
+    def _insert(self, tokens: List[str], label: str, kind: str) -> None:
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # Terminal entries live under the "" key, which no token can equal
+        node.setdefault("", {}).setdefault(kind, label)
+
+    def add(self, label: str, kind: str) -> None:
+        """Index a name, plus its run-together form ("Mont Kiara" also matches "montkiara")"""
+        self.labels[kind].add(label)
+        tokens = tokenize(label)
+        self._insert(tokens, label, kind)
+        self._insert(tokenize("".join(tokens)), label, kind)
+
+    def _add_aliases(self) -> None:
+        for kind, labels in self.labels.items():
+            by_name = {" ".join(tokenize(label)): label for label in labels}
+            for alias, canonical in OUTLET_ALIASES.items():
+                alias_name, canonical_name = " ".join(tokenize(alias)), " ".join(tokenize(canonical))
+                # Aliases work both ways, and only point at places this gazetteer knows
+                if canonical_name in by_name and alias_name not in by_name:
+                    self._insert(alias_name.split(), by_name[canonical_name], kind)
+                if alias_name in by_name and canonical_name not in by_name:
+                    self._insert(canonical_name.split(), by_name[alias_name], kind)
+
+    def resolve(self, text: str) -> Dict[str, str]:
+        """Leftmost (then longest) city and outlet mentioned in the text, as canonical labels"""
+        tokens = tokenize(text)
+        found: Dict[str, str] = {}
+        for start in range(len(tokens)):
+            node = self._root
+            longest: Dict[str, str] = {}
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                longest.update(node.get("", {}))
+            for kind, label in longest.items():
+                found.setdefault(kind, label)
+            if len(found) == 2:
+                break
+        return found
+
+    def __len__(self) -> int:
+        return len(self.labels[CITY]) + len(self.labels[OUTLET])
+
+
+def read_places(db_path: str) -> Tuple[List[str], List[str]]:
+    """Cities (from addresses) and outlet labels (from names) in the outlets table"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT name, address FROM outlets").fetchall()
+    finally:
+        conn.close()
+    cities = [c for c in (address_city(address) for _, address in rows) if c]
+    outlets = [o for o in (outlet_label(name) for name, _ in rows) if o]
+    return cities, outlets
+
+
+class OutletGazetteer:
+    """
+    The gazetteer for the outlets DB, rebuilt when the DB file changes. The file is checked at
+    most every check_interval seconds, and resolutions are cached until the next rebuild.
+    """
+
+    def __init__(self, db_path: str = OUTLET_DB_PATH, check_interval: float = CHECK_INTERVAL):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.version = None
+        self.gazetteer = None
+        self.db_outlets = 0
+        self.reloads = 0
+        self._checked = 0.0
+        self._resolve = None
+        self._lock = threading.Lock()
+
+    def disk_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> Gazetteer:
+        """Current gazetteer, (re)built from the outlets table if the DB changed since the last build"""
+        now = time.monotonic()
+        if self.gazetteer is not None and now - self._checked < self.check_interval:
+            return self.gazetteer
+        version = self.disk_version()
+        self._checked = now
+        if self.gazetteer is not None and version == self.version:
+            return self.gazetteer
+        with self._lock:
+            if self.gazetteer is None or version != self.version:
+                cities, outlets = [], []
+                if version is not None:
+                    try:
+                        cities, outlets = read_places(self.db_path)
+                    except sqlite3.Error as e:
+                        print(f"Gazetteer could not read {self.db_path}: {e}")
+                self.gazetteer = Gazetteer(DEFAULT_CITIES + cities, DEFAULT_OUTLETS + outlets)
+                self._resolve = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self.gazetteer.resolve)
+                self.db_outlets = len(set(outlets))
+                self.version = version
+                self.reloads += 1
+            return self.gazetteer
+
+    def resolve(self, text: str) -> Dict[str, str]:
+        self.load()
+        # A copy, so callers cannot change the cached result
+        return dict(self._resolve(text))
+
+    def stats(self) -> Dict[str, Any]:
+        gazetteer = self.gazetteer
+        cache = self._resolve.cache_info() if self._resolve else None
+        return {
+            "loaded": gazetteer is not None,
+            "cities": len(gazetteer.labels[CITY]) if gazetteer else 0,
+            "outlets": len(gazetteer.labels[OUTLET]) if gazetteer else 0,
+            "db_outlets": self.db_outlets,
+            "reloads": self.reloads,
+            "cache_hits": cache.hits if cache else 0,
+            "cache_misses": cache.misses if cache else 0,
+        }
+
+
+gazetteer = None
+
+
+def get_gazetteer() -> OutletGazetteer:
+    global gazetteer
+    if gazetteer is None:
+        gazetteer = OutletGazetteer()
+    return gazetteer
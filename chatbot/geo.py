@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import sqlite3
+import math
+import csv
+import re
+import os
+
+# Offline geocoding table: approximate centroid per postcode, so ingestion needs no network
+POSTCODE_TABLE_PATH = "data/postcodes.csv"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Nearest-outlet search starts with a box this wide and grows it until the k nearest are inside
+NEARBY_START_KM = float(os.getenv("NEARBY_START_KM", "5"))
+NEARBY_MAX_K = int(os.getenv("NEARBY_MAX_K", "50"))
+# Half the Earth's circumference: a box this wide covers every outlet
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+
+POSTCODE = re.compile(r'(?<!\d)\d{5}(?!\d)')
+
+GEO_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS outlet_locations (
+        outlet_id INTEGER PRIMARY KEY,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL,
+        postcode TEXT
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS outlet_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+]
+
+BOX_QUERY = """
+    SELECT l.outlet_id, l.latitude, l.longitude FROM outlet_rtree r
+    JOIN outlet_locations l ON l.outlet_id = r.id
+    WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat AND r.max_lon >= :min_lon AND r.min_lon <= :max_lon
+"""
+
+Location = Tuple[float, float]
+
+
+def load_postcodes(path: str = POSTCODE_TABLE_PATH) -> Dict[str, Location]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["postcode"]: (float(row["latitude"]), float(row["longitude"])) for row in csv.DictReader(f)}
+
+
+def geocode(address: str, postcodes: Dict[str, Location]) -> Optional[Tuple[str, Location]]:
+    """(postcode, (lat, lon)) for the last known postcode in an address; addresses end with "<postcode> <city>"""
+    for postcode in reversed(POSTCODE.findall(address or "")):
+        if postcode in postcodes:
+            return postcode, postcodes[postcode]
+    return None
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(lat: float, lon: float, km: float) -> Dict[str, float]:
+    """Lat/lon box containing every point within km of (lat, lon)"""
+    dlat = km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; use the box edge nearest a pole so the circle fits
+    edge = min(abs(lat) + dlat, 89.9)
+    dlon = min(km / (KM_PER_DEGREE * math.cos(math.radians(edge))), 180.0)
+    return {"min_lat": lat - dlat, "max_lat": lat + dlat, "min_lon": lon - dlon, "max_lon": lon + dlon}
+
+
+def insert_locations(conn: sqlite3.Connection, locations: Iterable[Tuple[int, float, float, Optional[str]]]) -> int:
+    """Add (outlet_id, lat, lon, postcode) rows to the location table and its R*Tree"""
+    locations = list(locations)
+    conn.executemany("INSERT OR REPLACE INTO outlet_locations VALUES (?, ?, ?, ?)", locations)
+    conn.executemany(
+        "INSERT OR REPLACE INTO outlet_rtree VALUES (?, ?, ?, ?, ?)",
+        [(outlet_id, lat, lat, lon, lon) for outlet_id, lat, lon, _ in locations],
+    )
+    return len(locations)
+
+
+def create_geo_index(conn: sqlite3.Connection, postcodes: Dict[str, Location]) -> Tuple[int, int]:
+    """(Re)build outlet coordinates from address postcodes; returns (located, total) outlets"""
+    for statement in GEO_SCHEMA:
+        conn.execute(statement)
+    conn.execute("DELETE FROM outlet_locations")
+    conn.execute("DELETE FROM outlet_rtree")
+    rows = conn.execute("SELECT rowid, address FROM outlets").fetchall()
+    located = []
+    for rowid, address in rows:
+        found = geocode(address, postcodes)
+        if found:
+            postcode, (lat, lon) = found
+            located.append((rowid, lat, lon, postcode))
+    insert_locations(conn, located)
+    conn.commit()
+    return len(located), len(rows)
+
+
+def nearest(fetch: Callable[[str, Dict[str, float]], Sequence[Any]], lat: float, lon: float,
+            k: int) -> List[Tuple[int, float]]:
+    """
+    The k nearest (outlet_id, km); fetch(sql, params) runs a query and returns its rows.
+    The R*Tree returns the outlets in a box around the point, which grows until the k-th nearest
+    candidate lies within the box's radius (so nothing outside can be nearer); candidates are then
+    ranked with a vectorized haversine.
+    """
+    radius = NEARBY_START_KM
+    while True:
+        rows = fetch(BOX_QUERY, bounding_box(lat, lon, radius))
+        if rows:
+            ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            coords = np.array([(r[1], r[2]) for r in rows], dtype=np.float64)
+            distances = haversine_km(lat, lon, coords[:, 0], coords[:, 1])
+            if len(rows) >= k:
+                top = np.argpartition(distances, k - 1)[:k]
+                if distances[top].max() <= radius or radius >= MAX_RADIUS_KM:
+                    order = top[np.argsort(distances[top], kind="stable")]
+                    return [(int(ids[i]), float(distances[i])) for i in order]
+                # The k-th candidate is this far away, so a box of that radius is guaranteed to suffice
+                radius = min(float(distances[top].max()), MAX_RADIUS_KM)
+                continue
+        if radius >= MAX_RADIUS_KM:
+            order = np.argsort(distances, kind="stable") if rows else []
+            return [(int(ids[i]), float(distances[i])) for i in order]
+        radius = min(radius * 4, MAX_RADIUS_KM)
@@ -0,0 +1,104 @@
+from functools import lru_cache
+from typing import Dict, List
+import re
+
+CALCULATE = "calculate"
+PRODUCT = "product"
+OUTLET = "outlet"
+UNKNOWN = "unknown"
+
+# Intent keywords, matched as case-insensitive substrings; earlier intents win
+INTENT_KEYWORDS = {
+    CALCULATE: ["calculate", "add", "subtract", "multiply", "divide"],
+    PRODUCT: ["product", "drinkware", "tumbler", "mug", "cup", "bottle", "price", "buy", "sell"],
+    OUTLET: ["outlet", "store", "location", "branch", "open", "hours", "where", "address",
+             "ss 2", "ss2", "bangsar", "klcc", "subang", "damansara", "mont kiara",
+             "petaling jaya", "kuala lumpur", "kl", "selangor"],
+}
+INTENT_PRIORITY = [CALCULATE, PRODUCT, OUTLET]
+
+CALC_CHARS = r'[\d+\-*/().\s]'
+# Two numbers joined by an operator anywhere in the input also means "calculate"
+ARITHMETIC = r'\d\s*[+\-*/]\s*\d'
+
+
+class Recognition:
+    """Intent and arithmetic span found in one user message (places are resolved by the gazetteer)"""
+    __slots__ = ("intent", "calc_expr")
+
+    def __init__(self, intent: str, calc_expr: str):
+        self.intent = intent
+        self.calc_expr = calc_expr
+
+    def __repr__(self) -> str:
+        return f"Recognition(intent={self.intent!r}, calc_expr={self.calc_expr!r})"
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex for a set of literals, factored into a trie so matching tries one branch per character"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        optional = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            body = body + "?" if len(branches) == 1 and len(branches[0]) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _build_terms() -> Dict[str, frozenset]:
+    """
+    Every keyword mapped to the intents it signals. The trie match is the longest keyword at a
+    position, so each keyword also carries the intents of the shorter keywords that are its
+    prefixes ("address" also counts as "add").
+    """
+    roles: Dict[str, set] = {}
+    for intent, words in INTENT_KEYWORDS.items():
+        for word in words:
+            roles.setdefault(word, set()).add(intent)
+    return {
+        term: frozenset().union(*(found for other, found in roles.items() if term.startswith(other)))
+        for term in roles
+    }
+
+
+TERMS = _build_terms()
+
+# One scan of the lowercased input: a zero-width lookahead reports every keyword start (overlaps
+# included) and two numbers joined by an operator mark arithmetic. Positions that cannot start
+# either are rejected by the leading character class before the trie is tried.
+TERM_INITIALS = "".join(sorted({term[0] for term in TERMS}))
+RECOGNIZER = re.compile(
+    rf"(?=[{re.escape(TERM_INITIALS)}\d])(?:(?=(?P<term>{_trie_pattern(sorted(TERMS))}))|(?P<arith>{ARITHMETIC}))"
+)
+# The calculator expression is the first run of calculator characters, which ends at the first word
+FIRST_RUN = re.compile(rf"{CALC_CHARS}+")
+
+
+@lru_cache(maxsize=256)
+def recognize(text: str) -> Recognition:
+    """Classify a message and extract its arithmetic expression in a single pass"""
+    intents = set()
+    for term, arith in RECOGNIZER.findall(text.lower()):
+        if term:
+            intents |= TERMS[term]
+        else:
+            intents.add(CALCULATE)
+
+    run = FIRST_RUN.search(text)
+    calc_expr = run.group().strip() if run else ""
+    if not any(op in calc_expr for op in "+-*/"):
+        calc_expr = ""
+
+    intent = next((i for i in INTENT_PRIORITY if i in intents), UNKNOWN)
+    return Recognition(intent, calc_expr)
@@ -0,0 +1,220 @@
+from langchain_core.documents import Document
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import threading
+import json
+import math
+import re
+import os
+
+PRODUCT_DATA_PATH = "data/drinkware.jsonl"
+LEXICAL_INDEX_PATH = "vectorstore/product_bm25.json"
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Title words count this many times, so a name match outweighs the shared boilerplate descriptions
+TITLE_WEIGHT = int(os.getenv("BM25_TITLE_WEIGHT", "2"))
+# Reciprocal rank fusion constant; larger values flatten the gap between ranks
+RRF_K = int(os.getenv("PRODUCT_RRF_K", "60"))
+# Candidates taken from each retriever before fusion
+FUSION_CANDIDATES = int(os.getenv("PRODUCT_FUSION_CANDIDATES", "10"))
+
+# Version numbers stay whole ("2.0"), everything else splits at letter/digit boundaries ("500ml" -> "500", "ml")
+TOKEN = re.compile(r'\d+(?:\.\d+)?|[^\W\d_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms with a light plural strip ("tumblers" -> "tumbler", "glass" unchanged)"""
+    terms = []
+    for token in TOKEN.findall(text.lower()):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def product_name(title: str) -> str:
+    """Title without the size suffix ("OG Cup 2.0 | 500ml" -> "OG Cup 2.0")"""
+    return title.split("|")[0].strip()
+
+
+def product_document(record: Dict[str, Any]) -> Document:
+    """The same Document the vectorstore holds for a catalog record"""
+    return Document(
+        page_content=f"{record.get('title', '')} - {record.get('description', '')}",
+        metadata={"title": record.get("title", "Unknown"), "price": record.get("price", "N/A")},
+    )
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the product catalog. Scoring walks only the postings of the
+    query's terms, so a lookup costs the number of matching documents, not the catalog size.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        self.records = list(records)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        self.names: List[frozenset] = []
+        for doc_id, record in enumerate(self.records):
+            title = record.get("title", "")
+            terms = tokenize(title) * TITLE_WEIGHT + tokenize(record.get("description", ""))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+            self.lengths.append(len(terms))
+            self.names.append(frozenset(tokenize(product_name(title))))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    @classmethod
+    def from_jsonl(cls, path: str = PRODUCT_DATA_PATH) -> "LexicalIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def save(self, path: str = LEXICAL_INDEX_PATH) -> None:
+        """Write the index next to the vectorstore; written to a temp file first so readers never see half of it"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {"records": self.records, "postings": self.postings, "lengths": self.lengths}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = LEXICAL_INDEX_PATH) -> "LexicalIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls.__new__(cls)
+        index.records = data["records"]
+        index.postings = {term: [tuple(p) for p in postings] for term, postings in data["postings"].items()}
+        index.lengths = data["lengths"]
+        index.names = [frozenset(tokenize(product_name(r.get("title", "")))) for r in index.records]
+        index.avg_length = sum(index.lengths) / len(index.lengths) if index.lengths else 0.0
+        return index
+
+    def idf(self, term: str) -> float:
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.records) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Top-k (doc id, score) pairs. Products whose whole name appears in the query come first, longest name first."""
+        terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        def rank(doc_id: int):
+            name = self.names[doc_id]
+            return (-len(name) if name and name <= terms else 0, -scores[doc_id])
+
+        return [(doc_id, scores[doc_id]) for doc_id in sorted(scores, key=rank)[:k]]
+
+    def exact(self, doc_id: int, query: str) -> bool:
+        name = self.names[doc_id]
+        return bool(name) and name <= set(tokenize(query))
+
+    def documents(self, hits: List[Tuple[int, float]]) -> List[Document]:
+        return [product_document(self.records[doc_id]) for doc_id, _ in hits]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def fuse(query: str, lexical: LexicalIndex, hits: List[Tuple[int, float]], dense: List[Document],
+         k: int = 3) -> List[Document]:
+    """
+    Reciprocal rank fusion of BM25 hits and FAISS documents, matched by title. Products named
+    in full by the query stay ahead of everything else, as they do in the BM25 ranking.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    pinned: Dict[str, int] = {}
+    for rank, (doc_id, _) in enumerate(hits):
+        doc = product_document(lexical.records[doc_id])
+        title = doc.metadata["title"]
+        docs[title] = doc
+        scores[title] = scores.get(title, 0.0) + 1 / (RRF_K + rank + 1)
+        if lexical.exact(doc_id, query):
+            pinned[title] = len(lexical.names[doc_id])
+    for rank, doc in enumerate(dense):
+        title = doc.metadata.get("title") or doc.page_content
+        docs.setdefault(title, doc)
+        scores[title] = scores.get(title, 0.0) + 1 / (RRF_K + rank + 1)
+
+    ordered = sorted(scores, key=lambda title: (-pinned.get(title, 0), -scores[title]))
+    return [docs[title] for title in ordered[:k]]
+
+
+class ProductLexicalIndex:
+    """The BM25 index saved at ingest time, loaded once; built from the catalog if it has not been saved"""
+
+    def __init__(self, path: str = LEXICAL_INDEX_PATH, data_path: str = PRODUCT_DATA_PATH):
+        self.path = path
+        self.data_path = data_path
+        self.index: Optional[LexicalIndex] = None
+        self.source = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def disk_version(self) -> Optional[Tuple[str, int]]:
+        for path in (self.path, self.data_path):
+            try:
+                return path, os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return None
+
+    def load(self) -> Optional[LexicalIndex]:
+        """Current index, reloaded if the saved index (or the catalog it falls back to) changed"""
+        version = self.disk_version()
+        if self.index is not None and version == self.version:
+            return self.index
+        with self._lock:
+            if self.index is None or version != self.version:
+                if version is None:
+                    self.index = None
+                elif version[0] == self.path:
+                    self.index = LexicalIndex.load(self.path)
+                else:
+                    self.index = LexicalIndex.from_jsonl(self.data_path)
+                self.source = version[0] if version else None
+                self.version = version
+            return self.index
+
+    def search(self, query: str, k: int = 3) -> List[Document]:
+        index = self.load()
+        return index.documents(index.search(query, k)) if index else []
+
+    def hybrid_search(self, query: str, dense: List[Document], k: int = 3) -> List[Document]:
+        """FAISS results fused with BM25 hits; the FAISS results alone if there is no catalog"""
+        index = self.load()
+        if index is None:
+            return dense[:k]
+        return fuse(query, index, index.search(query, FUSION_CANDIDATES), dense, k)
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index
+        return {
+            "loaded": index is not None,
+            "source": self.source,
+            "documents": len(index) if index else 0,
+            "terms": len(index.postings) if index else 0,
+        }
+
+
+lexical_index = None
+
+
+def get_lexical_index() -> ProductLexicalIndex:
+    global lexical_index
+    if lexical_index is None:
+        lexical_index = ProductLexicalIndex()
+    return lexical_index
@@ -0,0 +1,116 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+import sys
+import os
+
+MEMORY_TOKENS = int(os.getenv("CHAT_MEMORY_TOKENS", "1000"))
+SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "200"))
+# Length of each earlier question kept in the rolling summary
+SUMMARY_SNIPPET = int(os.getenv("CHAT_SUMMARY_SNIPPET", "80"))
+# OpenAI tokenizers average about four characters per token on English text
+CHARS_PER_TOKEN = 4
+
+SUMMARY_HEADER = "Earlier in this conversation the user asked about:\n"
+
+
+def count_tokens(text: str) -> int:
+    """Estimated prompt tokens for a piece of text"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class Turn:
+    """One user/bot exchange, rendered and counted once when it is saved"""
+    __slots__ = ("user", "bot", "text", "tokens")
+
+    def __init__(self, user: str, bot: str):
+        self.user = user
+        self.bot = bot
+        self.text = f"User: {user}\nBot: {bot}\n"
+        self.tokens = count_tokens(self.text)
+
+
+def extractive_summary(summary: List[str], turn: Turn, max_tokens: int) -> List[str]:
+    """Fold an evicted turn into the summary as a short line, dropping the oldest lines over budget"""
+    question = " ".join(turn.user.split())
+    if len(question) > SUMMARY_SNIPPET:
+        question = question[:SUMMARY_SNIPPET - 3] + "..."
+    summary = summary + [f"- {question}\n"]
+    while len(summary) > 1 and count_tokens(SUMMARY_HEADER + "".join(summary)) > max_tokens:
+        summary.pop(0)
+    return summary
+
+
+class TokenBudgetMemory:
+    """
+    Conversation history held to a token budget: the most recent turns verbatim, older turns
+    folded into a rolling summary. The prompt prefix is extended and trimmed as turns come and
+    go rather than rebuilt from the whole history, so a prompt costs the same on turn 200 as on turn 2.
+    """
+
+    def __init__(self, max_tokens: int = MEMORY_TOKENS, summary_tokens: int = SUMMARY_TOKENS,
+                 summarize: Callable[[List[str], Turn, int], List[str]] = extractive_summary):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.clear()
+
+    def clear(self) -> None:
+        self.window: deque = deque()
+        self.window_tokens = 0
+        self.summary: List[str] = []
+        self.turns = 0
+        self.summarized = 0
+        self._window_text = ""
+        self._summary_text = ""
+        self._summary_token_count = 0
+
+    def save_turn(self, user: str, bot: str) -> None:
+        """Append a turn, moving the oldest turns into the summary once the window is over budget"""
+        turn = Turn(user, bot)
+        self.window.append(turn)
+        self.window_tokens += turn.tokens
+        self._window_text += turn.text
+        self.turns += 1
+
+        # The newest turn always stays, even if it alone is over budget
+        while len(self.window) > 1 and self.window_tokens > self.max_tokens - self._summary_token_count:
+            old = self.window.popleft()
+            self.window_tokens -= old.tokens
+            self._window_text = self._window_text[len(old.text):]
+            self.summary = self.summarize(self.summary, old, self.summary_tokens)
+            self.summarized += 1
+            self._update_summary()
+
+    def _update_summary(self) -> None:
+        self._summary_text = SUMMARY_HEADER + "".join(self.summary) if self.summary else ""
+        self._summary_token_count = count_tokens(self._summary_text)
+
+    def prefix(self) -> str:
+        """Summary plus recent turns, ready to have the new user message appended"""
+        return self._summary_text + self._window_text
+
+    def prompt(self, user_input: str) -> Tuple[str, int]:
+        """Prompt for the next reply and its estimated token count"""
+        tail = f"User: {user_input}\nBot:"
+        return self.prefix() + tail, self._summary_token_count + self.window_tokens + count_tokens(tail)
+
+    @property
+    def messages(self) -> List[Tuple[str, str]]:
+        """Verbatim (role, text) pairs still in the window"""
+        return [item for turn in self.window for item in (("user", turn.user), ("bot", turn.bot))]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the history"""
+        size = sys.getsizeof(self._window_text) + sys.getsizeof(self._summary_text)
+        for turn in self.window:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn.user) + sys.getsizeof(turn.bot) + sys.getsizeof(turn.text)
+        return size + sum(sys.getsizeof(line) for line in self.summary)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "window_turns": len(self.window),
+            "summarized_turns": self.summarized,
+            "tokens": self._summary_token_count + self.window_tokens,
+            "max_tokens": self.max_tokens,
+        }
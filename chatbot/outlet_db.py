@@ -0,0 +1,278 @@
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from typing import Any, Dict, List, Optional, Tuple, Union
+import sqlite3
+import threading
+import itertools
+import re
+import os
+
+from .outlet_schema import structured_query
+from .sql_sandbox import run_sandboxed
+from . import geo
+
+OUTLET_DB_PATH = "data/outlets.db"
+# Written by ingest.scrape_outlets, read by ingest.create_outlets_db
+OUTLET_DATA_PATH = "data/outlets.csv"
+IN_MEMORY = os.getenv("OUTLET_DB_IN_MEMORY", "false").lower() == "true"
+POOL_SIZE = int(os.getenv("OUTLET_DB_POOL_SIZE", "5"))
+
+# Keyword lookup used by MOCK_MODE on databases without the FTS index; built once so
+# SQLAlchemy's compiled cache and sqlite3's per-connection statement cache are both reused.
+LIKE_QUERY = text("""
+    SELECT * FROM outlets
+    WHERE name LIKE :query
+    OR address LIKE :query
+    LIMIT :limit
+""")
+
+# Full-text index over the outlets table. It is an external-content FTS5 table (the text lives
+# only in outlets) kept in sync by triggers; prefix indexes make 2-3 character prefixes cheap.
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS outlets_fts USING fts5(
+        name, address, services,
+        content='outlets', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS outlets_fts_insert AFTER INSERT ON outlets BEGIN
+        INSERT INTO outlets_fts(rowid, name, address, services) VALUES (new.rowid, new.name, new.address, new.services);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS outlets_fts_delete AFTER DELETE ON outlets BEGIN
+        INSERT INTO outlets_fts(outlets_fts, rowid, name, address, services) VALUES ('delete', old.rowid, old.name, old.address, old.services);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS outlets_fts_update AFTER UPDATE ON outlets BEGIN
+        INSERT INTO outlets_fts(outlets_fts, rowid, name, address, services) VALUES ('delete', old.rowid, old.name, old.address, old.services);
+        INSERT INTO outlets_fts(rowid, name, address, services) VALUES (new.rowid, new.name, new.address, new.services);
+    END""",
+    "INSERT INTO outlets_fts(outlets_fts) VALUES ('rebuild')",
+]
+
+# BM25-ranked lookup; a name hit weighs more than an address hit, which weighs more than a service.
+# Ranking happens inside the index and only the top rows are joined back to outlets.
+FTS_QUERY = text("""
+    SELECT outlets.* FROM (
+        SELECT rowid, bm25(outlets_fts, 10.0, 5.0, 1.0) AS score FROM outlets_fts
+        WHERE outlets_fts MATCH :match
+        ORDER BY score
+        LIMIT :limit
+    ) AS hits
+    JOIN outlets ON outlets.rowid = hits.rowid
+    ORDER BY hits.score
+""")
+
+FTS_TERM = re.compile(r'\w+')
+MIXED_TERM = re.compile(r'[^\W\d_]+|\d+')
+
+_replica_ids = itertools.count()
+
+
+def create_fts_index(conn: sqlite3.Connection) -> None:
+    """Add (or rebuild) the full-text index and its sync triggers on an outlets database"""
+    for statement in FTS_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+
+def fts_match(query: str, operator: str = "AND") -> str:
+    """
+    FTS5 MATCH expression for free text: every word becomes a quoted prefix term, so user input
+    cannot inject FTS syntax. Words mixing letters and digits also match spaced out ("ss2" ~ "SS 2").
+    """
+    terms = []
+    for word in FTS_TERM.findall(query.lower()):
+        parts = MIXED_TERM.findall(word)
+        if len(parts) > 1:
+            terms.append(f'("{word}"* OR "{" ".join(parts)}"*)')
+        else:
+            terms.append(f'"{word}"*')
+    return f" {operator} ".join(terms)
+
+
+class OutletDB:
+    """Pooled, read-only access to the outlets database, optionally served from an in-memory replica"""
+
+    def __init__(self, db_path: str = OUTLET_DB_PATH, in_memory: bool = IN_MEMORY, pool_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.in_memory = in_memory
+        self.pool_size = pool_size
+        self.engine = None
+        self._anchor = None
+        self.has_fts = False
+        self.has_structured = False
+        self.has_geo = False
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _connect_uri(self) -> str:
+        if self.in_memory:
+            return self._replica_uri
+        return f"file:{os.path.abspath(self.db_path)}?mode=ro"
+
+    def _replicate(self) -> None:
+        """Copy the on-disk database into a shared-cache in-memory database via the backup API"""
+        self._replica_uri = f"file:outlets_replica_{os.getpid()}_{next(_replica_ids)}?mode=memory&cache=shared"
+        # The anchor connection keeps the shared in-memory database alive for the life of the process
+        self._anchor = sqlite3.connect(self._replica_uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        try:
+            source.backup(self._anchor)
+        finally:
+            source.close()
+
+    def _creator(self):
+        return sqlite3.connect(self._connect_uri(), uri=True, check_same_thread=False, cached_statements=256)
+
+    def connect(self) -> bool:
+        """Create the pooled engine; returns False if the database file does not exist"""
+        with self._lock:
+            if self.engine is not None:
+                return True
+            if not self.exists():
+                return False
+            if self.in_memory:
+                self._replicate()
+
+            engine = create_engine(
+                "sqlite://",
+                creator=self._creator,
+                poolclass=QueuePool,
+                pool_size=self.pool_size,
+                max_overflow=self.pool_size * 2,
+            )
+
+            @event.listens_for(engine, "connect")
+            def _read_only(dbapi_conn, _record):
+                dbapi_conn.execute("PRAGMA query_only = ON")
+
+            self.engine = engine
+            with engine.connect() as conn:
+                tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+            self.has_fts = "outlets_fts" in tables
+            self.has_structured = {"outlet_hours", "outlet_services"} <= tables
+            self.has_geo = {"outlet_locations", "outlet_rtree"} <= tables
+            return True
+
+    def _search(self, conn, query: str, limit: int) -> List[Dict[str, Any]]:
+        if not self.has_fts:
+            return [dict(row._mapping) for row in conn.execute(LIKE_QUERY, {"query": f"%{query}%", "limit": limit})]
+        # Every word must match; failing that, the outlets matching the most (and rarest) words
+        for operator in ("AND", "OR"):
+            match = fts_match(query, operator)
+            if not match:
+                return []
+            rows = [dict(row._mapping) for row in conn.execute(FTS_QUERY, {"match": match, "limit": limit})]
+            if rows:
+                return rows
+        return []
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """BM25-ranked full-text match on name, address and services (substring LIKE if the DB has no FTS index)"""
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        with self.engine.connect() as conn:
+            return self._search(conn, query, limit)
+
+    def execute(self, sql: str, params: Optional[Dict[str, Any]] = None,
+                max_rows: Optional[int] = None, time_budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run one SELECT in the SQL sandbox (see sql_sandbox.run_sandboxed) and return rows as dicts"""
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        with self.engine.connect() as conn:
+            return run_sandboxed(conn.connection.dbapi_connection, sql, params, max_rows, time_budget_ms)
+
+    def search_many(self, queries: List[str], limit: int = 5) -> List[List[Dict[str, Any]]]:
+        """search() for many queries on one pooled connection"""
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        with self.engine.connect() as conn:
+            return [self._search(conn, q, limit) for q in queries]
+
+    def find(self, open_at: Optional[Tuple[int, int]] = None, open_until: Optional[Tuple[int, int]] = None,
+             services: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """Outlets matching the structured hours/services filters (see outlet_schema.structured_query)"""
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        if not self.has_structured:
+            raise LookupError("Outlet hours and services are not indexed; run python -m ingest.create_outlets_db --index")
+        sql, params = structured_query(open_at, open_until, services, limit)
+        with self.engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(text(sql), params)]
+
+    def nearby(self, lat: float, lon: float, k: int = 5) -> List[Dict[str, Any]]:
+        """The k outlets nearest to a point, nearest first, each with its distance_km"""
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        if not self.has_geo:
+            raise LookupError("Outlet locations are not indexed; run python -m ingest.create_outlets_db --index")
+        with self.engine.connect() as conn:
+            hits = geo.nearest(lambda sql, params: conn.exec_driver_sql(sql, params).fetchall(), lat, lon, k)
+            if not hits:
+                return []
+            ids = [outlet_id for outlet_id, _ in hits]
+            placeholders = ", ".join("?" * len(ids))
+            rows = conn.exec_driver_sql(
+                f"SELECT outlets.rowid AS outlet_id, outlets.*, latitude, longitude FROM outlets "
+                f"JOIN outlet_locations ON outlet_locations.outlet_id = outlets.rowid WHERE outlets.rowid IN ({placeholders})",
+                tuple(ids),
+            )
+            by_id = {row.outlet_id: dict(row._mapping) for row in rows}
+        results = []
+        for outlet_id, km in hits:
+            row = by_id[outlet_id]
+            del row["outlet_id"]
+            row["distance_km"] = round(km, 3)
+            results.append(row)
+        return results
+
+    def execute_many(self, statements: List[Union[str, Tuple[str, Dict[str, Any]]]]) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Run many statements (SQL, or (SQL, params)) in the SQL sandbox on one pooled connection;
+        a failing statement yields its exception
+        """
+        if not self.connect():
+            raise FileNotFoundError(f"Outlet DB not found at {self.db_path}")
+        results = []
+        with self.engine.connect() as conn:
+            for statement in statements:
+                sql, params = (statement, {}) if isinstance(statement, str) else statement
+                try:
+                    results.append(run_sandboxed(conn.connection.dbapi_connection, sql, params))
+                except Exception as e:
+                    conn.rollback()
+                    results.append(e)
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            if self.engine is not None:
+                self.engine.dispose()
+                self.engine = None
+                self.has_fts = False
+                self.has_structured = False
+                self.has_geo = False
+            if self._anchor is not None:
+                self._anchor.close()
+                self._anchor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.engine is not None,
+            "path": self.db_path,
+            "in_memory": self.in_memory,
+            "full_text": self.has_fts,
+            "structured": self.has_structured,
+            "geo": self.has_geo,
+            "pool": self.engine.pool.status() if self.engine is not None else None,
+        }
+
+
+outlet_db = None
+
+
+def get_outlet_db() -> OutletDB:
+    global outlet_db
+    if outlet_db is None:
+        outlet_db = OutletDB()
+    return outlet_db
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import re
+import os
+
+# Malaysia has no daylight saving, so a fixed offset is exact
+OUTLET_UTC_OFFSET = float(os.getenv("OUTLET_UTC_OFFSET", "8"))
+OUTLET_TZ = timezone(timedelta(hours=OUTLET_UTC_OFFSET))
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MINUTES_PER_DAY = 24 * 60
+
+# One bit per service; a row's mask is the OR of the services it lists
+SERVICE_BITS = {"dine-in": 1, "takeaway": 2, "delivery": 4, "drive-thru": 8}
+SERVICE_ALIASES = {
+    "dinein": "dine-in", "eatin": "dine-in",
+    "takeaway": "takeaway", "takeout": "takeaway", "pickup": "takeaway",
+    "delivery": "delivery",
+    "drivethru": "drive-thru", "drivethrough": "drive-thru", "drivein": "drive-thru",
+}
+
+TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?\s*m?\.?'
+TIME_OF_DAY = re.compile(rf'^\s*{TIME}\s*$', re.IGNORECASE)
+TIME_RANGE = re.compile(rf'{TIME}\s*(?:-|–|—|to|until)\s*{TIME}', re.IGNORECASE)
+DAY = r'(mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?'
+DAY_SPEC = re.compile(
+    rf'\b{DAY}(?:\s*(?:-|–|to)\s*{DAY})?|\b(daily|every\s*day|weekdays?|weekends?)\b', re.IGNORECASE
+)
+ALL_DAY = re.compile(r'24\s*(?:hours|hrs|h)\b', re.IGNORECASE)
+CLOSED = re.compile(r'\bclosed\b', re.IGNORECASE)
+NAMED_DAYS = {"daily": range(7), "everyday": range(7), "weekday": range(5), "weekend": range(5, 7)}
+
+Hours = Optional[Tuple[int, int]]
+
+STRUCTURED_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS outlet_hours (
+        outlet_id INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        open_minute INTEGER NOT NULL,
+        close_minute INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS outlet_hours_day ON outlet_hours(day, close_minute, open_minute, outlet_id)",
+    """CREATE TABLE IF NOT EXISTS outlet_services (
+        outlet_id INTEGER PRIMARY KEY,
+        services_mask INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS outlet_services_mask ON outlet_services(services_mask, outlet_id)",
+]
+
+
+def _minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> int:
+    h, m = int(hour), int(minute or 0)
+    if meridiem:
+        meridiem = meridiem.lower()
+        if h == 12:
+            h = 0
+        if meridiem == "p":
+            h += 12
+    if h > 24 or m > 59:
+        raise ValueError(f"Invalid time {hour}:{minute or '00'}")
+    return h * 60 + m
+
+
+def parse_time(text: str) -> int:
+    """Minutes after midnight for "22:00", "10pm" or "7:30 AM"; raises ValueError otherwise"""
+    match = TIME_OF_DAY.match(text or "")
+    if not match:
+        raise ValueError(f"Unrecognized time: {text!r}")
+    return _minutes(*match.groups())
+
+
+def parse_day(text: str) -> int:
+    """Day index (Monday = 0) for a day name or abbreviation"""
+    key = (text or "").strip().lower()[:3]
+    if key not in DAYS:
+        raise ValueError(f"Unrecognized day: {text!r}")
+    return DAYS.index(key)
+
+
+def _days(match: re.Match) -> Iterable[int]:
+    start, end, named = match.groups()
+    if named:
+        return NAMED_DAYS[re.sub(r'\s+', '', named.lower()).rstrip("s")]
+    first = DAYS.index(start.lower()[:3])
+    last = DAYS.index(end.lower()[:3]) if end else first
+    return [(first + i) % 7 for i in range((last - first) % 7 + 1)]
+
+
+def parse_hours(text: str) -> List[Hours]:
+    """
+    Opening hours per day (Monday first) as (open, close) minutes after midnight; None when closed
+    or unknown. A close at or before the open means past midnight, so close can exceed 1440.
+    Handles one range for every day ("7:30 AM - 10:00 PM") and day-qualified segments
+    ("Mon-Fri 8am-10pm, Sat & Sun 9am-11pm", "Sun: Closed", "24 hours").
+    """
+    week: List[Hours] = [None] * 7
+    pending: List[int] = []
+    for segment in re.split(r'[,;\n|]', text or ""):
+        for match in DAY_SPEC.finditer(segment):
+            pending.extend(_days(match))
+        days = pending or range(7)
+        if ALL_DAY.search(segment):
+            hours: Hours = (0, MINUTES_PER_DAY)
+        elif CLOSED.search(segment):
+            hours = None
+        else:
+            match = TIME_RANGE.search(segment)
+            if not match:
+                continue
+            try:
+                open_minute, close_minute = _minutes(*match.groups()[:3]), _minutes(*match.groups()[3:])
+            except ValueError:
+                continue
+            if close_minute <= open_minute:
+                close_minute += MINUTES_PER_DAY
+            hours = (open_minute, close_minute)
+        for day in days:
+            week[day] = hours
+        pending = []
+    return week
+
+
+def service_key(text: str) -> Optional[str]:
+    """Canonical service name ("Drive Thru" -> "drive-thru"), or None if it is not a known service"""
+    return SERVICE_ALIASES.get(re.sub(r'[^a-z]', '', (text or "").lower()))
+
+
+def parse_services(text: str) -> int:
+    """Bitmask of the known services in a comma-separated list"""
+    mask = 0
+    for item in re.split(r'[,/;&]|\band\b', text or ""):
+        key = service_key(item)
+        if key:
+            mask |= SERVICE_BITS[key]
+    return mask
+
+
+def services_mask(names: Iterable[str]) -> int:
+    """Mask requiring every named service; raises ValueError for an unknown one"""
+    mask = 0
+    for name in names:
+        key = service_key(name)
+        if key is None:
+            raise ValueError(f"Unknown service: {name!r} (known: {', '.join(SERVICE_BITS)})")
+        mask |= SERVICE_BITS[key]
+    return mask
+
+
+def create_structured_index(conn: sqlite3.Connection) -> int:
+    """(Re)build the parsed hours and services tables from the outlets table; returns rows indexed"""
+    for statement in STRUCTURED_SCHEMA:
+        conn.execute(statement)
+    conn.execute("DELETE FROM outlet_hours")
+    conn.execute("DELETE FROM outlet_services")
+    rows = conn.execute("SELECT rowid, opening_hours, services FROM outlets").fetchall()
+    hours, services = [], []
+    for rowid, opening_hours, service_text in rows:
+        for day, span in enumerate(parse_hours(opening_hours)):
+            if span is not None:
+                hours.append((rowid, day, span[0], span[1]))
+        services.append((rowid, parse_services(service_text)))
+    conn.executemany("INSERT INTO outlet_hours VALUES (?, ?, ?, ?)", hours)
+    conn.executemany("INSERT INTO outlet_services VALUES (?, ?)", services)
+    conn.commit()
+    return len(rows)
+
+
+def now() -> Tuple[int, int]:
+    """Current (day, minute) at the outlets"""
+    current = datetime.now(OUTLET_TZ)
+    return current.weekday(), current.hour * 60 + current.minute
+
+
+def structured_query(open_at: Optional[Tuple[int, int]] = None, open_until: Optional[Tuple[int, int]] = None,
+                     services: int = 0, limit: int = 20) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parameterized SQL for the structured filters, all optional and combined with AND:
+    open_at=(day, minute) open at that moment (including hours carried over from the night before),
+    open_until=(day, minute) that day's hours reach at least that time, services=mask having all of them.
+    """
+    where, params = [], {"limit": limit}
+    # Each filter is an IN over outlet_hours, so it is one range scan of the (day, close_minute) index
+    if open_at is not None:
+        day, minute = open_at
+        where.append("""outlets.rowid IN (
+            SELECT outlet_id FROM outlet_hours WHERE day = :at_day AND close_minute > :at_minute AND open_minute <= :at_minute
+            UNION SELECT outlet_id FROM outlet_hours WHERE day = :at_prev_day AND close_minute > :at_minute + 1440)""")
+        params.update(at_day=day, at_minute=minute, at_prev_day=(day - 1) % 7)
+    if open_until is not None:
+        day, minute = open_until
+        # Open at that time of the day, or past midnight into it ("until 1am")
+        where.append("""outlets.rowid IN (
+            SELECT outlet_id FROM outlet_hours WHERE day = :until_day AND close_minute >= :until_minute AND open_minute <= :until_minute
+            UNION SELECT outlet_id FROM outlet_hours WHERE day = :until_day AND close_minute >= :until_minute + 1440)""")
+        params.update(until_day=day, until_minute=minute)
+    if services:
+        where.append("outlets.rowid IN (SELECT outlet_id FROM outlet_services WHERE services_mask & :services = :services)")
+        params["services"] = services
+    sql = "SELECT outlets.* FROM outlets"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY outlets.rowid LIMIT :limit", params
@@ -0,0 +1,153 @@
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import faiss
+import threading
+import time
+import os
+
+from .embedding_cache import CachedEmbeddings, cached_openai_embeddings
+
+VECTORSTORE_PATH = "vectorstore/product_kb"
+# Product ID -> content hash, written into each build's directory by ingest/build_product_vectorstore.py
+MANIFEST_FILE = "manifest.json"
+
+
+class ProductIndex:
+    """Process-wide, read-only FAISS product index loaded once and shared across requests"""
+
+    def __init__(self, path: str = VECTORSTORE_PATH, embeddings: Optional[Embeddings] = None):
+        self.path = path
+        self.embeddings = embeddings
+        self.vectorstore = None
+        self.load_time_ms = None
+        self.loaded_at = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def disk_version(self) -> Optional[Tuple[str, int]]:
+        """
+        The build directory the KB path points at, and its manifest's (or, for builds without one,
+        index.faiss's) modification time; changes whenever the KB is rebuilt
+        """
+        directory = os.path.realpath(self.path)
+        for name in (MANIFEST_FILE, "index.faiss"):
+            try:
+                return directory, os.stat(os.path.join(directory, name)).st_mtime_ns
+            except FileNotFoundError:
+                continue
+        return None
+
+    def is_stale(self) -> bool:
+        return self.is_loaded and self.disk_version() != self.version
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.vectorstore is not None
+
+    def _load_locked(self) -> bool:
+        version = self.disk_version()
+        if version is None:
+            return False
+        if self.embeddings is None:
+            self.embeddings = cached_openai_embeddings()
+        start = time.perf_counter()
+        # Load from the resolved build directory, so a swap during the load cannot mix two builds
+        vectorstore = FAISS.load_local(version[0], self.embeddings, allow_dangerous_deserialization=True)
+        # Searches keep using the previous index until this single assignment
+        self.vectorstore, self.version = vectorstore, version
+        self.load_time_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.loaded_at = time.time()
+        return True
+
+    def load(self) -> bool:
+        """Load the index from disk; returns False if the KB has not been built yet"""
+        with self._lock:
+            if self.vectorstore is not None:
+                return True
+            return self._load_locked()
+
+    def reload(self) -> bool:
+        """Load the index again (e.g. after a rebuild); the loaded one keeps serving until it is replaced"""
+        with self._lock:
+            try:
+                return self._load_locked() or self.vectorstore is not None
+            except Exception as e:
+                if self.vectorstore is None:
+                    raise
+                print(f"✗ Product KB reload failed, keeping the loaded index: {e}")
+                return True
+
+    def search(self, query: str, k: int = 3) -> List[Any]:
+        """Return the top-k product documents for a query"""
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        return self.vectorstore.similarity_search(query, k=k)
+
+    def embed_query(self, query: str) -> List[float]:
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        return self.embeddings.embed_query(query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        return await self.embeddings.aembed_query(query)
+
+    def search_by_vector(self, vector: List[float], k: int = 3) -> List[Any]:
+        """Top-k search with a precomputed query embedding, so callers can reuse it"""
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        return self.vectorstore.similarity_search_by_vector(vector, k=k)
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries with a single embeddings call"""
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        return await self.embeddings.aembed_documents(queries)
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 3) -> List[List[Any]]:
+        """Top-k documents for many query vectors with one matrix search over the FAISS index"""
+        if not self.load():
+            raise FileNotFoundError(f"Product KB not found at {self.path}")
+        if not len(vectors):
+            return []
+        # One reference for the whole search, so a concurrent reload cannot mix two indexes
+        vectorstore = self.vectorstore
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if vectorstore._normalize_L2:
+            faiss.normalize_L2(matrix)
+        _, ids = vectorstore.index.search(matrix, k)
+        docstore = vectorstore.docstore
+        id_map = vectorstore.index_to_docstore_id
+        return [[docstore.search(id_map[i]) for i in row if i != -1] for row in ids]
+
+    def size(self) -> int:
+        if not self.is_loaded:
+            return 0
+        return self.vectorstore.index.ntotal
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.is_loaded,
+            "path": self.path,
+            "load_time_ms": self.load_time_ms,
+            "size": self.size(),
+            "dimension": self.vectorstore.index.d if self.is_loaded else None,
+            "version": self.version,
+            "embedding_cache": self.embeddings.stats() if isinstance(self.embeddings, CachedEmbeddings) else None,
+        }
+
+
+product_index = None
+
+
+def get_product_index() -> ProductIndex:
+    global product_index
+    if product_index is None:
+        product_index = ProductIndex()
+    return product_index
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+import threading
+import time
+import os
+
+SIMILARITY_THRESHOLD = float(os.getenv("PRODUCT_CACHE_THRESHOLD", "0.95"))
+MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_SIZE", "20000"))
+TTL_SECONDS = int(os.getenv("PRODUCT_CACHE_TTL", "3600"))
+
+
+class SemanticAnswerCache:
+    """
+    Cache of generated product answers keyed by query embedding.
+    Embeddings are L2-normalized rows of one float32 matrix, so a lookup is a single
+    matrix-vector product (cosine similarity) over every live entry.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES,
+                 ttl: int = TTL_SECONDS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None
+        self._created = np.empty(0, dtype=np.float64)
+        self._answers = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def check_version(self, version: Any) -> None:
+        """Clear the cache when the product KB it was built from has changed"""
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+
+    def _clear(self) -> None:
+        self._vectors = None
+        self._created = np.empty(0, dtype=np.float64)
+        self._answers = []
+        self._size = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def lookup(self, vector) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for the most similar live query above the threshold"""
+        q = self._normalize(vector)
+        with self._lock:
+            if self._size == 0:
+                self.misses += 1
+                return None
+            sims = self._vectors[:self._size] @ q
+            sims[self._created[:self._size] < time.time() - self.ttl] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            answer, sources = self._answers[best]
+            return {"answer": answer, "sources": sources, "similarity": float(sims[best])}
+
+    def store(self, vector, answer: str, sources: List[Dict[str, Any]]) -> None:
+        """Cache an answer; max_entries <= 0 (PRODUCT_CACHE_SIZE=0) disables the cache"""
+        if self.max_entries <= 0:
+            return
+        q = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != q.shape[0]:
+                self._clear()
+                self._vectors = np.empty((min(1024, self.max_entries), q.shape[0]), dtype=np.float32)
+                self._created = np.empty(self._vectors.shape[0], dtype=np.float64)
+            if self._size >= self.max_entries:
+                self._evict()
+            if self._size == self._vectors.shape[0]:
+                capacity = min(self._vectors.shape[0] * 2, self.max_entries)
+                self._vectors = np.resize(self._vectors, (capacity, q.shape[0]))
+                self._created = np.resize(self._created, capacity)
+            self._vectors[self._size] = q
+            self._created[self._size] = time.time()
+            self._answers.append((answer, sources))
+            self._size += 1
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the oldest quarter (at least one) if still full"""
+        created = self._created[:self._size]
+        keep = created >= time.time() - self.ttl
+        if keep.sum() >= self.max_entries:
+            live = np.flatnonzero(keep)
+            oldest = live[np.argsort(created[live], kind="stable")[:max(1, self.max_entries // 4)]]
+            keep[oldest] = False
+        idx = np.flatnonzero(keep)
+        n = len(idx)
+        self._vectors[:n] = self._vectors[idx]
+        self._created[:n] = self._created[idx]
+        self._answers = [self._answers[i] for i in idx]
+        self._size = n
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+semantic_cache = None
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    global semantic_cache
+    if semantic_cache is None:
+        semantic_cache = SemanticAnswerCache()
+    return semantic_cache
@@ -0,0 +1,489 @@
+from langchain_core.prompts import PromptTemplate
+from langchain_openai import ChatOpenAI
+from langchain_core.output_parsers import StrOutputParser
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import contextlib
+import asyncio
+import re
+import os
+
+from . import calculator, outlet_schema
+from .product_index import get_product_index
+from .lexical_index import FUSION_CANDIDATES, get_lexical_index
+from .geo import NEARBY_MAX_K
+from .outlet_db import get_outlet_db
+from .sql_cache import get_sql_cache
+from .sql_templates import CACHE, LLM, TEMPLATE, get_sql_templates
+from .sql_sandbox import SQLSandboxError, check_statement
+from .semantic_cache import get_semantic_cache
+
+MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+
+
+class ServiceError(Exception):
+    """Error raised by a service, carrying the HTTP status the API layer should return"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+NO_PRODUCT_MATCH = "We offer a wide range of drinkware including tumblers, mugs, and accessories. What specific product are you interested in?"
+
+MOCK_OUTLET_DATA = {
+    "ss 2": {"name": "ZUS Coffee - SS 2", "address": "No. 75, Jalan SS 2/67, SS 2, 47300 Petaling Jaya, Selangor", "opening_hours": "8:00 AM - 10:00 PM", "services": "Dine-in, Takeaway, Delivery, Drive-thru"},
+    "bangsar": {"name": "ZUS Coffee - Bangsar", "address": "No. 11, Jalan Telawi 3, Bangsar Baru, 59100 Kuala Lumpur", "opening_hours": "7:00 AM - 11:00 PM", "services": "Dine-in, Takeaway, Delivery"},
+    "klcc": {"name": "ZUS Coffee - KLCC", "address": "Lot 241, Level 2, Suria KLCC, 50088 Kuala Lumpur", "opening_hours": "9:00 AM - 10:00 PM", "services": "Dine-in, Takeaway"},
+}
+
+
+def calculate(expr: str) -> Dict[str, Any]:
+    """Calculate mathematical expressions - no OpenAI needed"""
+    try:
+        return {"result": calculator.calculate(expr), "expression": expr}
+    except calculator.CalculationError as e:
+        raise ServiceError(400, str(e))
+
+
+async def acalculate(expr: str) -> Dict[str, Any]:
+    """Async calculate: evaluation runs in a worker thread so a slow expression never stalls the loop"""
+    return await asyncio.to_thread(calculate, expr)
+
+
+def calculate_batch(exprs: List[str]) -> Dict[str, Any]:
+    """Evaluate many expressions, with a result or an error per item in request order"""
+    try:
+        return calculator.calculate_batch(exprs)
+    except calculator.CalculationError as e:
+        raise ServiceError(400, str(e))
+
+
+async def acalculate_batch(exprs: List[str]) -> Dict[str, Any]:
+    return await asyncio.to_thread(calculate_batch, exprs)
+
+
+def lexical_products(query: str) -> Dict[str, Any]:
+    """Offline product answer: real BM25 retrieval over the catalog, listed without an LLM"""
+    docs = get_lexical_index().search(query, k=3)
+    sources = _product_sources(docs)
+    if not sources:
+        return {"answer": NO_PRODUCT_MATCH, "sources": [], "mock_mode": True}
+    lines = []
+    for source in sources:
+        price = f" ({source['price']})" if source["price"] and source["price"] != "N/A" else ""
+        lines.append(f"• **{source['title']}**{price}")
+    answer = "Here's what I found in our drinkware catalog:\n" + "\n".join(lines)
+    return {"answer": answer, "sources": sources, "mock_mode": True}
+
+
+def _ready_product_index():
+    index = get_product_index()
+    if not index.load():
+        raise ServiceError(500, "Product KB not initialized")
+    if index.is_stale():
+        index.reload()
+    get_semantic_cache().check_version(index.version)
+    return index
+
+
+def _product_chain():
+    prompt = PromptTemplate.from_template(
+        "Answer based on context:\n{context}\n\nQuestion: {question}\n\nAnswer:"
+    )
+    return prompt | ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3) | StrOutputParser()
+
+
+def _product_sources(docs) -> List[Dict[str, Any]]:
+    return [{"title": d.metadata.get("title"), "price": d.metadata.get("price")} for d in docs]
+
+
+NO_PRODUCT_INFO = {"answer": "I couldn't find relevant product information.", "sources": []}
+
+
+@contextlib.contextmanager
+def _rag_errors():
+    """Report anything but a ServiceError from the product pipeline as a 500"""
+    try:
+        yield
+    except ServiceError:
+        raise
+    except Exception as e:
+        raise ServiceError(500, f"RAG error: {str(e)}")
+
+
+def _product_context(index, query: str, query_vector) -> Tuple[Optional[Dict[str, Any]], list]:
+    """(semantic cache hit, None) or (None, the fused documents to answer from)"""
+    hit = get_semantic_cache().lookup(query_vector)
+    if hit:
+        return hit, []
+    return None, get_lexical_index().hybrid_search(query, index.search_by_vector(query_vector, k=FUSION_CANDIDATES))
+
+
+def _chain_input(query: str, docs) -> Dict[str, str]:
+    return {"context": "\n".join([d.page_content for d in docs]), "question": query}
+
+
+def _product_answer(query_vector, answer: str, docs) -> Dict[str, Any]:
+    sources = _product_sources(docs)
+    get_semantic_cache().store(query_vector, answer, sources)
+    return {"answer": answer, "sources": sources, "cached": False}
+
+
+def search_products(query: str) -> Dict[str, Any]:
+    """Search ZUS Coffee products using RAG (or mock mode)"""
+    if MOCK_MODE:
+        return lexical_products(query)
+    with _rag_errors():
+        index = _ready_product_index()
+        query_vector = index.embed_query(query)
+        hit, docs = _product_context(index, query, query_vector)
+        if hit:
+            return {"answer": hit["answer"], "sources": hit["sources"], "cached": True}
+        if not docs:
+            return dict(NO_PRODUCT_INFO)
+        return _product_answer(query_vector, _product_chain().invoke(_chain_input(query, docs)), docs)
+
+
+async def asearch_products(query: str) -> Dict[str, Any]:
+    """Async search_products: the embedding call and LLM generation are awaited, not blocking the loop"""
+    if MOCK_MODE:
+        return await asyncio.to_thread(lexical_products, query)
+    with _rag_errors():
+        index = await asyncio.to_thread(_ready_product_index)
+        query_vector = await index.aembed_query(query)
+        hit, docs = _product_context(index, query, query_vector)
+        if hit:
+            return {"answer": hit["answer"], "sources": hit["sources"], "cached": True}
+        if not docs:
+            return dict(NO_PRODUCT_INFO)
+        return _product_answer(query_vector, await _product_chain().ainvoke(_chain_input(query, docs)), docs)
+
+
+async def astream_products(query: str) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming search_products. Yields ("sources", [...]) once, then ("token", text) chunks
+    as the LLM produces them; mock and cached answers arrive as a single token.
+    """
+    if MOCK_MODE:
+        data = await asyncio.to_thread(lexical_products, query)
+        yield "sources", data["sources"]
+        yield "token", data["answer"]
+        return
+    with _rag_errors():
+        index = await asyncio.to_thread(_ready_product_index)
+        query_vector = await index.aembed_query(query)
+        hit, docs = _product_context(index, query, query_vector)
+        data = hit or (None if docs else NO_PRODUCT_INFO)
+        if data:
+            yield "sources", data["sources"]
+            yield "token", data["answer"]
+            return
+        yield "sources", _product_sources(docs)
+        chunks = []
+        async for chunk in _product_chain().astream(_chain_input(query, docs)):
+            chunks.append(chunk)
+            yield "token", chunk
+        _product_answer(query_vector, "".join(chunks), docs)
+
+
+def _check_batch(queries: List[str]) -> None:
+    if not queries:
+        raise ServiceError(400, "No queries provided")
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise ServiceError(400, f"Too many queries (max {BATCH_MAX_QUERIES})")
+
+
+def _batch_response(queries: List[str], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Lay results (keyed by distinct query) out in request order"""
+    items = [{"query": q, **results[q]} for q in queries]
+    return {"results": items, "count": len(items), "errors": sum(1 for item in items if "error" in item)}
+
+
+def _item_error(e: Exception, prefix: str) -> Dict[str, Any]:
+    if isinstance(e, ServiceError):
+        return {"error": e.detail, "status_code": e.status_code}
+    if isinstance(e, SQLSandboxError):
+        return {"error": str(e), "status_code": e.status_code}
+    if isinstance(e, ValueError):
+        return {"error": str(e), "status_code": 400}
+    return {"error": f"{prefix}: {str(e)}", "status_code": 500}
+
+
+async def asearch_products_batch(queries: List[str]) -> Dict[str, Any]:
+    """
+    search_products for many queries: one embeddings call and one FAISS matrix search for the
+    whole batch, then answer generation fanned out under BATCH_LLM_CONCURRENCY.
+    """
+    _check_batch(queries)
+    unique = list(dict.fromkeys(queries))
+    if MOCK_MODE:
+        return _batch_response(queries, {q: lexical_products(q) for q in unique})
+    
+    results = {}
+    pending = []
+    with _rag_errors():
+        index = await asyncio.to_thread(_ready_product_index)
+        cache = get_semantic_cache()
+        vectors = dict(zip(unique, await index.aembed_queries(unique)))
+        for q in unique:
+            hit = cache.lookup(vectors[q])
+            if hit:
+                results[q] = {"answer": hit["answer"], "sources": hit["sources"], "cached": True}
+            else:
+                pending.append(q)
+        lexical = get_lexical_index()
+        dense = index.search_by_vectors([vectors[q] for q in pending], k=FUSION_CANDIDATES)
+        doc_lists = [lexical.hybrid_search(q, docs) for q, docs in zip(pending, dense)]
+    
+    chain = _product_chain()
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    
+    async def answer(query: str, docs) -> Dict[str, Any]:
+        if not docs:
+            return dict(NO_PRODUCT_INFO)
+        async with semaphore:
+            text = await chain.ainvoke(_chain_input(query, docs))
+        return _product_answer(vectors[query], text, docs)
+    
+    outcomes = await asyncio.gather(*(answer(q, docs) for q, docs in zip(pending, doc_lists)), return_exceptions=True)
+    for q, outcome in zip(pending, outcomes):
+        results[q] = _item_error(outcome, "RAG error") if isinstance(outcome, Exception) else outcome
+    
+    return _batch_response(queries, results)
+
+
+def _mock_outlets(query: str) -> Dict[str, Any]:
+    try:
+        db = get_outlet_db()
+        if not db.exists():
+            query_lower = query.lower()
+            results = []
+            
+            for key, outlet in MOCK_OUTLET_DATA.items():
+                if key in query_lower or query_lower in outlet["address"].lower():
+                    results.append(outlet)
+            
+            if not results:
+                results = list(MOCK_OUTLET_DATA.values())[:3]
+            
+            return {"results": results, "count": len(results), "mock_mode": True}
+        
+        return _mock_outlet_rows(db.search(query, limit=5))
+    except Exception as e:
+        raise ServiceError(500, f"Database error: {str(e)}")
+
+
+def _mock_outlet_rows(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not rows:
+        return {"results": [], "count": 0, "message": "No outlets found"}
+    
+    return {"results": rows, "count": len(rows), "mock_mode": True}
+
+
+def _text2sql_prompt(query: str) -> str:
+    return f"""Convert to SQL for 'outlets' table (columns: name, address, opening_hours, services).
+Query: "{query}"
+Return ONLY the SQL SELECT statement."""
+
+
+def _validate_sql(llm_output: str) -> str:
+    """The single SELECT in the LLM output; the sandbox's authorizer then checks what it touches"""
+    return check_statement(re.sub(r'```sql\s*|\s*```', '', llm_output.strip()).strip())
+
+
+def _ready_outlet_db():
+    db = get_outlet_db()
+    if not db.exists():
+        raise ServiceError(500, "Outlet DB not initialized")
+    return db
+
+
+def _match_template(db, query: str):
+    """Rule-based SQL for the question, or None if it needs the LLM"""
+    db.connect()
+    return get_sql_templates().match(query, structured=db.has_structured)
+
+
+def _template_result(matched, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    name, sql_query, _ = matched
+    get_sql_templates().record(TEMPLATE, name)
+    return {"results": rows, "sql": sql_query, "count": len(rows), "cached": False, "path": TEMPLATE, "template": name}
+
+
+def find_outlets(open_now: bool = False, day: Optional[str] = None, at: Optional[str] = None,
+                 until: Optional[str] = None, services: Sequence[str] = (), limit: int = 20) -> Dict[str, Any]:
+    """
+    Structured outlet filters evaluated in SQL over the parsed hours and services, no LLM call.
+    open_now uses the current time at the outlets; at/until ("22:00", "10pm") apply to day (default today).
+    """
+    if open_now and at:
+        raise ServiceError(400, "Use either open_now or at, not both")
+    try:
+        today, minute = outlet_schema.now()
+        weekday = outlet_schema.parse_day(day) if day else today
+        open_at = (weekday, outlet_schema.parse_time(at)) if at else ((today, minute) if open_now else None)
+        open_until = (weekday, outlet_schema.parse_time(until)) if until else None
+        mask = outlet_schema.services_mask(services)
+    except ValueError as e:
+        raise ServiceError(400, str(e))
+    
+    db = _ready_outlet_db()
+    try:
+        rows = db.find(open_at, open_until, mask, limit)
+    except LookupError as e:
+        raise ServiceError(503, str(e))
+    except Exception as e:
+        raise ServiceError(500, f"Database error: {str(e)}")
+    
+    filters = {
+        "open_at": {"day": outlet_schema.DAYS[open_at[0]], "minute": open_at[1]} if open_at else None,
+        "open_until": {"day": outlet_schema.DAYS[open_until[0]], "minute": open_until[1]} if open_until else None,
+        "services": [name for name, bit in outlet_schema.SERVICE_BITS.items() if mask & bit],
+    }
+    return {"results": rows, "count": len(rows), "filters": filters}
+
+
+async def afind_outlets(*args, **kwargs) -> Dict[str, Any]:
+    return await asyncio.to_thread(find_outlets, *args, **kwargs)
+
+
+def nearby_outlets(lat: float, lon: float, k: int = 5) -> Dict[str, Any]:
+    """The k outlets nearest to (lat, lon) by great-circle distance, nearest first"""
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ServiceError(400, "lat must be within [-90, 90] and lon within [-180, 180]")
+    if not 1 <= k <= NEARBY_MAX_K:
+        raise ServiceError(400, f"k must be between 1 and {NEARBY_MAX_K}")
+    
+    db = _ready_outlet_db()
+    try:
+        rows = db.nearby(lat, lon, k)
+    except LookupError as e:
+        raise ServiceError(503, str(e))
+    except Exception as e:
+        raise ServiceError(500, f"Database error: {str(e)}")
+    return {"results": rows, "count": len(rows), "origin": {"lat": lat, "lon": lon}}
+
+
+async def anearby_outlets(*args, **kwargs) -> Dict[str, Any]:
+    return await asyncio.to_thread(nearby_outlets, *args, **kwargs)
+
+
+@contextlib.contextmanager
+def _text2sql_errors():
+    """Map Text2SQL failures to a ServiceError: sandbox refusals keep their status, bad SQL is a 400"""
+    try:
+        yield
+    except ServiceError:
+        raise
+    except SQLSandboxError as e:
+        raise ServiceError(e.status_code, str(e))
+    except ValueError as e:
+        raise ServiceError(400, str(e))
+    except Exception as e:
+        raise ServiceError(500, f"Text2SQL error: {str(e)}")
+
+
+def _generated_result(query: str, sql_query: str, cached: bool, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Result for cached or LLM-generated SQL; new SQL is cached only once it has run"""
+    if not cached:
+        get_sql_cache().put(query, sql_query)
+    path = CACHE if cached else LLM
+    get_sql_templates().record(path)
+    return {"results": rows, "sql": sql_query, "count": len(rows), "cached": cached, "path": path}
+
+
+def search_outlets(query: str) -> Dict[str, Any]:
+    """Search ZUS Coffee outlets using Text2SQL (or mock mode)"""
+    if MOCK_MODE:
+        return _mock_outlets(query)
+    with _text2sql_errors():
+        db = _ready_outlet_db()
+        matched = _match_template(db, query)
+        if matched:
+            return dict(_template_result(matched, db.execute(matched[1], matched[2])), query=query)
+        sql_query = get_sql_cache().get(query)
+        cached = sql_query is not None
+        if not cached:
+            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+            sql_query = _validate_sql(llm.invoke(_text2sql_prompt(query)).content)
+        return dict(_generated_result(query, sql_query, cached, db.execute(sql_query)), query=query)
+
+
+async def asearch_outlets(query: str) -> Dict[str, Any]:
+    """Async search_outlets: SQL generation is awaited and the database work runs in a worker thread"""
+    if MOCK_MODE:
+        return await asyncio.to_thread(_mock_outlets, query)
+    with _text2sql_errors():
+        db = _ready_outlet_db()
+        matched = await asyncio.to_thread(_match_template, db, query)
+        if matched:
+            rows = await asyncio.to_thread(db.execute, matched[1], matched[2])
+            return dict(_template_result(matched, rows), query=query)
+        sql_query = get_sql_cache().get(query)
+        cached = sql_query is not None
+        if not cached:
+            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+            sql_query = _validate_sql((await llm.ainvoke(_text2sql_prompt(query))).content)
+        rows = await asyncio.to_thread(db.execute, sql_query)
+        return dict(_generated_result(query, sql_query, cached, rows), query=query)
+
+
+async def asearch_outlets_batch(queries: List[str]) -> Dict[str, Any]:
+    """
+    search_outlets for many queries: uncached SQL generations fan out under BATCH_LLM_CONCURRENCY
+    and every statement then runs on one pooled connection in a worker thread.
+    """
+    _check_batch(queries)
+    unique = list(dict.fromkeys(queries))
+    if MOCK_MODE:
+        db = get_outlet_db()
+        if not db.exists():
+            return _batch_response(queries, {q: _mock_outlets(q) for q in unique})
+        try:
+            rows = await asyncio.to_thread(db.search_many, unique, 5)
+        except Exception as e:
+            raise ServiceError(500, f"Database error: {str(e)}")
+        return _batch_response(queries, {q: _mock_outlet_rows(r) for q, r in zip(unique, rows)})
+    
+    db = _ready_outlet_db()
+    cache = get_sql_cache()
+    matched = dict(zip(unique, await asyncio.to_thread(lambda: [_match_template(db, q) for q in unique])))
+    statements = {q: matched[q][1:] if matched[q] else cache.get(q) for q in unique}
+    misses = [q for q in unique if statements[q] is None]
+    results = {}
+    
+    if misses:
+        llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+        semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+        
+        async def translate(query: str) -> str:
+            async with semaphore:
+                response = await llm.ainvoke(_text2sql_prompt(query))
+            return _validate_sql(response.content)
+        
+        generated = await asyncio.gather(*(translate(q) for q in misses), return_exceptions=True)
+        for q, outcome in zip(misses, generated):
+            if isinstance(outcome, Exception):
+                results[q] = _item_error(outcome, "Text2SQL error")
+            else:
+                statements[q] = outcome
+    
+    runnable = [q for q in unique if q not in results]
+    try:
+        outcomes = await asyncio.to_thread(db.execute_many, [statements[q] for q in runnable])
+    except Exception as e:
+        raise ServiceError(500, f"Text2SQL error: {str(e)}")
+    
+    for q, outcome in zip(runnable, outcomes):
+        if isinstance(outcome, Exception):
+            results[q] = _item_error(outcome, "Text2SQL error")
+            continue
+        if matched[q]:
+            results[q] = _template_result(matched[q], outcome)
+            continue
+        results[q] = _generated_result(q, statements[q], q not in misses, outcome)
+    
+    return _batch_response(queries, results)
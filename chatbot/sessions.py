@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import asyncio
+import threading
+import time
+import uuid
+import os
+
+from .agent import ConversationAgent
+from .tools import build_tools
+
+MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "10000"))
+SESSION_TTL = int(os.getenv("CHAT_SESSION_TTL", "1800"))
+MAX_MEMORY_BYTES = int(os.getenv("CHAT_SESSION_MEMORY_MB", "256")) * 1024 * 1024
+# Sessions live inside the API server, so tools call it in-process unless pointed at a separate deployment
+TOOL_TRANSPORT = os.getenv("TOOL_TRANSPORT", "inprocess")
+
+
+class Session:
+    __slots__ = ("session_id", "agent", "last_seen", "size", "lock")
+
+    def __init__(self, session_id: str, agent: ConversationAgent):
+        self.session_id = session_id
+        self.agent = agent
+        self.last_seen = time.time()
+        self.size = agent.memory_bytes()
+        # Serializes turns of one session; held across awaits, so it is an asyncio lock
+        self.lock = asyncio.Lock()
+
+
+class SessionManager:
+    """
+    Per-session conversation state with LRU + idle-TTL eviction and a memory cap.
+    Every session is forked from one prototype agent, so the LLM client and tools are shared.
+    """
+
+    def __init__(self, prototype: Optional[ConversationAgent] = None, max_sessions: int = MAX_SESSIONS,
+                 ttl: int = SESSION_TTL, max_memory_bytes: int = MAX_MEMORY_BYTES):
+        self.prototype = prototype
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str) -> Session:
+        """Return the caller's session, creating it if it is new or has been evicted"""
+        with self._lock:
+            if self.prototype is None:
+                self.prototype = ConversationAgent(tools=build_tools(TOOL_TRANSPORT))
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, self.prototype.fork())
+                self._sessions[session_id] = session
+                self._memory_bytes += session.size
+                self._enforce_limits()
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = time.time()
+            return session
+
+    def touch(self, session: Session) -> None:
+        """Re-measure a session after a turn so the memory cap stays accurate"""
+        size = session.agent.memory_bytes()
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._memory_bytes += size - session.size
+                session.size = size
+                self._enforce_limits()
+
+    async def reset(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return False
+        async with session.lock:
+            session.agent.reset()
+        self.touch(session)
+        return True
+
+    def _remove(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._memory_bytes -= session.size
+        self.evictions += 1
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        # Sessions are kept in last-used order, so idle ones sit at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            self._remove(oldest.session_id)
+
+    def _enforce_limits(self) -> None:
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._memory_bytes > self.max_memory_bytes
+        ):
+            self._remove(next(iter(self._sessions)))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        count = len(self._sessions)
+        return {
+            "sessions": count,
+            "memory_bytes": self._memory_bytes,
+            "avg_session_bytes": self._memory_bytes // count if count else 0,
+            "max_sessions": self.max_sessions,
+            "max_memory_bytes": self.max_memory_bytes,
+            "evictions": self.evictions,
+        }
+
+
+session_manager = None
+
+
+def get_session_manager() -> SessionManager:
+    global session_manager
+    if session_manager is None:
+        session_manager = SessionManager()
+    return session_manager
@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import sqlite3
+import threading
+import time
+import re
+import os
+
+from .outlet_db import OUTLET_DB_PATH
+
+CACHE_PATH = os.getenv("TEXT2SQL_CACHE_PATH", "cache/text2sql.db")
+MAX_ENTRIES = int(os.getenv("TEXT2SQL_CACHE_SIZE", "2000"))
+TTL_SECONDS = int(os.getenv("TEXT2SQL_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Spelling variants users type for the same outlet/area, mapped to one canonical form
+OUTLET_ALIASES = {
+    "ss2": "ss 2",
+    "ss-2": "ss 2",
+    "kl": "kuala lumpur",
+    "pj": "petaling jaya",
+    "montkiara": "mont kiara",
+    "mt kiara": "mont kiara",
+    "subang jaya": "subang",
+    "damansara jaya": "damansara",
+}
+
+_alias_pattern = re.compile(
+    r'\b(' + '|'.join(re.escape(a) for a in sorted(OUTLET_ALIASES, key=len, reverse=True)) + r')\b'
+)
+
+
+def normalize_question(question: str) -> str:
+    """Canonical cache key: lowercase, punctuation-free, single-spaced, aliases resolved"""
+    q = question.lower()
+    q = re.sub(r"[^\w\s-]", " ", q)
+    q = re.sub(r"\s+", " ", q).strip()
+    return _alias_pattern.sub(lambda m: OUTLET_ALIASES[m.group(1)], q)
+
+
+def db_fingerprint(db_path: str) -> str:
+    """Hash of the outlets schema and DB file identity; changes whenever either does"""
+    if not os.path.exists(db_path):
+        return ""
+    st = os.stat(db_path)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        schema = "\n".join(r[0] or "" for r in conn.execute("SELECT sql FROM sqlite_master ORDER BY name"))
+    finally:
+        conn.close()
+    return hashlib.sha256(f"{schema}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()[:16]
+
+
+class SQLTranslationCache:
+    """LRU + TTL cache of natural-language question -> validated SQL, persisted to SQLite"""
+
+    def __init__(self, db_path: str, path: Optional[str] = CACHE_PATH,
+                 max_entries: int = MAX_ENTRIES, ttl: int = TTL_SECONDS):
+        self.db_path = db_path
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stat = None
+        self._fingerprint = None
+        self._store = None
+        if path:
+            self._open_store()
+        self._check_fingerprint()
+
+    def _open_store(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._store = sqlite3.connect(self.path, check_same_thread=False)
+        self._store.execute(
+            "CREATE TABLE IF NOT EXISTS translations "
+            "(key TEXT PRIMARY KEY, sql TEXT NOT NULL, created_at REAL NOT NULL, fingerprint TEXT NOT NULL)"
+        )
+        self._store.commit()
+
+    def _load_store(self) -> None:
+        if self._store is None:
+            return
+        cutoff = time.time() - self.ttl
+        self._store.execute(
+            "DELETE FROM translations WHERE fingerprint != ? OR created_at < ?", (self._fingerprint, cutoff)
+        )
+        self._store.commit()
+        rows = self._store.execute(
+            "SELECT key, sql, created_at FROM translations ORDER BY created_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, sql, created_at in reversed(rows):
+            self._entries[key] = (sql, created_at)
+
+    def _check_fingerprint(self) -> None:
+        """Drop every entry if the outlets DB file or schema has changed since the last check"""
+        try:
+            st = os.stat(self.db_path)
+            stat = (st.st_size, st.st_mtime_ns)
+        except FileNotFoundError:
+            stat = None
+        if stat == self._stat and self._fingerprint is not None:
+            return
+        self._stat = stat
+        fingerprint = db_fingerprint(self.db_path)
+        if fingerprint != self._fingerprint:
+            if self._fingerprint is not None:
+                self.invalidations += 1
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self._load_store()
+
+    def get(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            sql, created_at = entry
+            if time.time() - created_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return sql
+
+    def put(self, question: str, sql: str) -> None:
+        """Store SQL that has already passed validation"""
+        key = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            self._check_fingerprint()
+            self._entries[key] = (sql, now)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if self._store is not None:
+                self._store.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", (key, sql, now, self._fingerprint)
+                )
+                self._store.executemany("DELETE FROM translations WHERE key = ?", [(k,) for k in evicted])
+                self._store.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._store is not None:
+                self._store.execute("DELETE FROM translations")
+                self._store.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "llm_calls_saved": self.hits,
+            "invalidations": self.invalidations,
+        }
+
+
+sql_cache = None
+
+
+def get_sql_cache() -> SQLTranslationCache:
+    global sql_cache
+    if sql_cache is None:
+        sql_cache = SQLTranslationCache(OUTLET_DB_PATH)
+    return sql_cache
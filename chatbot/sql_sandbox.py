@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Optional
+import sqlite3
+import time
+import re
+import os
+
+# Limits for SQL that is not written by us (LLM output, cached translations)
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "200"))
+SQL_TIME_BUDGET_MS = float(os.getenv("SQL_TIME_BUDGET_MS", "250"))
+# SQLite VM instructions between deadline checks; a check costs one clock read
+PROGRESS_INTERVAL = 1000
+FETCH_SIZE = 64
+
+LEADING_COMMENTS = re.compile(r'^(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*', re.DOTALL)
+READ_ONLY_START = re.compile(r'(SELECT|WITH)\b', re.IGNORECASE)
+
+# Authorizer actions a plain query needs; anything else (writes, PRAGMA, ATTACH, ...) is denied
+ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+DENIED_FUNCTIONS = {"load_extension", "fts3_tokenizer", "readfile", "writefile", "edit"}
+
+
+class SQLSandboxError(Exception):
+    """A statement the sandbox refused or stopped; status_code is the HTTP status to report"""
+    status_code = 400
+
+
+class ForbiddenStatement(SQLSandboxError):
+    status_code = 400
+
+
+class RowLimitExceeded(SQLSandboxError):
+    status_code = 413
+
+
+class TimeBudgetExceeded(SQLSandboxError):
+    status_code = 408
+
+
+def split_statements(sql: str) -> List[str]:
+    """Statements in a SQL string, split where SQLite's own tokenizer sees a complete statement"""
+    statements, current = [], ""
+    for char in sql:
+        current += char
+        if char == ";" and sqlite3.complete_statement(current):
+            statements.append(current)
+            current = ""
+    statements.append(current)
+    return [s.strip().rstrip(";").strip() for s in statements if LEADING_COMMENTS.sub("", s).strip(" \t\n;")]
+
+
+def check_statement(sql: str) -> str:
+    """The single SELECT (or WITH ... SELECT) in sql, without its trailing semicolon"""
+    statements = split_statements(sql)
+    if len(statements) != 1:
+        raise ForbiddenStatement("Only one SQL statement allowed" if statements else "Empty SQL statement")
+    statement = statements[0]
+    if not READ_ONLY_START.match(LEADING_COMMENTS.sub("", statement)):
+        raise ForbiddenStatement("Only SELECT allowed")
+    return statement
+
+
+def _authorize(action: int, arg1: Optional[str], arg2: Optional[str], db_name: Optional[str],
+               trigger: Optional[str]) -> int:
+    if action not in ALLOWED_ACTIONS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in DENIED_FUNCTIONS:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+def run_sandboxed(conn: sqlite3.Connection, sql: str, params: Optional[Dict[str, Any]] = None,
+                  max_rows: Optional[int] = None, time_budget_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Run one untrusted SELECT on a sqlite3 connection. SQLite's authorizer rejects anything but reads
+    while the statement is prepared, the query is wrapped in a LIMIT one past max_rows, rows are
+    fetched from the cursor in batches, and a progress handler aborts it once the time budget is spent.
+    Limits default to SQL_MAX_ROWS and SQL_TIME_BUDGET_MS.
+    """
+    max_rows = SQL_MAX_ROWS if max_rows is None else max_rows
+    time_budget_ms = SQL_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    statement = check_statement(sql)
+    wrapped = f"SELECT * FROM (\n{statement}\n) LIMIT {max_rows + 1}"
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    conn.set_authorizer(_authorize)
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, PROGRESS_INTERVAL)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(wrapped, params or {})
+        columns = [d[0] for d in cursor.description]
+        rows = []
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                return rows
+            if len(rows) + len(batch) > max_rows:
+                raise RowLimitExceeded(f"Query returns more than {max_rows} rows; add a narrower filter")
+            rows.extend(dict(zip(columns, row)) for row in batch)
+    except sqlite3.DatabaseError as e:
+        if time.perf_counter() > deadline and "interrupted" in str(e):
+            raise TimeBudgetExceeded(f"Query exceeded the {time_budget_ms:g} ms time budget") from e
+        if "not authorized" in str(e) or "prohibited" in str(e):
+            raise ForbiddenStatement(f"Statement not allowed: {e}") from e
+        if "syntax error" in str(e):
+            # Includes statements that are not queries (WITH ... DELETE) and so cannot be a subquery
+            raise ForbiddenStatement(f"Not a valid SELECT: {e}") from e
+        raise
+    finally:
+        cursor.close()
+        conn.set_authorizer(None)
+        conn.set_progress_handler(None, 0)
@@ -0,0 +1,132 @@
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import re
+import os
+
+from .gazetteer import CITY, OUTLET, get_gazetteer, tokenize
+from .outlet_schema import SERVICE_BITS, service_key
+
+TEMPLATE_LIMIT = int(os.getenv("TEXT2SQL_TEMPLATE_LIMIT", "20"))
+
+TEMPLATE = "template"
+CACHE = "cache"
+LLM = "llm"
+
+HOURS_WORDS = re.compile(r'\b(hours?|open(?:ing)?|clos(?:e|es|ing)|time)\b', re.IGNORECASE)
+LOCATIVE = re.compile(r'\b(in|around|near|within)\b', re.IGNORECASE)
+ALL_OUTLETS = re.compile(r'\b(all|every|list)\b.*\b(outlets?|stores?|branch(?:es)?|locations?)\b', re.IGNORECASE)
+# Questions a template would answer wrongly: counts, comparisons, negations, times of day.
+# These go to the LLM rather than getting a confident but incomplete answer.
+DECLINE = re.compile(
+    r'\b(how many|count|number of|after|before|until|till|latest|earliest|now|today|tonight|'
+    r'not|without|except|most|least|nearest|closest)\b|\d{1,2}\s*[ap]\.?m\b|\d{1,2}:\d{2}',
+    re.IGNORECASE,
+)
+
+# Without the outlet_services table, a service is matched on the free-text column
+SERVICE_LIKE = {"dine-in": "%dine%in%", "takeaway": "%take%away%", "delivery": "%deliver%", "drive-thru": "%drive%thr%"}
+
+Template = Tuple[str, str, Dict[str, Any]]
+
+
+def mentioned_services(text: str) -> List[str]:
+    """Canonical services named in the text, checking single words and adjacent pairs ("drive thru")"""
+    tokens = tokenize(text)
+    found = []
+    for i, token in enumerate(tokens):
+        for candidate in (token, "".join(tokens[i:i + 2])):
+            key = service_key(candidate)
+            if key and key not in found:
+                found.append(key)
+    return found
+
+
+def _like(value: str) -> str:
+    return f"%{value}%"
+
+
+def _services_clause(services: List[str], structured: bool, params: Dict[str, Any]) -> str:
+    if structured:
+        params["services"] = sum(SERVICE_BITS[s] for s in services)
+        return "rowid IN (SELECT outlet_id FROM outlet_services WHERE services_mask & :services = :services)"
+    clauses = []
+    for i, service in enumerate(services):
+        params[f"service_{i}"] = SERVICE_LIKE[service]
+        clauses.append(f"services LIKE :service_{i}")
+    return " AND ".join(clauses)
+
+
+def match_template(question: str, places: Dict[str, str], structured: bool = False,
+                   limit: int = TEMPLATE_LIMIT) -> Optional[Template]:
+    """
+    (template name, parameterized SQL, params) for the common outlet question shapes, or None when
+    the question needs the LLM. places are the city/outlet the gazetteer resolved in the question;
+    structured uses the parsed outlet_services table instead of LIKE on the services column.
+    """
+    if DECLINE.search(question):
+        return None
+    outlet, city = places.get(OUTLET), places.get(CITY)
+    services = mentioned_services(question)
+    params: Dict[str, Any] = {"limit": limit}
+
+    if services:
+        where = [_services_clause(services, structured, params)]
+        place = city or outlet
+        if place:
+            where.append("(address LIKE :place OR name LIKE :place)")
+            params["place"] = _like(place)
+        return "outlets_with_service", f"SELECT * FROM outlets WHERE {' AND '.join(where)} LIMIT :limit", params
+    if outlet and HOURS_WORDS.search(question):
+        params["outlet"] = _like(outlet)
+        return "outlet_hours", "SELECT * FROM outlets WHERE name LIKE :outlet LIMIT :limit", params
+    if city and (LOCATIVE.search(question) or not outlet):
+        params["city"] = _like(city)
+        return "outlets_in_city", "SELECT * FROM outlets WHERE address LIKE :city LIMIT :limit", params
+    if outlet:
+        params["outlet"] = _like(outlet)
+        return "outlet_by_name", "SELECT * FROM outlets WHERE name LIKE :outlet LIMIT :limit", params
+    if ALL_OUTLETS.search(question):
+        return "all_outlets", "SELECT * FROM outlets LIMIT :limit", params
+    return None
+
+
+class SQLTemplates:
+    """Deterministic Text2SQL in front of the LLM, with counts of which path answered each question"""
+
+    def __init__(self, resolve: Optional[Callable[[str], Dict[str, str]]] = None):
+        self.resolve = resolve or (lambda text: get_gazetteer().resolve(text))
+        self.paths = Counter()
+        self.templates = Counter()
+        self._lock = threading.Lock()
+
+    def match(self, question: str, structured: bool = False) -> Optional[Template]:
+        return match_template(question, self.resolve(question), structured)
+
+    def record(self, path: str, template: Optional[str] = None) -> None:
+        with self._lock:
+            self.paths[path] += 1
+            if template:
+                self.templates[template] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.paths.values())
+        avoided = self.paths[TEMPLATE] + self.paths[CACHE]
+        return {
+            "queries": total,
+            "template_hits": self.paths[TEMPLATE],
+            "cache_hits": self.paths[CACHE],
+            "llm_calls": self.paths[LLM],
+            "llm_avoidance_rate": round(avoided / total, 3) if total else 0.0,
+            "templates": dict(self.templates),
+        }
+
+
+sql_templates = None
+
+
+def get_sql_templates() -> SQLTemplates:
+    global sql_templates
+    if sql_templates is None:
+        sql_templates = SQLTemplates()
+    return sql_templates
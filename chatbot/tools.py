@@ -1,13 +1,69 @@
 import requests
-from typing import Dict, Any
+import httpx
+from typing import AsyncIterator, Dict, Any, Optional
 import os
 
+from . import services
+
 MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
+# "http" calls the API at BASE_URL; "inprocess" calls chatbot.services directly
+HTTP = "http"
+INPROCESS = "inprocess"
+
+_async_client = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the async HTTP transport"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient()
+    return _async_client
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+TIMEOUTS = (requests.exceptions.Timeout, httpx.TimeoutException)
+UNREACHABLE = (requests.exceptions.ConnectionError, httpx.TransportError)
+
+def _error_status(e: Exception) -> Optional[int]:
+    """Status code of an API error response or an in-process ServiceError"""
+    if isinstance(e, services.ServiceError):
+        return e.status_code
+    if isinstance(e, (requests.exceptions.HTTPError, httpx.HTTPStatusError)):
+        return e.response.status_code
+    return None
+
+def _error_detail(e: Exception, default: str) -> str:
+    if isinstance(e, services.ServiceError):
+        return e.detail
+    try:
+        return e.response.json().get("detail", default)
+    except ValueError:
+        return default
+
 class CalculatorTool:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, transport: str = HTTP):
         self.base_url = base_url or BASE_URL
+        self.transport = transport
+
+    def _map_error(self, e: Exception) -> Dict[str, Any]:
+        """User-facing message for a failed calculation on either transport"""
+        # Timeouts first: a requests connect timeout is also a ConnectionError
+        if isinstance(e, TIMEOUTS):
+            return {"error": "The calculator is taking too long to respond. Please try again."}
+        if isinstance(e, UNREACHABLE):
+            return {"error": "I'm having trouble reaching the calculator service. Please try again later."}
+        status = _error_status(e)
+        if status == 400:
+            return {"error": f"Invalid expression: {_error_detail(e, 'Invalid expression')}"}
+        if status is not None:
+            return {"error": "I'm having trouble with that calculation. Please try a different expression."}
+        return {"error": "Calculation error. Please check your expression and try again."}
 
     def run(self, expression: str) -> Dict[str, Any]:
         """Run calculator - works in both real and mock mode"""
@@ -15,6 +71,8 @@ class CalculatorTool:
             return {"error": "Please provide a mathematical expression. Example: '5 * 6'"}
         
         try:
+            if self.transport == INPROCESS:
+                return {"result": services.calculate(expression)["result"]}
             resp = requests.post(
                 f"{self.base_url}/calculate",
                 json={"expr": expression},
@@ -22,78 +80,111 @@ class CalculatorTool:
             )
             resp.raise_for_status()
             return {"result": resp.json()["result"]}
-        except requests.exceptions.Timeout:
-            return {"error": "The calculator is taking too long to respond. Please try again."}
-        except requests.exceptions.ConnectionError:
-            return {"error": "I'm having trouble reaching the calculator service. Please try again later."}
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 400:
-                error_detail = e.response.json().get("detail", "Invalid expression")
-                return {"error": f"Invalid expression: {error_detail}"}
-            return {"error": "I'm having trouble with that calculation. Please try a different expression."}
         except Exception as e:
-            return {"error": f"Calculation error. Please check your expression and try again."}
+            return self._map_error(e)
+
+    async def arun(self, expression: str) -> Dict[str, Any]:
+        """Async run - awaits the shared HTTP client, or calls the calculator in-process"""
+        if not expression.strip():
+            return {"error": "Please provide a mathematical expression. Example: '5 * 6'"}
+        
+        try:
+            if self.transport == INPROCESS:
+                return {"result": (await services.acalculate(expression))["result"]}
+            resp = await get_async_client().post(
+                f"{self.base_url}/calculate",
+                json={"expr": expression},
+                timeout=5
+            )
+            resp.raise_for_status()
+            return {"result": resp.json()["result"]}
+        except Exception as e:
+            return self._map_error(e)
 
 
 class ProductRAGTool:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, transport: str = HTTP):
         self.base_url = base_url or BASE_URL
-        
-        self.mock_responses = {
-            "tumbler": {
-                "answer": "We offer several great tumbler options! The **OG CUP 2.0** (RM 49.90) features a screw-on lid and double-wall insulation. The **All-Can Tumbler** (RM 59.90) is versatile and fits standard cans. The **All Day Cup** (RM 49.90) is perfect for daily use with various designs.",
-                "sources": [
-                    {"title": "OG CUP 2.0", "price": "RM 49.90"},
-                    {"title": "All-Can Tumbler", "price": "RM 59.90"},
-                    {"title": "All Day Cup", "price": "RM 49.90"}
-                ]
-            },
-            "mug": {
-                "answer": "We have two excellent mug options: The **OG Ceramic Mug** (RM 39.90) is microwave and dishwasher safe, perfect for your morning coffee. The **ZUS Stainless Steel Mug** (RM 44.90) features double-wall insulation.",
-                "sources": [
-                    {"title": "OG Ceramic Mug", "price": "RM 39.90"},
-                    {"title": "ZUS Stainless Steel Mug", "price": "RM 44.90"}
-                ]
-            },
-            "price": {
-                "answer": "Our drinkware prices range from RM 39.90 to RM 59.90. Ceramic mugs start at RM 39.90, standard tumblers at RM 49.90, and premium tumblers at RM 59.90.",
-                "sources": [{"title": "Price Range", "price": "RM 39.90 - 59.90"}]
-            }
-        }
+        self.transport = transport
+
+    def _map_error(self, e: Exception, query: str) -> Dict[str, Any]:
+        """User-facing result for a failed search; an unreachable API falls back to the local index"""
+        if isinstance(e, TIMEOUTS):
+            return {"error": "The product search is taking too long. Please try again."}
+        if isinstance(e, UNREACHABLE):
+            return self._offline_answer(query)
+        return {"error": "I'm having trouble fetching product info. Please try again later."}
 
     def run(self, query: str) -> Dict[str, Any]:
-        """Search products - uses API or mock responses"""
+        """Search products - uses the API, or the local catalog index when it is unreachable"""
         if not query.strip():
             return {"error": "Please ask about a product. Example: 'What tumblers do you offer?'"}
         
         try:
-            resp = requests.get(
-                f"{self.base_url}/products",
-                params={"query": query},
-                timeout=10
-            )
-            resp.raise_for_status()
-            data = resp.json()
+            if self.transport == INPROCESS:
+                data = services.search_products(query)
+            else:
+                resp = requests.get(
+                    f"{self.base_url}/products",
+                    params={"query": query},
+                    timeout=10
+                )
+                resp.raise_for_status()
+                data = resp.json()
             return {"answer": data["answer"], "sources": data.get("sources", [])}
+        except Exception as e:
+            return self._map_error(e, query)
+
+    def _offline_answer(self, query: str) -> Dict[str, Any]:
+        """API unreachable: answer from the local BM25 catalog index"""
+        data = services.lexical_products(query)
+        return {"answer": data["answer"], "sources": data["sources"]}
+
+    async def arun(self, query: str) -> Dict[str, Any]:
+        """Async run - awaits the shared HTTP client, or the async product service in-process"""
+        if not query.strip():
+            return {"error": "Please ask about a product. Example: 'What tumblers do you offer?'"}
         
-        except requests.exceptions.Timeout:
-            return {"error": "The product search is taking too long. Please try again."}
-        except requests.exceptions.ConnectionError:
-            query_lower = query.lower()
-            for key, response in self.mock_responses.items():
-                if key in query_lower:
-                    return response
-            return {
-                "answer": "We offer a variety of drinkware including tumblers, mugs, and accessories. What specific product are you interested in?",
-                "sources": []
-            }
+        try:
+            if self.transport == INPROCESS:
+                data = await services.asearch_products(query)
+            else:
+                resp = await get_async_client().get(
+                    f"{self.base_url}/products",
+                    params={"query": query},
+                    timeout=10
+                )
+                resp.raise_for_status()
+                data = resp.json()
+            return {"answer": data["answer"], "sources": data.get("sources", [])}
+        except Exception as e:
+            return self._map_error(e, query)
+
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Yield the answer in chunks: token by token in-process, as one chunk over HTTP"""
+        if self.transport != INPROCESS or not query.strip():
+            result = await self.arun(query)
+            yield result.get("error") or result.get("answer", "No information found.")
+            return
+        
+        streamed = False
+        try:
+            async for kind, value in services.astream_products(query):
+                if kind == "token":
+                    streamed = True
+                    yield value
         except Exception as e:
-            return {"error": "I'm having trouble fetching product info. Please try again later."}
+            if streamed:
+                # Part of the answer is out; the caller reports the failure separately
+                raise
+            result = self._map_error(e, query)
+            yield result.get("error") or result["answer"]
 
 
 class OutletSQLTool:
-    def __init__(self, base_url: str = None):
+    def __init__(self, base_url: str = None, transport: str = HTTP):
         self.base_url = base_url or BASE_URL
+        self.transport = transport
         
         self.mock_outlets = {
             "ss 2": {
@@ -128,36 +219,78 @@ class OutletSQLTool:
             }
         }
 
+    def _map_error(self, e: Exception, nl_query: str) -> Dict[str, Any]:
+        """User-facing result for a failed search; an unreachable API falls back to the mock outlets"""
+        if isinstance(e, TIMEOUTS):
+            return {"error": "The outlet search is taking too long. Please try again."}
+        if isinstance(e, UNREACHABLE):
+            return self._offline_results(nl_query)
+        return {"error": "I'm having trouble fetching outlet info. Please try again later."}
+
     def run(self, nl_query: str) -> Dict[str, Any]:
         """Search outlets - uses API or mock data"""
         if not nl_query.strip():
             return {"error": "Please specify an outlet or location. Example: 'SS 2' or 'Bangsar'"}
         
         try:
-            resp = requests.get(
-                f"{self.base_url}/outlets",
-                params={"query": nl_query},
-                timeout=10
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            
-            if "error" in data:
-                return {"error": data["error"]}
-            
-            if not data.get("results"):
-                return {"error": "No outlets found. Try a different location like 'SS 2' or 'Bangsar'."}
-            
-            return {"results": data["results"]}
+            if self.transport == INPROCESS:
+                data = services.search_outlets(nl_query)
+            else:
+                resp = requests.get(
+                    f"{self.base_url}/outlets",
+                    params={"query": nl_query},
+                    timeout=10
+                )
+                resp.raise_for_status()
+                data = resp.json()
+        except Exception as e:
+            return self._map_error(e, nl_query)
         
-        except requests.exceptions.Timeout:
-            return {"error": "The outlet search is taking too long. Please try again."}
-        except requests.exceptions.ConnectionError:
-            query_lower = nl_query.lower()
-            for key, outlet in self.mock_outlets.items():
-                if key in query_lower:
-                    return {"results": [outlet]}
-            
-            return {"results": list(self.mock_outlets.values())[:3]}
+        return self._format(data)
+
+    def _format(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if "error" in data:
+            return {"error": data["error"]}
+        
+        if not data.get("results"):
+            return {"error": "No outlets found. Try a different location like 'SS 2' or 'Bangsar'."}
+        
+        return {"results": data["results"]}
+
+    def _offline_results(self, nl_query: str) -> Dict[str, Any]:
+        query_lower = nl_query.lower()
+        for key, outlet in self.mock_outlets.items():
+            if key in query_lower:
+                return {"results": [outlet]}
+        
+        return {"results": list(self.mock_outlets.values())[:3]}
+
+    async def arun(self, nl_query: str) -> Dict[str, Any]:
+        """Async run - awaits the shared HTTP client, or the async outlet service in-process"""
+        if not nl_query.strip():
+            return {"error": "Please specify an outlet or location. Example: 'SS 2' or 'Bangsar'"}
+        
+        try:
+            if self.transport == INPROCESS:
+                data = await services.asearch_outlets(nl_query)
+            else:
+                resp = await get_async_client().get(
+                    f"{self.base_url}/outlets",
+                    params={"query": nl_query},
+                    timeout=10
+                )
+                resp.raise_for_status()
+                data = resp.json()
         except Exception as e:
-            return {"error": "I'm having trouble fetching outlet info. Please try again later."}
\ No newline at end of file
+            return self._map_error(e, nl_query)
+        
+        return self._format(data)
+
+
+def build_tools(transport: str = HTTP) -> Dict[str, Any]:
+    """Tool set used by ConversationAgent, all on the same transport"""
+    return {
+        "calculator": CalculatorTool(transport=transport),
+        "products": ProductRAGTool(transport=transport),
+        "outlets": OutletSQLTool(transport=transport)
+    }
\ No newline at end of file
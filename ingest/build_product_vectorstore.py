@@ -1,86 +1,180 @@
-from langchain_community.document_loaders import JSONLoader
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from typing import Dict
+import hashlib
+import shutil
+import json
+import time
 import os
 import sys
 
-def build_product_vectorstore():
+from chatbot.embedding_cache import cached_openai_embeddings
+from chatbot.lexical_index import LexicalIndex, LEXICAL_INDEX_PATH, PRODUCT_DATA_PATH, product_document
+from chatbot.product_index import MANIFEST_FILE, VECTORSTORE_PATH
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+def build_lexical_index():
+    """Build the BM25 product index; needs no API key, so it is built in every mode"""
+    if not os.path.exists(PRODUCT_DATA_PATH):
+        return
+    index = LexicalIndex.from_jsonl(PRODUCT_DATA_PATH)
+    index.save(LEXICAL_INDEX_PATH)
+    print(f"BM25 product index built ({len(index)} products, {len(index.postings)} terms) -> {LEXICAL_INDEX_PATH}")
+
+def product_id(record: dict) -> str:
+    """Products are identified by their URL (stable across scrapes), else by title"""
+    return record.get("url") or record.get("title", "")
+
+def content_hash(doc: Document) -> str:
+    data = json.dumps([doc.page_content, doc.metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def load_catalog(path: str = PRODUCT_DATA_PATH) -> Dict[str, Document]:
+    """Product ID -> the Document the vectorstore holds for it; a repeated ID keeps its last record"""
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {product_id(record): product_document(record) for record in records}
+
+def load_manifest(path: str = VECTORSTORE_PATH) -> Dict[str, str]:
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path) or not os.path.exists(os.path.join(path, "index.faiss")):
+        return {}
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_vectorstore(vectorstore: FAISS, manifest: Dict[str, str], path: str = VECTORSTORE_PATH) -> None:
+    """
+    Write the index and its manifest to a new directory under <path>.versions/, then point the
+    `path` symlink at it with one os.replace, so readers always find a complete build there. The
+    previous build is kept for readers still loading it; older ones are removed.
+    """
+    versions = f"{path}.versions"
+    build = os.path.join(versions, str(time.time_ns()))
+    vectorstore.save_local(build)
+    with open(os.path.join(build, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, sort_keys=True)
+    link = f"{path}.tmp"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.relpath(build, os.path.dirname(os.path.abspath(path))), link)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A build from before versioning; moved aside once (the only swap that is not atomic)
+        os.replace(path, os.path.join(versions, "0"))
+    os.replace(link, path)
+    current = os.path.basename(os.path.realpath(path))
+    builds = sorted((name for name in os.listdir(versions) if name != current), key=int)
+    for name in builds[:-1]:
+        shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+def update_vectorstore(documents: Dict[str, Document], embeddings: Embeddings, path: str = VECTORSTORE_PATH,
+                       batch_size: int = EMBED_BATCH_SIZE, full: bool = False) -> Dict[str, int]:
+    """
+    Bring the index at `path` in line with `documents`: removed products are deleted, and only new
+    or changed ones are embedded, batch_size at a time. A batch that fails to embed is skipped and
+    its products keep their previous entry, so the next run retries just those. A full rebuild
+    with failed batches is not saved, since it would drop those products from the index.
+    """
+    manifest = {} if full else load_manifest(path)
+    vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True) if manifest else None
+    hashes = {pid: content_hash(doc) for pid, doc in documents.items()}
+    removed = [pid for pid in manifest if pid not in hashes]
+    pending = [pid for pid, digest in hashes.items() if manifest.get(pid) != digest]
+    stats = {"products": len(documents), "unchanged": len(documents) - len(pending), "added": 0, "changed": 0,
+             "removed": len(removed), "failed": 0}
+    if not removed and not pending:
+        return stats
+
+    embedded = []
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            vectors = embeddings.embed_documents([documents[pid].page_content for pid in batch])
+        except Exception as e:
+            stats["failed"] += len(batch)
+            print(f"   ✗ Embedding batch {start // batch_size + 1} failed ({len(batch)} products): {e}")
+            continue
+        embedded.extend(zip(batch, vectors))
+
+    replaced = [pid for pid, _ in embedded if pid in manifest]
+    if vectorstore is not None and (removed or replaced):
+        vectorstore.delete(removed + replaced)
+    for pid in removed:
+        del manifest[pid]
+    if embedded:
+        ids = [pid for pid, _ in embedded]
+        text_embeddings = [(documents[pid].page_content, vector) for pid, vector in embedded]
+        metadatas = [documents[pid].metadata for pid in ids]
+        if vectorstore is None:
+            vectorstore = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        manifest.update((pid, hashes[pid]) for pid in ids)
+    stats["changed"] = len(replaced)
+    stats["added"] = len(embedded) - len(replaced)
+
+    if full and stats["failed"]:
+        print(f"   ✗ Full rebuild incomplete; keeping the existing index at {path}")
+        return stats
+    if vectorstore is not None:
+        save_vectorstore(vectorstore, manifest, path)
+    return stats
+
+def build_product_vectorstore(full: bool = False):
     """
     Build product vector store from scraped data.
-    Skips if OPENAI_API_KEY is not available or MOCK_MODE is enabled.
+    Incremental by default: only products whose content changed since the last build are
+    embedded, and removed ones are deleted; full=True rebuilds from scratch.
+    Skips if OPENAI_API_KEY is not available or MOCK_MODE is enabled;
+    the BM25 index is built either way.
     """
-    
+
+    build_lexical_index()
+
     # Check if we should skip vector store building
     mock_mode = os.getenv("MOCK_MODE", "false").lower() == "true"
     api_key = os.getenv("OPENAI_API_KEY", "")
-    
+
     if mock_mode:
         print("MOCK_MODE enabled - Skipping vector store build")
-        print("✓  Mock mode will use keyword-based product search")
+        print("✓  Mock mode will use BM25 product search")
         return
-    
+
     if not api_key:
         print("OPENAI_API_KEY not found - Skipping vector store build")
         print("✓  Set OPENAI_API_KEY environment variable to build vector store")
         print("✓  Or enable MOCK_MODE for demo without OpenAI")
         return
-    
+
     # Check if data file exists
-    if not os.path.exists("data/drinkware.jsonl"):
-        print("Error: data/drinkware.jsonl not found")
-        print("   Run: python ingest/scrape_products.py")
+    if not os.path.exists(PRODUCT_DATA_PATH):
+        print(f"Error: {PRODUCT_DATA_PATH} not found")
+        print("   Run: python -m ingest.scrape_products")
         sys.exit(1)
-    
+
     try:
-        print("Building product vector store...")
-        
-        # Load documents
-        loader = JSONLoader(
-            file_path="data/drinkware.jsonl",
-            jq_schema=".title + ' - ' + .description",
-            text_content=False
-        )
-        docs = loader.load()
-        
-        print(f"   Loaded {len(docs)} products")
-        
-        # Process documents
-        processed_docs = []
-        for doc in docs:
-            if hasattr(doc, 'page_content') and isinstance(doc.page_content, dict):
-                content = doc.page_content
-                text = f"{content.get('title', '')} - {content.get('description', '')}"
-                processed_docs.append(
-                    Document(
-                        page_content=text,
-                        metadata={
-                            "title": content.get("title", "Unknown"),
-                            "price": content.get("price", "N/A")
-                        }
-                    )
-                )
-            else:
-                text = str(doc.page_content)
-                processed_docs.append(
-                    Document(
-                        page_content=text,
-                        metadata=getattr(doc, 'metadata', {})
-                    )
-                )
-        
-        print(f"   Processed {len(processed_docs)} documents")
-        
-        print("   Creating embeddings (this may take a minute)...")
-        embeddings = OpenAIEmbeddings()
-        
-        vectorstore = FAISS.from_documents(processed_docs, embeddings)
-        
-        os.makedirs("vectorstore", exist_ok=True)
-        vectorstore.save_local("vectorstore/product_kb")
-        
-        print("Product vector store built and saved to vectorstore/product_kb")
-        
+        print(f"{'Rebuilding' if full else 'Updating'} product vector store...")
+
+        documents = load_catalog(PRODUCT_DATA_PATH)
+        print(f"   Loaded {len(documents)} products")
+
+        embeddings = cached_openai_embeddings()
+        stats = update_vectorstore(documents, embeddings, VECTORSTORE_PATH, full=full)
+        print(f"   {stats['added']} added, {stats['changed']} changed, {stats['removed']} removed, "
+              f"{stats['unchanged']} unchanged, {stats['failed']} failed")
+        print(f"   Embedding cache: {embeddings.hits} reused, {embeddings.misses} new")
+
+        if full and stats["failed"]:
+            print(f"✗ {stats['failed']} products were not embedded; the rebuild was not saved")
+            return
+        if stats["failed"]:
+            print(f"✗ {stats['failed']} products were not embedded; run again to retry them")
+        if stats["added"] or stats["changed"] or stats["removed"]:
+            print(f"Product vector store saved to {VECTORSTORE_PATH}")
+        else:
+            print(f"Product vector store at {VECTORSTORE_PATH} is up to date")
+
     except Exception as e:
         print(f"Error building vector store: {str(e)}")
         print("This is okay if you're using MOCK_MODE")
@@ -88,4 +182,4 @@ def build_product_vectorstore():
         return
 
 if __name__ == "__main__":
-    build_product_vectorstore()
\ No newline at end of file
+    build_product_vectorstore(full="--full" in sys.argv)
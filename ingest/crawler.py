@@ -0,0 +1,290 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+import multiprocessing
+import threading
+import random
+import time
+import os
+
+import httpx
+
+from ingest.http_cache import CacheMiss, CachedResponse, ResponseCache
+
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "8"))
+# Requests per second to any one host, and how many may go out back to back
+CRAWL_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "4"))
+CRAWL_BURST = int(os.getenv("CRAWL_BURST", "4"))
+CRAWL_RETRIES = int(os.getenv("CRAWL_RETRIES", "3"))
+CRAWL_BACKOFF = float(os.getenv("CRAWL_BACKOFF", "0.5"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "10"))
+# Processes that run page handlers (HTML parsing) apart from the I/O threads, leaving a core for I/O;
+# 0 (the default on one CPU, where a pool only adds overhead) parses on the I/O threads
+CRAWL_PARSE_WORKERS = int(os.getenv("CRAWL_PARSE_WORKERS", str(min(4, (os.cpu_count() or 1) - 1))))
+# BeautifulSoup tree builder for scraped pages (lxml is in requirements.txt and several times faster)
+HTML_PARSER = os.getenv("HTML_PARSER", "lxml")
+# Longest Retry-After the crawler will honor before giving up on a page
+MAX_RETRY_AFTER = 30.0
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+FETCHED = "fetched"
+NOT_MODIFIED = "not_modified"
+REPLAYED = "replayed"
+
+# A page handler gets (url, response) and returns the items it found and the links to follow
+Handler = Callable[[str, httpx.Response], Tuple[Iterable[Any], Iterable[str]]]
+
+
+def next_page_links(soup, page_url: str) -> List[str]:
+    """Pagination links on a parsed listing page: rel="next" (Shopify) or a.next (WordPress)"""
+    tags = soup.find_all(['a', 'link'], href=True, rel='next') + soup.select('a.next[href]')
+    return list(dict.fromkeys(urljoin(page_url, tag['href']) for tag in tags))
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, up to `burst` at once"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the time waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CrawlResult:
+    def __init__(self):
+        self.items: List[Any] = []
+        self.errors: Dict[str, str] = {}
+        self.pages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.replayed = 0
+        self.parsed = 0
+        self.elapsed = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "items": len(self.items),
+            "errors": len(self.errors),
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "replayed": self.replayed,
+            "parsed": self.parsed,
+            "bytes": self.bytes,
+            "seconds": round(self.elapsed, 3),
+            "pages_per_second": round(self.pages / self.elapsed, 1) if self.elapsed else 0.0,
+        }
+
+
+class Crawler:
+    """
+    Bounded worker pool over one keep-alive connection pool. Each host has a token bucket, failed
+    requests (transport errors, 429 and 5xx) are retried with exponential backoff and jitter, and
+    links returned by the handler (pagination, detail pages) are queued once each.
+    With a ResponseCache, requests are conditional (ETag / If-Modified-Since) and a 304 reuses the
+    cached body; replay=True serves every page from the cache without touching the network.
+    With parse_workers, handlers run in a process pool so parsing neither holds the GIL the I/O
+    threads need nor is limited to one core; handlers must then be picklable module-level functions.
+    """
+
+    def __init__(self, workers: int = CRAWL_WORKERS, rate: float = CRAWL_RATE_PER_HOST, burst: int = CRAWL_BURST,
+                 retries: int = CRAWL_RETRIES, backoff: float = CRAWL_BACKOFF, timeout: float = CRAWL_TIMEOUT,
+                 headers: Optional[Dict[str, str]] = None, cache: Optional[ResponseCache] = None,
+                 replay: bool = False, parse_workers: int = 0):
+        if replay and cache is None:
+            raise ValueError("Replay needs a response cache")
+        self.cache = cache
+        self.replay = replay
+        self.workers = workers
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.client = httpx.Client(
+            headers=headers or HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+        )
+        # Spawned rather than forked: the pool starts from inside an I/O thread
+        self.parse_pool = ProcessPoolExecutor(
+            max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+        ) if parse_workers else None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _request(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """GET within the host's rate limit, retrying transient failures; raises on final failure"""
+        for attempt in range(self.retries + 1):
+            self._bucket(url).acquire()
+            response = None
+            try:
+                response = self.client.get(url, headers=headers)
+                if response.status_code == 304:
+                    return response
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            if attempt == self.retries:
+                response.raise_for_status()
+            with self._lock:
+                self._retries += 1
+            time.sleep(self._retry_delay(attempt, response))
+        raise RuntimeError("unreachable")
+
+    def _from_cache(self, url: str, cached: CachedResponse) -> httpx.Response:
+        headers = {"Content-Type": cached.content_type} if cached.content_type else {}
+        return httpx.Response(200, headers=headers, content=self.cache.body(cached.sha256),
+                              request=httpx.Request("GET", url))
+
+    def _fetch(self, url: str) -> Tuple[httpx.Response, Optional[str], str]:
+        """(response, body hash if cached, FETCHED / NOT_MODIFIED / REPLAYED)"""
+        cached = self.cache.lookup(url) if self.cache else None
+        if self.replay:
+            if cached is None:
+                raise CacheMiss(f"{url} is not in the response cache")
+            return self._from_cache(url, cached), cached.sha256, REPLAYED
+        response = self._request(url, cached.validators() if cached else {})
+        if response.status_code == 304 and cached:
+            self.cache.touch(url)
+            return self._from_cache(url, cached), cached.sha256, NOT_MODIFIED
+        sha256 = None
+        if self.cache:
+            sha256 = self.cache.store(url, response.content, response.headers.get("ETag"),
+                                      response.headers.get("Last-Modified"), response.headers.get("Content-Type"))
+        return response, sha256, FETCHED
+
+    def fetch(self, url: str) -> httpx.Response:
+        """GET a URL (through the cache, if any); raises on final failure"""
+        return self._fetch(url)[0]
+
+    def crawl(self, seeds: Iterable[str], handler: Handler, parser: Optional[str] = None,
+              on_items: Optional[Callable[[List[Any]], None]] = None) -> CrawlResult:
+        """
+        Fetch the seeds and every link the handler returns, workers at a time. Items are returned in
+        the order their pages were discovered, so a crawl of unchanged pages gives the same output.
+        on_items gets each page's items in that same order, as soon as every earlier page is done.
+        With a cache and a parser name (bump it when the handler's output changes), a page whose body
+        was parsed before reuses that result instead of calling the handler; items must be JSON.
+        """
+        result = CrawlResult()
+        start = time.perf_counter()
+        retries_before = self._retries
+        order: List[str] = []
+        found: Dict[str, List[Any]] = {}
+        seen = set()
+        queue = deque()
+        emitted = 0
+
+        def emit() -> None:
+            nonlocal emitted
+            while emitted < len(order) and (order[emitted] in found or order[emitted] in result.errors):
+                items = found.get(order[emitted], [])
+                if on_items and items:
+                    on_items(items)
+                emitted += 1
+
+        def enqueue(urls: Iterable[str]) -> None:
+            for url in urls:
+                url = urldefrag(url)[0]
+                if url not in seen:
+                    seen.add(url)
+                    order.append(url)
+                    queue.append(url)
+
+        def visit(url: str) -> Tuple[List[Any], List[str], int, str, bool]:
+            response, sha256, outcome = self._fetch(url)
+            reuse = self.cache is not None and parser is not None and sha256 is not None
+            previous = self.cache.parsed(parser, url, sha256) if reuse else None
+            if previous is not None:
+                return previous[0], previous[1], len(response.content), outcome, False
+            if self.parse_pool:
+                items, links = self.parse_pool.submit(handler, url, response).result()
+            else:
+                items, links = handler(url, response)
+            items, links = list(items), list(links)
+            if reuse:
+                self.cache.store_parsed(parser, url, sha256, items, links)
+            return items, links, len(response.content), outcome, True
+
+        enqueue(seeds)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while queue or running:
+                while queue and len(running) < self.workers:
+                    url = queue.popleft()
+                    running[pool.submit(visit, url)] = url
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = running.pop(future)
+                    try:
+                        items, links, size, outcome, parsed = future.result()
+                    except Exception as e:
+                        result.errors[url] = str(e)
+                        print(f"  ✗ Error fetching {url}: {e}")
+                        continue
+                    result.pages += 1
+                    result.bytes += size
+                    result.not_modified += outcome == NOT_MODIFIED
+                    result.replayed += outcome == REPLAYED
+                    result.parsed += parsed
+                    found[url] = items
+                    enqueue(links)
+                emit()
+
+        for url in order:
+            result.items.extend(found.get(url, []))
+        result.retries = self._retries - retries_before
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def close(self) -> None:
+        self.client.close()
+        if self.parse_pool:
+            self.parse_pool.shutdown()
+
+    def __enter__(self) -> "Crawler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
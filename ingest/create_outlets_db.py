@@ -1,47 +1,77 @@
 import sqlite3
 import pandas as pd
+import sys
 import os
 
-def create_outlets_db():
-    # Create sample outlet data for testing
-    outlets_data = [
-        {
-            "name": "ZUS Coffee - SS 2",
-            "address": "No. 1, Jalan SS 2/72, SS 2, 47300 Petaling Jaya, Selangor",
-            "opening_hours": "8:00 AM - 10:00 PM",
-            "services": "Dine-in, Takeaway, Delivery"
-        },
-        {
-            "name": "ZUS Coffee - Bangsar",
-            "address": "No. 2, Jalan Telawi 3, Bangsar, 59100 Kuala Lumpur",
-            "opening_hours": "7:00 AM - 11:00 PM",
-            "services": "Dine-in, Takeaway, Delivery"
-        },
-        {
-            "name": "ZUS Coffee - Subang",
-            "address": "Lot G-13, Subang Parade, Jalan SS16/1, 47500 Subang Jaya, Selangor",
-            "opening_hours": "9:00 AM - 9:00 PM",
-            "services": "Dine-in, Takeaway"
-        },
-        {
-            "name": "ZUS Coffee - KLCC",
-            "address": "L2-15, Suria KLCC, Jalan Ampang, 50088 Kuala Lumpur",
-            "opening_hours": "10:00 AM - 10:00 PM",
-            "services": "Dine-in, Takeaway, Delivery"
-        },
-        {
-            "name": "ZUS Coffee - Damansara",
-            "address": "G-03, Damansara Uptown, Jalan SS21/1, 47400 Petaling Jaya, Selangor",
-            "opening_hours": "8:00 AM - 10:00 PM",
-            "services": "Dine-in, Takeaway, Delivery"
-        }
-    ]
+from chatbot.outlet_db import OUTLET_DATA_PATH, OUTLET_DB_PATH, create_fts_index
+from chatbot.outlet_schema import create_structured_index
+from chatbot.geo import create_geo_index, load_postcodes
 
-    df = pd.DataFrame(outlets_data)
-    conn = sqlite3.connect("data/outlets.db")
+# Seed rows when data/outlets.csv has not been scraped yet
+SAMPLE_OUTLETS = [
+    {
+        "name": "ZUS Coffee - SS 2",
+        "address": "No. 1, Jalan SS 2/72, SS 2, 47300 Petaling Jaya, Selangor",
+        "opening_hours": "8:00 AM - 10:00 PM",
+        "services": "Dine-in, Takeaway, Delivery"
+    },
+    {
+        "name": "ZUS Coffee - Bangsar",
+        "address": "No. 2, Jalan Telawi 3, Bangsar, 59100 Kuala Lumpur",
+        "opening_hours": "7:00 AM - 11:00 PM",
+        "services": "Dine-in, Takeaway, Delivery"
+    },
+    {
+        "name": "ZUS Coffee - Subang",
+        "address": "Lot G-13, Subang Parade, Jalan SS16/1, 47500 Subang Jaya, Selangor",
+        "opening_hours": "9:00 AM - 9:00 PM",
+        "services": "Dine-in, Takeaway"
+    },
+    {
+        "name": "ZUS Coffee - KLCC",
+        "address": "L2-15, Suria KLCC, Jalan Ampang, 50088 Kuala Lumpur",
+        "opening_hours": "10:00 AM - 10:00 PM",
+        "services": "Dine-in, Takeaway, Delivery"
+    },
+    {
+        "name": "ZUS Coffee - Damansara",
+        "address": "G-03, Damansara Uptown, Jalan SS21/1, 47400 Petaling Jaya, Selangor",
+        "opening_hours": "8:00 AM - 10:00 PM",
+        "services": "Dine-in, Takeaway, Delivery"
+    }
+]
+
+def load_outlets(csv_path: str = OUTLET_DATA_PATH) -> pd.DataFrame:
+    """Outlet rows from the scraped CSV, or the sample outlets if it does not exist"""
+    if not os.path.exists(csv_path):
+        print(f"{csv_path} not found; seeding sample outlets (run: python -m ingest.scrape_outlets)")
+        return pd.DataFrame(SAMPLE_OUTLETS)
+    return pd.read_csv(csv_path, dtype=str).fillna("")
+
+def create_outlets_db(db_path: str = OUTLET_DB_PATH, csv_path: str = OUTLET_DATA_PATH):
+    df = load_outlets(csv_path)
+    conn = sqlite3.connect(db_path)
+    # Replacing the table drops its triggers, so the FTS index goes too and is rebuilt below
+    conn.execute("DROP TABLE IF EXISTS outlets_fts")
     df.to_sql("outlets", conn, if_exists="replace", index=False)
+    create_fts_index(conn)
+    create_structured_index(conn)
+    located, _ = create_geo_index(conn, load_postcodes())
+    conn.close()
+    print(f"SQLite database created at {db_path} with {len(df)} outlets "
+          f"(full-text, hours and services indexed, {located} located)")
+
+def index_outlets_db(db_path: str = OUTLET_DB_PATH):
+    """Add (or refresh) the search indexes on an existing outlets database without replacing its rows"""
+    conn = sqlite3.connect(db_path)
+    create_fts_index(conn)
+    count = create_structured_index(conn)
+    located, _ = create_geo_index(conn, load_postcodes())
     conn.close()
-    print(f"SQLite database created at data/outlets.db with {len(outlets_data)} outlets")
+    print(f"Indexed {count} outlets in {db_path} ({located} located by postcode)")
 
 if __name__ == "__main__":
-    create_outlets_db()
\ No newline at end of file
+    if "--index" in sys.argv:
+        index_outlets_db()
+    else:
+        create_outlets_db()
\ No newline at end of file
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import sqlite3
+import threading
+import json
+import time
+import os
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "cache/http")
+
+
+class CacheMiss(Exception):
+    """A replayed crawl asked for a URL that was never fetched"""
+
+
+class CachedResponse:
+    def __init__(self, url: str, sha256: str, etag: Optional[str], last_modified: Optional[str],
+                 content_type: Optional[str], fetched_at: float):
+        self.url = url
+        self.sha256 = sha256
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.fetched_at = fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk cache of crawled responses. Bodies are stored once per SHA-256 under objects/, an
+    SQLite index maps each URL to its latest body and validators, and the parse of a body is kept
+    per (parser, URL, body hash) so unchanged pages are never parsed twice.
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT, last_modified TEXT,
+                content_type TEXT, fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS parsed (
+                parser TEXT NOT NULL, url TEXT NOT NULL, sha256 TEXT NOT NULL, result TEXT NOT NULL,
+                PRIMARY KEY (parser, url, sha256)
+            );
+        """)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, sha256, etag, last_modified, content_type, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def body(self, sha256: str) -> bytes:
+        with open(self._object_path(sha256), "rb") as f:
+            return f.read()
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+              content_type: Optional[str] = None) -> str:
+        """Save a fetched body (once per distinct content) and point the URL at it; returns its hash"""
+        sha256 = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (url, sha256, etag, last_modified, content_type, time.time()),
+            )
+            self._db.commit()
+        return sha256
+
+    def touch(self, url: str) -> None:
+        """Record a 304 revalidation"""
+        with self._lock:
+            self._db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def parsed(self, parser: str, url: str, sha256: str) -> Optional[Tuple[list, list]]:
+        """(items, links) the parser produced for this URL's body, if it has seen this body before"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM parsed WHERE parser = ? AND url = ? AND sha256 = ?", (parser, url, sha256)
+            ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        return result["items"], result["links"]
+
+    def store_parsed(self, parser: str, url: str, sha256: str, items: list, links: list) -> None:
+        result = json.dumps({"items": items, "links": links}, ensure_ascii=False)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?)", (parser, url, sha256, result))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            urls = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT sha256) FROM responses").fetchone()
+            parsed = self._db.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+        return {"urls": urls[0], "bodies": urls[1], "parsed": parsed}
+
+    def close(self) -> None:
+        self._db.close()
@@ -1,150 +1,180 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
+import sys
 import re
-import time
+import os
 
-def scrape_zus_outlets():
-    """
-    Scrapes ZUS Coffee outlet information from their website.
-    Creates sample data based on known ZUS Coffee locations in KL/Selangor.
-    """
-    url = "https://zuscoffee.com/category/store/kuala-lumpur-selangor/"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+from chatbot.outlet_db import OUTLET_DATA_PATH
+from ingest.crawler import CRAWL_PARSE_WORKERS, HTML_PARSER, Crawler, next_page_links
+from ingest.http_cache import ResponseCache
+
+OUTLETS_URL = "https://zuscoffee.com/category/store/kuala-lumpur-selangor/"
+OUTPUT_PATH = OUTLET_DATA_PATH
+# Cached parses are keyed by this; bump it whenever parse_outlet_page output changes
+PARSER = "scrape_outlets.v2"
+
+# Only store cards and WordPress pagination links (a.next) become tree nodes
+STORE_CARDS = SoupStrainer(class_=re.compile(r'store|outlet|location|next', re.I))
+
+SAMPLE_OUTLETS = [
+    {
+        'name': 'ZUS Coffee - SS 2',
+        'address': 'No. 75, Jalan SS 2/67, SS 2, 47300 Petaling Jaya, Selangor',
+        'opening_hours': '8:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
+    },
+    {
+        'name': 'ZUS Coffee - Bangsar',
+        'address': 'No. 11, Jalan Telawi 3, Bangsar Baru, 59100 Kuala Lumpur',
+        'opening_hours': '7:00 AM - 11:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Subang Jaya',
+        'address': 'G-01, Jalan SS 15/4d, SS 15, 47500 Subang Jaya, Selangor',
+        'opening_hours': '7:30 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Damansara Jaya',
+        'address': 'C01A, Concourse Floor, Atria Shopping Gallery, Jalan SS 22/23, 47400 Petaling Jaya, Selangor',
+        'opening_hours': '8:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Binjai 8',
+        'address': 'G04, Binjai 8 Premium SOHO, No. 2, Lorong Binjai, 50450 Kuala Lumpur',
+        'opening_hours': '7:00 AM - 9:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - KLCC',
+        'address': 'Lot 241, Level 2, Suria KLCC, Kuala Lumpur City Centre, 50088 Kuala Lumpur',
+        'opening_hours': '9:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway'
+    },
+    {
+        'name': 'ZUS Coffee - Wangsa Maju',
+        'address': 'Lot F1.11, First Floor, AEON BiG Wangsa Maju, Jalan 8/27A, 53300 Kuala Lumpur',
+        'opening_hours': '9:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Ampang',
+        'address': 'Lot CW-5, Ground Floor, Spectrum Shopping Mall, Jalan Wawasan Ampang, 68000 Ampang, Selangor',
+        'opening_hours': '9:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Desa Pandan',
+        'address': 'No. 35, Ground Floor, Jalan 3/76D, Desa Pandan, 55100 Kuala Lumpur',
+        'opening_hours': '7:30 AM - 9:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Shah Alam',
+        'address': 'No. 5, Ground Floor, Jalan Eserina AA U16/AA, City of Elmina, 40150 Shah Alam, Selangor',
+        'opening_hours': '8:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
+    },
+    {
+        'name': 'ZUS Coffee - Sentul',
+        'address': 'G-11, Ground Floor, Laman Seri Harmoni, Jalan Batu Muda Tambahan 3, 51100 Sentul, Kuala Lumpur',
+        'opening_hours': '7:00 AM - 9:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Bandar Damai Perdana',
+        'address': 'No. 19G, Ground Floor, Jalan Damai Perdana 1/9b, 56000 Kuala Lumpur',
+        'opening_hours': '7:30 AM - 9:30 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Puchong',
+        'address': 'No. 2, Jalan Puteri 1/4, Bandar Puteri, 47100 Puchong, Selangor',
+        'opening_hours': '8:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
+    },
+    {
+        'name': 'ZUS Coffee - Mont Kiara',
+        'address': '163 Retail Park, No. 2, Jalan Kiara 5, Mont Kiara, 50480 Kuala Lumpur',
+        'opening_hours': '7:00 AM - 10:00 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
+    },
+    {
+        'name': 'ZUS Coffee - Sri Petaling',
+        'address': 'No. 88, Jalan Radin Anum 1, Bandar Baru Sri Petaling, 57000 Kuala Lumpur',
+        'opening_hours': '7:30 AM - 9:30 PM',
+        'services': 'Dine-in, Takeaway, Delivery'
     }
-    
+]
+
+
+def parse_outlet_page(page_url: str, html: bytes) -> tuple:
+    """(outlets, next page URLs) on one store listing page"""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=STORE_CARDS)
     outlets = []
-    
+    store_items = soup.find_all(['div', 'article'], class_=re.compile(r'store|outlet|location', re.I))
+    for item in store_items:
+        try:
+            name_elem = item.find(['h2', 'h3', 'h4'], class_=re.compile(r'title|name|store', re.I))
+            if not name_elem:
+                name_elem = item.find(['h2', 'h3', 'h4'])
+            addr_elem = item.find(['p', 'div', 'span'], class_=re.compile(r'address|location', re.I))
+            hours_elem = item.find(['p', 'div', 'span'], class_=re.compile(r'hours|time|operating', re.I))
+            
+            if name_elem and addr_elem:
+                outlets.append({
+                    'name': name_elem.get_text(strip=True),
+                    'address': addr_elem.get_text(strip=True),
+                    'opening_hours': hours_elem.get_text(strip=True) if hours_elem else '8:00 AM - 10:00 PM',
+                    'services': 'Dine-in, Takeaway, Delivery'
+                })
+        except Exception as e:
+            continue
+    return outlets, next_page_links(soup, page_url)
+
+
+def handle_page(url, response):
+    outlets, next_pages = parse_outlet_page(url, response.content)
+    print(f"  ✓ {len(outlets)} outlets on {url}")
+    return outlets, next_pages
+
+
+def scrape_zus_outlets(url: str = OUTLETS_URL, output_path: str = OUTPUT_PATH, crawler: Crawler = None,
+                       replay: bool = False):
+    """
+    Scrapes ZUS Coffee outlet information from their website, following every listing page.
+    Pages are parsed in a process pool; responses go through the HTTP cache and replay=True
+    rebuilds the output from it with no network.
+    Falls back to sample data based on known ZUS Coffee locations in KL/Selangor.
+    """
+    owns_crawler = crawler is None
+    crawler = crawler or Crawler(cache=ResponseCache(), replay=replay, parse_workers=CRAWL_PARSE_WORKERS)
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        store_items = soup.find_all(['div', 'article'], class_=re.compile(r'store|outlet|location', re.I))
-        for item in store_items[:20]:
-            try:
-                name_elem = item.find(['h2', 'h3', 'h4'], class_=re.compile(r'title|name|store', re.I))
-                if not name_elem:
-                    name_elem = item.find(['h2', 'h3', 'h4'])
-                addr_elem = item.find(['p', 'div', 'span'], class_=re.compile(r'address|location', re.I))
-                hours_elem = item.find(['p', 'div', 'span'], class_=re.compile(r'hours|time|operating', re.I))
-                
-                if name_elem and addr_elem:
-                    outlets.append({
-                        'name': name_elem.get_text(strip=True),
-                        'address': addr_elem.get_text(strip=True),
-                        'opening_hours': hours_elem.get_text(strip=True) if hours_elem else '8:00 AM - 10:00 PM',
-                        'services': 'Dine-in, Takeaway, Delivery'
-                    })
-            except Exception as e:
-                continue
-        
-        print(f"Web scraping found {len(outlets)} outlets")
-        
-    except Exception as e:
-        print(f"Error during web scraping: {e}")
+        result = crawler.crawl([url], handle_page, parser=PARSER)
+    finally:
+        if owns_crawler:
+            crawler.close()
+            crawler.cache.close()
+    stats = result.stats()
+    # Outlets listed on more than one page (e.g. featured stores) are kept once
+    outlets = list({(o['name'], o['address']): o for o in result.items}.values())
+    print(f"Web scraping found {len(outlets)} outlets on {stats['pages']} pages in {stats['seconds']}s "
+          f"({stats['pages_per_second']} pages/s, {stats['not_modified']} not modified, {stats['replayed']} replayed, "
+          f"{stats['parsed']} parsed, {stats['errors']} errors)")
+    
     if len(outlets) < 10:
-        print("Using sample data from known ZUS Coffee locations...")
-        outlets = [
-            {
-                'name': 'ZUS Coffee - SS 2',
-                'address': 'No. 75, Jalan SS 2/67, SS 2, 47300 Petaling Jaya, Selangor',
-                'opening_hours': '8:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
-            },
-            {
-                'name': 'ZUS Coffee - Bangsar',
-                'address': 'No. 11, Jalan Telawi 3, Bangsar Baru, 59100 Kuala Lumpur',
-                'opening_hours': '7:00 AM - 11:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Subang Jaya',
-                'address': 'G-01, Jalan SS 15/4d, SS 15, 47500 Subang Jaya, Selangor',
-                'opening_hours': '7:30 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Damansara Jaya',
-                'address': 'C01A, Concourse Floor, Atria Shopping Gallery, Jalan SS 22/23, 47400 Petaling Jaya, Selangor',
-                'opening_hours': '8:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Binjai 8',
-                'address': 'G04, Binjai 8 Premium SOHO, No. 2, Lorong Binjai, 50450 Kuala Lumpur',
-                'opening_hours': '7:00 AM - 9:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - KLCC',
-                'address': 'Lot 241, Level 2, Suria KLCC, Kuala Lumpur City Centre, 50088 Kuala Lumpur',
-                'opening_hours': '9:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway'
-            },
-            {
-                'name': 'ZUS Coffee - Wangsa Maju',
-                'address': 'Lot F1.11, First Floor, AEON BiG Wangsa Maju, Jalan 8/27A, 53300 Kuala Lumpur',
-                'opening_hours': '9:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Ampang',
-                'address': 'Lot CW-5, Ground Floor, Spectrum Shopping Mall, Jalan Wawasan Ampang, 68000 Ampang, Selangor',
-                'opening_hours': '9:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Desa Pandan',
-                'address': 'No. 35, Ground Floor, Jalan 3/76D, Desa Pandan, 55100 Kuala Lumpur',
-                'opening_hours': '7:30 AM - 9:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Shah Alam',
-                'address': 'No. 5, Ground Floor, Jalan Eserina AA U16/AA, City of Elmina, 40150 Shah Alam, Selangor',
-                'opening_hours': '8:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
-            },
-            {
-                'name': 'ZUS Coffee - Sentul',
-                'address': 'G-11, Ground Floor, Laman Seri Harmoni, Jalan Batu Muda Tambahan 3, 51100 Sentul, Kuala Lumpur',
-                'opening_hours': '7:00 AM - 9:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Bandar Damai Perdana',
-                'address': 'No. 19G, Ground Floor, Jalan Damai Perdana 1/9b, 56000 Kuala Lumpur',
-                'opening_hours': '7:30 AM - 9:30 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Puchong',
-                'address': 'No. 2, Jalan Puteri 1/4, Bandar Puteri, 47100 Puchong, Selangor',
-                'opening_hours': '8:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery, Drive-thru'
-            },
-            {
-                'name': 'ZUS Coffee - Mont Kiara',
-                'address': '163 Retail Park, No. 2, Jalan Kiara 5, Mont Kiara, 50480 Kuala Lumpur',
-                'opening_hours': '7:00 AM - 10:00 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            },
-            {
-                'name': 'ZUS Coffee - Sri Petaling',
-                'address': 'No. 88, Jalan Radin Anum 1, Bandar Baru Sri Petaling, 57000 Kuala Lumpur',
-                'opening_hours': '7:30 AM - 9:30 PM',
-                'services': 'Dine-in, Takeaway, Delivery'
-            }
-        ]
+        print(f"✗ Only {len(outlets)} outlets scraped. Using sample data from known ZUS Coffee locations...")
+        if not replay:
+            print("  Re-run with --replay to rebuild from the last cached crawl instead")
+        outlets = SAMPLE_OUTLETS
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
     df = pd.DataFrame(outlets)
-    df.to_csv("data/outlets.csv", index=False)
-    print(f"\n✓ Successfully saved {len(outlets)} outlets to data/outlets.csv")
+    df.to_csv(output_path, index=False)
+    print(f"\n✓ Successfully saved {len(outlets)} outlets to {output_path}")
     
     return outlets
 
 if __name__ == "__main__":
-    import os
-    os.makedirs("data", exist_ok=True)
-    scrape_zus_outlets()
\ No newline at end of file
+    scrape_zus_outlets(replay="--replay" in sys.argv)
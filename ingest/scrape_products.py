@@ -1,153 +1,244 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
 import json
+import sys
 import os
-import time
 
-def scrape_zus_drinkware():
+from ingest.crawler import CRAWL_PARSE_WORKERS, HTML_PARSER, Crawler, next_page_links
+from ingest.http_cache import ResponseCache
+
+SHOP_URL = "https://shop.zuscoffee.com"
+COLLECTION = "tumbler"
+OUTPUT_PATH = "data/drinkware.jsonl"
+# Shopify's largest page size for the products.json feed
+FEED_LIMIT = 250
+# Cached parses are keyed by this; bump it whenever parse_collection/parse_product/parse_feed output changes
+PARSER = "scrape_products.v3"
+
+# Only these parts of a page become tree nodes; the rest (head, scripts, menus, footer) is skipped
+LINKS = SoupStrainer(['a', 'link'])
+PRODUCT_FIELDS = SoupStrainer(class_=['product-meta__title', 'price', 'product-meta__description', 'rte'])
+
+SAMPLE_PRODUCTS = [
+    {
+        "title": "OG CUP 2.0 With Screw-On Lid 500ml (17oz)",
+        "price": "RM 49.90",
+        "description": "The iconic OG Cup is back with an upgrade! Features a screw-on lid for secure transport and double-wall insulation to keep your drinks hot or cold.",
+        "url": "https://shop.zuscoffee.com/products/zus-og-cup-2-0-with-screw-on-lid"
+    },
+    {
+        "title": "All-Can Tumbler 600ml (20oz)",
+        "price": "RM 59.90",
+        "description": "Versatile tumbler that fits standard drink cans. Double-wall vacuum insulated stainless steel construction keeps beverages at optimal temperature.",
+        "url": "https://shop.zuscoffee.com/products/zus-all-can-tumbler-600ml-20oz"
+    },
+    {
+        "title": "All Day Cup 500ml (17oz) - Sundaze Collection",
+        "price": "RM 54.90",
+        "description": "Limited edition Sundaze Collection. Perfect for daily use with ergonomic design and spill-proof lid. Keeps drinks hot for 6 hours, cold for 12 hours.",
+        "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-sundaze-collection"
+    },
+    {
+        "title": "All Day Cup 500ml (17oz)",
+        "price": "RM 49.90",
+        "description": "Your everyday companion. Sleek design with premium insulation technology. BPA-free and dishwasher safe.",
+        "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz"
+    },
+    {
+        "title": "Frozee Cold Cup 650ml (22oz)",
+        "price": "RM 44.90",
+        "description": "Perfect for iced beverages. Large capacity with transparent design. Comes with reusable straw. Keeps drinks cold for up to 8 hours.",
+        "url": "https://shop.zuscoffee.com/products/zus-frozee-cold-cup-650ml-22oz"
+    },
+    {
+        "title": "OG Ceramic Mug (16oz)",
+        "price": "RM 39.90",
+        "description": "Classic ceramic mug with ZUS branding. Microwave and dishwasher safe. Perfect for your morning coffee ritual.",
+        "url": "https://shop.zuscoffee.com/products/zus-og-ceramic-mug-16oz"
+    },
+    {
+        "title": "ZUS Stainless Steel Mug (14oz)",
+        "price": "RM 44.90",
+        "description": "Durable stainless steel construction. Double-wall insulation. Comfortable handle for easy carrying. Keeps drinks hot or cold.",
+        "url": "https://shop.zuscoffee.com/products/zus-stainless-steel-mug-14oz"
+    },
+    {
+        "title": "All Day Cup 500ml - Mountain Collection",
+        "price": "RM 54.90",
+        "description": "Limited edition Mountain Collection inspired by Malaysian highlands. Premium insulation with artistic design.",
+        "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-mountain-collection"
+    },
+    {
+        "title": "All Day Cup 500ml - Aqua Collection",
+        "price": "RM 54.90",
+        "description": "Refreshing Aqua Collection design. Ocean-inspired colors with superior insulation technology.",
+        "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-aqua-collection"
+    },
+    {
+        "title": "Reusable Straw Kit",
+        "price": "RM 12.90",
+        "description": "Eco-friendly stainless steel straws with cleaning brush. Perfect companion for your ZUS tumblers. Includes carrying pouch.",
+        "url": "https://shop.zuscoffee.com/products/zus-reusable-straw-kit-1s"
+    },
+    {
+        "title": "ZUS in Boot Storage",
+        "price": "RM 29.90",
+        "description": "Convenient car cup holder organizer. Prevents spills during travel. Fits most standard cup sizes.",
+        "url": "https://shop.zuscoffee.com/products/zus-in-boot"
+    },
+    {
+        "title": "Corak Malaysia Cup Sleeve",
+        "price": "RM 9.90",
+        "description": "Beautiful Malaysian batik-inspired design. Heat-resistant neoprene material. Fits most standard cups.",
+        "url": "https://shop.zuscoffee.com/products/zus-corak-malaysia-cup-sleeve"
+    }
+]
+
+
+def parse_collection(page_url: str, html: bytes) -> tuple:
+    """(product URLs, next page URLs) on a collection page; product links are made canonical"""
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=LINKS)
+    products = []
+    for link in soup.find_all('a', href=True):
+        path = urlsplit(urljoin(page_url, link['href'])).path
+        if '/products/' in path:
+            url = urljoin(page_url, '/products/' + path.split('/products/', 1)[1])
+            if url not in products:
+                products.append(url)
+    return products, next_page_links(soup, page_url)
+
+
+def parse_product(url: str, html: bytes) -> dict:
+    """Product fields from the theme's classes; the whole page is parsed only when one is missing"""
+    prod_soup = BeautifulSoup(html, HTML_PARSER, parse_only=PRODUCT_FIELDS)
+    title_elem = prod_soup.find('h1', class_='product-meta__title')
+    price_elem = prod_soup.find('span', class_='price')
+    desc_elem = prod_soup.find('div', class_='product-meta__description')
+    if not desc_elem:
+        desc_elem = prod_soup.find('div', class_='rte')
+    if not (title_elem and price_elem and desc_elem):
+        full_soup = BeautifulSoup(html, HTML_PARSER)
+        if not title_elem:
+            title_elem = full_soup.find('h1')
+        if not price_elem:
+            price_elem = full_soup.find('span', string=lambda x: x and 'RM' in x)
+    title = title_elem.get_text(strip=True) if title_elem else "Unknown Product"
+    price = price_elem.get_text(strip=True) if price_elem else "N/A"
+    description = desc_elem.get_text(strip=True)[:500] if desc_elem else "Quality ZUS Coffee drinkware"
+    return {
+        "title": title,
+        "price": price,
+        "description": description,
+        "url": url
+    }
+
+
+def handle_page(url, response):
+    """Crawler handler: product pages yield a product, collection pages yield links"""
+    if urlsplit(url).path.startswith('/products/'):
+        product = parse_product(url, response.content)
+        print(f"  ✓ Scraped: {product['title']}")
+        return [product], []
+    products, next_pages = parse_collection(url, response.content)
+    print(f"Found {len(products)} products on {url}")
+    return [], products + next_pages
+
+
+def feed_urls(shop_url: str, collection: str, limit: int = FEED_LIMIT) -> list:
+    """First pages of the Shopify products.json feeds to try: the collection's, then the whole shop's"""
+    query = urlencode({"limit": limit, "page": 1})
+    return [f"{shop_url}/collections/{collection}/products.json?{query}", f"{shop_url}/products.json?{query}"]
+
+
+def parse_feed(page_url: str, data: bytes) -> tuple:
+    """(products, next page URL if this page was full) from one page of a products.json feed"""
+    feed = json.loads(data)["products"]
+    products = []
+    for item in feed:
+        prices = sorted({float(v["price"]) for v in item.get("variants", []) if v.get("price")})
+        if not prices:
+            price = "N/A"
+        elif len(prices) == 1:
+            price = f"RM {prices[0]:.2f}"
+        else:
+            price = f"RM {prices[0]:.2f} - RM {prices[-1]:.2f}"
+        body = BeautifulSoup(item.get("body_html") or "", HTML_PARSER).get_text(" ", strip=True)
+        products.append({
+            "title": item["title"],
+            "price": price,
+            "description": body[:500] or "Quality ZUS Coffee drinkware",
+            "url": urljoin(page_url, f"/products/{item['handle']}"),
+            "variants": [v["title"] for v in item.get("variants", []) if v.get("title") != "Default Title"],
+        })
+    parts = urlsplit(page_url)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    if len(feed) < int(query.get("limit", FEED_LIMIT)):
+        return products, []
+    query["page"] = int(query.get("page", 1)) + 1
+    return products, [parts._replace(query=urlencode(query)).geturl()]
+
+
+def handle_feed(url, response):
+    """Crawler handler for products.json pages: each page yields its products and the next page"""
+    products, next_pages = parse_feed(url, response.content)
+    print(f"  ✓ {len(products)} products from {url}")
+    return products, next_pages
+
+
+def _crawl(crawler: Crawler, seeds: list, handler, write) -> list:
+    result = crawler.crawl(seeds, handler, parser=PARSER, on_items=write)
+    stats = result.stats()
+    print(f"Crawled {stats['pages']} pages in {stats['seconds']}s ({stats['pages_per_second']} pages/s, "
+          f"{stats['not_modified']} not modified, {stats['replayed']} replayed, {stats['parsed']} parsed, "
+          f"{stats['retries']} retries, {stats['errors']} errors)")
+    return result.items
+
+
+def scrape_zus_drinkware(shop_url: str = SHOP_URL, collection: str = COLLECTION, output_path: str = OUTPUT_PATH,
+                         crawler: Crawler = None, replay: bool = False):
     """
     Scrapes ZUS Coffee drinkware products from their online shop.
-    Based on actual HTML structure from shop.zuscoffee.com
+    shop.zuscoffee.com is a Shopify store, so the paged products.json feed (collection first, then
+    the whole shop) gives every product with its variants in a few requests. Only if neither feed
+    answers are the HTML collection and product pages crawled, concurrently within the crawler's
+    per-host rate limit, with pages parsed in a process pool. Responses go through the HTTP cache, so unchanged pages are revalidated
+    with a 304 and not parsed again; replay=True rebuilds the output from the cache alone.
+    Each page's products are written as the crawl reaches it, to a temporary file that replaces
+    output_path once the scrape is done.
     """
-    url = "https://shop.zuscoffee.com/collections/tumbler"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        products = []
-        product_links = soup.find_all('a', href=True)
-        product_urls = [link['href'] for link in product_links if '/products/' in link['href']]
-        unique_products = list(set(product_urls))
-        
-        print(f"Found {len(unique_products)} unique products. Scraping details...")
-        
-        for product_path in unique_products[:15]:
-            full_url = f"https://shop.zuscoffee.com{product_path}" if product_path.startswith('/') else product_path
-            
-            try:
-                time.sleep(1)  
-                prod_response = requests.get(full_url, headers=headers, timeout=10)
-                prod_soup = BeautifulSoup(prod_response.content, 'html.parser')
-                title_elem = prod_soup.find('h1', class_='product-meta__title')
-                if not title_elem:
-                    title_elem = prod_soup.find('h1')
-                title = title_elem.get_text(strip=True) if title_elem else "Unknown Product"
-                price_elem = prod_soup.find('span', class_='price')
-                if not price_elem:
-                    price_elem = prod_soup.find('span', string=lambda x: x and 'RM' in x)
-                price = price_elem.get_text(strip=True) if price_elem else "N/A"
-                desc_elem = prod_soup.find('div', class_='product-meta__description')
-                if not desc_elem:
-                    desc_elem = prod_soup.find('div', class_='rte')
-                description = desc_elem.get_text(strip=True)[:500] if desc_elem else "Quality ZUS Coffee drinkware"
-                
-                products.append({
-                    "title": title,
-                    "price": price,
-                    "description": description,
-                    "url": full_url
-                })
-                
-                print(f"  ✓ Scraped: {title}")
-                
-            except Exception as e:
-                print(f"  ✗ Error scraping {full_url}: {e}")
-                continue
-        if len(products) == 0:
-            print("Web scraping failed. Creating sample data from known products...")
-            products = [
-                {
-                    "title": "OG CUP 2.0 With Screw-On Lid 500ml (17oz)",
-                    "price": "RM 49.90",
-                    "description": "The iconic OG Cup is back with an upgrade! Features a screw-on lid for secure transport and double-wall insulation to keep your drinks hot or cold.",
-                    "url": "https://shop.zuscoffee.com/products/zus-og-cup-2-0-with-screw-on-lid"
-                },
-                {
-                    "title": "All-Can Tumbler 600ml (20oz)",
-                    "price": "RM 59.90",
-                    "description": "Versatile tumbler that fits standard drink cans. Double-wall vacuum insulated stainless steel construction keeps beverages at optimal temperature.",
-                    "url": "https://shop.zuscoffee.com/products/zus-all-can-tumbler-600ml-20oz"
-                },
-                {
-                    "title": "All Day Cup 500ml (17oz) - Sundaze Collection",
-                    "price": "RM 54.90",
-                    "description": "Limited edition Sundaze Collection. Perfect for daily use with ergonomic design and spill-proof lid. Keeps drinks hot for 6 hours, cold for 12 hours.",
-                    "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-sundaze-collection"
-                },
-                {
-                    "title": "All Day Cup 500ml (17oz)",
-                    "price": "RM 49.90",
-                    "description": "Your everyday companion. Sleek design with premium insulation technology. BPA-free and dishwasher safe.",
-                    "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz"
-                },
-                {
-                    "title": "Frozee Cold Cup 650ml (22oz)",
-                    "price": "RM 44.90",
-                    "description": "Perfect for iced beverages. Large capacity with transparent design. Comes with reusable straw. Keeps drinks cold for up to 8 hours.",
-                    "url": "https://shop.zuscoffee.com/products/zus-frozee-cold-cup-650ml-22oz"
-                },
-                {
-                    "title": "OG Ceramic Mug (16oz)",
-                    "price": "RM 39.90",
-                    "description": "Classic ceramic mug with ZUS branding. Microwave and dishwasher safe. Perfect for your morning coffee ritual.",
-                    "url": "https://shop.zuscoffee.com/products/zus-og-ceramic-mug-16oz"
-                },
-                {
-                    "title": "ZUS Stainless Steel Mug (14oz)",
-                    "price": "RM 44.90",
-                    "description": "Durable stainless steel construction. Double-wall insulation. Comfortable handle for easy carrying. Keeps drinks hot or cold.",
-                    "url": "https://shop.zuscoffee.com/products/zus-stainless-steel-mug-14oz"
-                },
-                {
-                    "title": "All Day Cup 500ml - Mountain Collection",
-                    "price": "RM 54.90",
-                    "description": "Limited edition Mountain Collection inspired by Malaysian highlands. Premium insulation with artistic design.",
-                    "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-mountain-collection"
-                },
-                {
-                    "title": "All Day Cup 500ml - Aqua Collection",
-                    "price": "RM 54.90",
-                    "description": "Refreshing Aqua Collection design. Ocean-inspired colors with superior insulation technology.",
-                    "url": "https://shop.zuscoffee.com/products/zus-all-day-cup-500ml-17oz-aqua-collection"
-                },
-                {
-                    "title": "Reusable Straw Kit",
-                    "price": "RM 12.90",
-                    "description": "Eco-friendly stainless steel straws with cleaning brush. Perfect companion for your ZUS tumblers. Includes carrying pouch.",
-                    "url": "https://shop.zuscoffee.com/products/zus-reusable-straw-kit-1s"
-                },
-                {
-                    "title": "ZUS in Boot Storage",
-                    "price": "RM 29.90",
-                    "description": "Convenient car cup holder organizer. Prevents spills during travel. Fits most standard cup sizes.",
-                    "url": "https://shop.zuscoffee.com/products/zus-in-boot"
-                },
-                {
-                    "title": "Corak Malaysia Cup Sleeve",
-                    "price": "RM 9.90",
-                    "description": "Beautiful Malaysian batik-inspired design. Heat-resistant neoprene material. Fits most standard cups.",
-                    "url": "https://shop.zuscoffee.com/products/zus-corak-malaysia-cup-sleeve"
-                }
-            ]
-        
-        os.makedirs("data", exist_ok=True)
-        with open("data/drinkware.jsonl", "w", encoding='utf-8') as f:
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    partial = f"{output_path}.tmp"
+    owns_crawler = crawler is None
+    crawler = crawler or Crawler(cache=ResponseCache(), replay=replay, parse_workers=CRAWL_PARSE_WORKERS)
+    with open(partial, "w", encoding='utf-8') as f:
+        def write(products):
             for p in products:
                 f.write(json.dumps(p, ensure_ascii=False) + "\n")
-        
-        print(f"\n✓ Successfully saved {len(products)} products to data/drinkware.jsonl")
-        return products
-        
-    except Exception as e:
-        print(f"Error during scraping: {e}")
-        print("Creating fallback sample data...")
-        return []
+
+        try:
+            products = []
+            for url in feed_urls(shop_url, collection):
+                products = _crawl(crawler, [url], handle_feed, write)
+                if products:
+                    break
+            if not products:
+                print("Product feed unavailable. Scraping the HTML collection pages...")
+                products = _crawl(crawler, [f"{shop_url}/collections/{collection}"], handle_page, write)
+        finally:
+            if owns_crawler:
+                crawler.close()
+                crawler.cache.close()
+
+        if len(products) == 0:
+            print("✗ Web scraping failed. Creating sample data from known products...")
+            if not replay:
+                print("  Re-run with --replay to rebuild from the last cached crawl instead")
+            products = SAMPLE_PRODUCTS
+            write(products)
+    os.replace(partial, output_path)
+
+    print(f"\n✓ Successfully saved {len(products)} products to {output_path}")
+    return products
 
 if __name__ == "__main__":
-    scrape_zus_drinkware()
\ No newline at end of file
+    scrape_zus_drinkware(replay="--replay" in sys.argv)
@@ -1,46 +1,85 @@
-from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-from sqlalchemy import create_engine, text
-import re
+from typing import List, Optional, Tuple
+from contextlib import asynccontextmanager
+import json
+import time
 import os
 
-from chatbot.agent import ConversationAgent
+from chatbot import calculator, services
+from chatbot.services import MOCK_MODE, ServiceError
+from chatbot.sessions import get_session_manager
+from chatbot.tools import close_async_client
+from chatbot.product_index import get_product_index
+from chatbot.lexical_index import get_lexical_index
+from chatbot.outlet_db import get_outlet_db
+from chatbot.gazetteer import get_gazetteer
+from chatbot.geo import NEARBY_MAX_K
+from chatbot.sql_cache import get_sql_cache
+from chatbot.sql_templates import get_sql_templates
+from chatbot.semantic_cache import get_semantic_cache
 
-app = FastAPI(title="Mindhive Assessment API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load shared, read-only resources once per process"""
+    if not MOCK_MODE:
+        try:
+            if get_product_index().load():
+                print(f"📦 Product index loaded ({get_product_index().size()} vectors)")
+        except Exception as e:
+            print(f"Product index not loaded: {e}")
+    if get_lexical_index().load():
+        print(f"🔎 BM25 product index loaded ({get_lexical_index().stats()['documents']} products)")
+    get_outlet_db().connect()
+    print(f"🗺️ Gazetteer loaded ({len(get_gazetteer().load())} places)")
+    yield
+    await close_async_client()
+    get_outlet_db().close()
+
+app = FastAPI(title="Mindhive Assessment API", lifespan=lifespan)
 
 templates = Jinja2Templates(directory="templates")
 
-MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
+SESSION_COOKIE = "session_id"
+SESSION_HEADER = "X-Session-ID"
+
+def resolve_session_id(request: Request) -> Tuple[str, bool]:
+    """(session id from header or cookie, False), or (a new session id, True) if neither is set"""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    if session_id:
+        return session_id, False
+    return get_session_manager().new_session_id(), True
 
-chat_agent = None
+def set_session_cookie(response: Response, session_id: str) -> None:
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
 
-def get_agent():
-    global chat_agent
-    if chat_agent is None:
-        chat_agent = ConversationAgent()
-    return chat_agent
+def get_session_id(request: Request, response: Response) -> str:
+    """Identify the caller by header or cookie, issuing a new session cookie if neither is set"""
+    session_id, issued = resolve_session_id(request)
+    if issued:
+        set_session_cookie(response, session_id)
+    return session_id
 
-MOCK_PRODUCT_RESPONSES = {
-    "tumbler": "We offer several great tumbler options! The **OG CUP 2.0** (RM 49.90) features a screw-on lid and double-wall insulation. The **All-Can Tumbler** (RM 59.90) is versatile and fits standard cans. The **All Day Cup** (RM 49.90) is perfect for daily use with ergonomic design.",
-    "mug": "We have two excellent mug options: The **OG Ceramic Mug** (RM 39.90) is microwave and dishwasher safe, perfect for your morning coffee. The **ZUS Stainless Steel Mug** (RM 44.90) features double-wall insulation to keep drinks hot or cold.",
-    "og cup": "The **OG CUP 2.0** (RM 49.90) is our iconic tumbler with an upgrade! It features a screw-on lid for secure transport and double-wall insulation to keep your drinks at the perfect temperature. 500ml capacity (17oz).",
-    "price": "Our drinkware prices range from RM 39.90 to RM 59.90. Ceramic mugs start at RM 39.90, standard tumblers at RM 49.90, and premium tumblers at RM 59.90. All products feature quality materials and excellent insulation.",
-    "default": "We offer a wide range of drinkware including tumblers (RM 49.90-59.90), mugs (RM 39.90-44.90), and accessories. Our products feature quality insulation and Malaysian-inspired designs. What specific product are you interested in?"
-}
+def sse(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-MOCK_OUTLET_DATA = {
-    "ss 2": {"name": "ZUS Coffee - SS 2", "address": "No. 75, Jalan SS 2/67, SS 2, 47300 Petaling Jaya, Selangor", "opening_hours": "8:00 AM - 10:00 PM", "services": "Dine-in, Takeaway, Delivery, Drive-thru"},
-    "bangsar": {"name": "ZUS Coffee - Bangsar", "address": "No. 11, Jalan Telawi 3, Bangsar Baru, 59100 Kuala Lumpur", "opening_hours": "7:00 AM - 11:00 PM", "services": "Dine-in, Takeaway, Delivery"},
-    "klcc": {"name": "ZUS Coffee - KLCC", "address": "Lot 241, Level 2, Suria KLCC, 50088 Kuala Lumpur", "opening_hours": "9:00 AM - 10:00 PM", "services": "Dine-in, Takeaway"},
-}
+class StreamTimer:
+    """Tracks time-to-first-byte and total latency of a streamed response"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ttfb_ms = None
+
+    def first_byte(self):
+        if self.ttfb_ms is None:
+            self.ttfb_ms = round((time.perf_counter() - self.start) * 1000, 2)
+
+    def done(self) -> dict:
+        return {"ttfb_ms": self.ttfb_ms, "total_ms": round((time.perf_counter() - self.start) * 1000, 2)}
 
 # --- Web Interface ---
 @app.get("/", response_class=HTMLResponse)
@@ -52,180 +91,154 @@ class ChatMessage(BaseModel):
     message: str
 
 @app.post("/chat")
-async def chat(msg: ChatMessage):
+async def chat(msg: ChatMessage, request: Request, response: Response):
     """Handle chat messages from the web interface"""
     try:
-        agent = get_agent()
-        response = agent.process_turn(msg.message)
-        return {"response": response}
+        sessions = get_session_manager()
+        session = sessions.get(get_session_id(request, response))
+        async with session.lock:
+            reply = await session.agent.aprocess_turn(msg.message)
+            prompt_tokens = session.agent.last_prompt_tokens
+        sessions.touch(session)
+        # prompt_tokens is only set on turns answered by the LLM fallback
+        return {"response": reply, "prompt_tokens": prompt_tokens}
     except Exception as e:
         return {"response": f"I apologize, but I encountered an error: {str(e)}"}
 
+async def chat_events(session, message: str):
+    timer = StreamTimer()
+    prompt_tokens = None
+    try:
+        async with session.lock:
+            async for kind, text in session.agent.astream_turn(message):
+                if text:
+                    timer.first_byte()
+                    yield sse(kind, {"text": text})
+            prompt_tokens = session.agent.last_prompt_tokens
+        get_session_manager().touch(session)
+    except Exception as e:
+        timer.first_byte()
+        yield sse("message", {"text": f"I apologize, but I encountered an error: {str(e)}"})
+    yield sse("done", {**timer.done(), "prompt_tokens": prompt_tokens})
+
+@app.post("/chat/stream")
+async def chat_stream(msg: ChatMessage, request: Request):
+    """Stream the chat reply as Server-Sent Events: token events for LLM text, one message event for tool results"""
+    session_id, issued = resolve_session_id(request)
+    session = get_session_manager().get(session_id)
+    response = StreamingResponse(chat_events(session, msg.message), media_type="text/event-stream")
+    if issued:
+        set_session_cookie(response, session_id)
+    return response
+
 @app.post("/chat/reset")
-async def reset_chat():
-    """Reset the chat session"""
-    global chat_agent
-    if chat_agent:
-        chat_agent.reset()
+async def reset_chat(request: Request, response: Response):
+    """Reset the caller's chat session"""
+    await get_session_manager().reset(get_session_id(request, response))
     return {"status": "Chat session reset"}
 
 # --- Part 3: Calculator ---
 class CalculateRequest(BaseModel):
     expr: str
 
+class CalculateBatchRequest(BaseModel):
+    exprs: List[str]
+
 @app.post("/calculate")
 async def calculate(request: CalculateRequest):
     """Calculate mathematical expressions - no OpenAI needed"""
-    expr = request.expr
-    
-    if not re.match(r'^[\d+\-*/().\s]+$', expr):
-        raise HTTPException(status_code=400, detail="Invalid characters in expression")
-    
     try:
-        result = eval(expr, {"__builtins__": {}}, {})
-        return {"result": result, "expression": expr}
-    except ZeroDivisionError:
-        raise HTTPException(status_code=400, detail="Cannot divide by zero")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Calculation error: {str(e)}")
+        return await services.acalculate(request.expr)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.post("/calculate/batch")
+async def calculate_batch(request: CalculateBatchRequest):
+    """Evaluate many expressions at once; each item gets its own result or error"""
+    try:
+        return await services.acalculate_batch(request.exprs)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 # --- Part 4: Product RAG ---
 @app.get("/products")
 async def search_products(query: str = Query(..., min_length=1)):
     """Search ZUS Coffee products using RAG (or mock mode)"""
-    
-    if MOCK_MODE:
-        query_lower = query.lower()
-
-        if "tumbler" in query_lower:
-            answer = MOCK_PRODUCT_RESPONSES["tumbler"]
-            sources = [
-                {"title": "OG CUP 2.0", "price": "RM 49.90"},
-                {"title": "All-Can Tumbler", "price": "RM 59.90"},
-                {"title": "All Day Cup", "price": "RM 49.90"}
-            ]
-        elif "mug" in query_lower:
-            answer = MOCK_PRODUCT_RESPONSES["mug"]
-            sources = [
-                {"title": "OG Ceramic Mug", "price": "RM 39.90"},
-                {"title": "ZUS Stainless Steel Mug", "price": "RM 44.90"}
-            ]
-        elif "og" in query_lower or "og cup" in query_lower:
-            answer = MOCK_PRODUCT_RESPONSES["og cup"]
-            sources = [{"title": "OG CUP 2.0", "price": "RM 49.90"}]
-        elif "price" in query_lower or "cost" in query_lower or "how much" in query_lower:
-            answer = MOCK_PRODUCT_RESPONSES["price"]
-            sources = [
-                {"title": "Various Products", "price": "RM 39.90 - 59.90"}
-            ]
-        else:
-            answer = MOCK_PRODUCT_RESPONSES["default"]
-            sources = [
-                {"title": "Drinkware Collection", "price": "Various"}
-            ]
-        
-        return {"answer": answer, "sources": sources, "mock_mode": True}
-    
     try:
-        vectorstore_path = "vectorstore/product_kb"
-        
-        if not os.path.exists(vectorstore_path):
-            raise HTTPException(status_code=500, detail="Product KB not initialized")
-        
-        vectorstore = FAISS.load_local(vectorstore_path, OpenAIEmbeddings(), allow_dangerous_deserialization=True)
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-        docs = retriever.invoke(query)
-        
-        if not docs:
-            return {"answer": "I couldn't find relevant product information.", "sources": []}
-        
-        context = "\n".join([d.page_content for d in docs])
-        prompt = PromptTemplate.from_template(
-            "Answer based on context:\n{context}\n\nQuestion: {question}\n\nAnswer:"
-        )
-        
-        chain = prompt | ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3) | StrOutputParser()
-        answer = chain.invoke({"context": context, "question": query})
-        
-        return {
-            "answer": answer,
-            "sources": [{"title": d.metadata.get("title"), "price": d.metadata.get("price")} for d in docs]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"RAG error: {str(e)}")
+        return await services.asearch_products(query)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+async def product_events(query: str):
+    timer = StreamTimer()
+    try:
+        async for kind, value in services.astream_products(query):
+            timer.first_byte()
+            yield sse(kind, {"text": value} if kind == "token" else value)
+    except ServiceError as e:
+        timer.first_byte()
+        yield sse("error", {"status_code": e.status_code, "detail": e.detail})
+    yield sse("done", timer.done())
+
+@app.get("/products/stream")
+async def stream_products(query: str = Query(..., min_length=1)):
+    """Stream a product answer as Server-Sent Events: one sources event, then token events"""
+    return StreamingResponse(product_events(query), media_type="text/event-stream")
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+
+@app.post("/products/batch")
+async def search_products_batch(request: BatchQueryRequest):
+    """Answer many product queries at once; results are in request order with per-item errors"""
+    try:
+        return await services.asearch_products_batch(request.queries)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 # --- Part 4: Outlets Text2SQL ---
 @app.get("/outlets")
 async def search_outlets(query: str = Query(..., min_length=1)):
     """Search ZUS Coffee outlets using Text2SQL (or mock mode)"""
-    
-    if MOCK_MODE:
-        try:
-            db_path = "data/outlets.db"
-            if not os.path.exists(db_path):
-                query_lower = query.lower()
-                results = []
-                
-                for key, outlet in MOCK_OUTLET_DATA.items():
-                    if key in query_lower or query_lower in outlet["address"].lower():
-                        results.append(outlet)
-                
-                if not results:
-                    results = list(MOCK_OUTLET_DATA.values())[:3]
-                
-                return {"results": results, "count": len(results), "mock_mode": True}
-            
-            engine = create_engine(f"sqlite:///{db_path}")
-            with engine.connect() as conn:
-                sql = text("""
-                    SELECT * FROM outlets 
-                    WHERE name LIKE :query 
-                    OR address LIKE :query
-                    LIMIT 5
-                """)
-                result = conn.execute(sql, {"query": f"%{query}%"})
-                rows = [dict(row._mapping) for row in result]
-                
-                if not rows:
-                    return {"results": [], "count": 0, "message": "No outlets found"}
-                
-                return {"results": rows, "count": len(rows), "mock_mode": True}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
-    
     try:
-        db_path = "data/outlets.db"
-        if not os.path.exists(db_path):
-            raise HTTPException(status_code=500, detail="Outlet DB not initialized")
-        
-        engine = create_engine(f"sqlite:///{db_path}")
-        
-        with engine.connect() as conn:
-            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-            
-            prompt = f"""Convert to SQL for 'outlets' table (columns: name, address, opening_hours, services).
-Query: "{query}"
-Return ONLY the SQL SELECT statement."""
-            
-            sql_query = llm.invoke(prompt).content.strip()
-            sql_query = re.sub(r'```sql\s*|\s*```', '', sql_query).strip()
-            
-            if not sql_query.upper().startswith("SELECT"):
-                raise ValueError("Only SELECT allowed")
-            
-            dangerous = ["DROP", "DELETE", "UPDATE", "INSERT", "TRUNCATE", "ALTER", "CREATE", "EXEC"]
-            if any(kw in sql_query.upper() for kw in dangerous):
-                raise ValueError("Malicious SQL detected")
-            
-            result = conn.execute(text(sql_query))
-            rows = [dict(row._mapping) for row in result]
-            
-            return {"results": rows, "query": query, "sql": sql_query, "count": len(rows)}
-    
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Text2SQL error: {str(e)}")
+        return await services.asearch_outlets(query)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.get("/outlets/filter")
+async def filter_outlets(
+    open_now: bool = False,
+    day: Optional[str] = None,
+    at: Optional[str] = None,
+    until: Optional[str] = None,
+    service: List[str] = Query(default=[]),
+    limit: int = Query(20, ge=1, le=500),
+):
+    """Filter outlets by opening hours and services without an LLM (e.g. ?until=22:00&service=drive-thru)"""
+    try:
+        return await services.afind_outlets(open_now, day, at, until, service, limit)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.get("/outlets/nearby")
+async def nearby_outlets(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=NEARBY_MAX_K),
+):
+    """The k outlets nearest to a point, with their distance in km (e.g. ?lat=3.13&lon=101.67&k=3)"""
+    try:
+        return await services.anearby_outlets(lat, lon, k)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@app.post("/outlets/batch")
+async def search_outlets_batch(request: BatchQueryRequest):
+    """Run many outlet queries at once; results are in request order with per-item errors"""
+    try:
+        return await services.asearch_outlets_batch(request.queries)
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @app.get("/health")
 async def health_check():
@@ -234,7 +247,16 @@ async def health_check():
         "status": "healthy",
         "mock_mode": MOCK_MODE,
         "product_kb_exists": os.path.exists("vectorstore/product_kb"),
-        "outlet_db_exists": os.path.exists("data/outlets.db")
+        "product_index": get_product_index().stats(),
+        "product_lexical_index": get_lexical_index().stats(),
+        "product_answer_cache": get_semantic_cache().stats(),
+        "outlet_db_exists": os.path.exists("data/outlets.db"),
+        "outlet_db": get_outlet_db().stats(),
+        "gazetteer": get_gazetteer().stats(),
+        "text2sql_cache": get_sql_cache().stats(),
+        "text2sql_paths": get_sql_templates().stats(),
+        "calculator_cache": calculator.cache_stats(),
+        "chat_sessions": get_session_manager().stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+import threading
+import json
+import socket
+import time
+
+# A route returns (status, headers, body); a callable route gets the request handler
+Response = Tuple[int, Dict[str, str], bytes]
+Route = Union[Response, Callable[[BaseHTTPRequestHandler], Response]]
+
+
+class FixtureSite:
+    """
+    Local stand-in for a remote site: serves fixed routes over HTTP/1.1 keep-alive on a free port
+    and counts requests (per path) and TCP connections, with optional per-request latency.
+    """
+
+    def __init__(self, routes: Dict[str, Route], latency: float = 0.0):
+        self.routes = routes
+        self.latency = latency
+        self.requests: Dict[str, int] = {}
+        self.request_headers: Dict[str, list] = {}
+        self.connections = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; without this, Nagle's algorithm and
+                # delayed ACKs stall every keep-alive response by ~40 ms
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with site._lock:
+                    site.connections += 1
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests[self.path] = site.requests.get(self.path, 0) + 1
+                    site.request_headers.setdefault(self.path, []).append(dict(self.headers))
+                if site.latency:
+                    time.sleep(site.latency)
+                route = site.routes.get(self.path) or site.routes.get(urlsplit(self.path).path)
+                status, headers, body = route(self) if callable(route) else (route or (404, {}, b"Not found"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def html(body: str, status: int = 200, headers: Dict[str, str] = None) -> Response:
+    return status, {"Content-Type": "text/html; charset=utf-8", **(headers or {})}, body.encode()
+
+
+def product_page(title: str, price: str, description: str) -> Response:
+    return html(f"""<html><head><title>{title}</title></head><body>
+        <nav><a href="/">Home</a><a href="/collections/tumbler">Tumblers</a></nav>
+        <h1 class="product-meta__title">{title}</h1>
+        <span class="price">{price}</span>
+        <div class="product-meta__description"><p>{description}</p></div>
+        <footer>{'<p>Footer text</p>' * 20}</footer>
+    </body></html>""")
+
+
+def shop_routes(n_products: int, per_page: int = 10) -> Dict[str, Route]:
+    """A Shopify-like shop: a paginated /collections/tumbler and one page per product"""
+    routes: Dict[str, Route] = {}
+    pages = (n_products + per_page - 1) // per_page
+    for page in range(1, pages + 1):
+        links = "".join(
+            f'<a href="/collections/tumbler/products/cup-{i}">Cup {i}</a><a href="/products/cup-{i}#reviews">Reviews</a>'
+            for i in range((page - 1) * per_page, min(page * per_page, n_products))
+        )
+        next_link = f'<a rel="next" href="/collections/tumbler?page={page + 1}">Next</a>' if page < pages else ""
+        path = "/collections/tumbler" if page == 1 else f"/collections/tumbler?page={page}"
+        routes[path] = html(f"<html><body>{links}{next_link}</body></html>")
+    for i in range(n_products):
+        routes[f"/products/cup-{i}"] = product_page(f"Cup {i} | 500ml", f"RM {40 + i}.90", f"Insulated cup number {i}.")
+    return routes
+
+
+def feed_product(i: int, prices=("49.90",)) -> dict:
+    """A product as Shopify's products.json lists it"""
+    variants = [{"title": "Default Title" if len(prices) == 1 else f"Colour {n}", "price": price}
+                for n, price in enumerate(prices)]
+    return {"id": 1000 + i, "title": f"Cup {i} | 500ml", "handle": f"cup-{i}",
+            "body_html": f"<p>Insulated <strong>cup</strong> number {i}.</p>", "variants": variants}
+
+
+def products_feed(products: list) -> Route:
+    """A paged products.json route (?limit=&page=, Shopify's default limit 30); pages past the end are empty"""
+    def route(handler):
+        query = parse_qs(urlsplit(handler.path).query)
+        limit, page = int(query.get("limit", ["30"])[0]), int(query.get("page", ["1"])[0])
+        body = json.dumps({"products": products[(page - 1) * limit:page * limit]}).encode()
+        return 200, {"Content-Type": "application/json"}, body
+    return route
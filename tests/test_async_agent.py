@@ -0,0 +1,83 @@
+import unittest
+import asyncio
+from unittest.mock import patch, Mock
+import httpx
+from chatbot.agent import ConversationAgent
+from chatbot.tools import CalculatorTool, ProductRAGTool, OutletSQLTool
+
+
+class MockLLM:
+    def invoke(self, prompt: str):
+        return Mock(content="Fallback response")
+
+
+def mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestAsyncAgent(unittest.TestCase):
+    """Tests for the awaitable conversation pipeline"""
+
+    def setUp(self):
+        self.agent = ConversationAgent(llm=MockLLM())
+
+    @patch('chatbot.tools.CalculatorTool.arun')
+    def test_calculate_intent(self, mock_calc):
+        mock_calc.return_value = {"result": 30}
+        resp = asyncio.run(self.agent.aprocess_turn("Calculate 5 * 6"))
+        self.assertIn("The result is 30", resp)
+
+    @patch('chatbot.tools.OutletSQLTool.arun')
+    def test_outlet_slot_carries_over(self, mock_outlet):
+        mock_outlet.return_value = {
+            "results": [{"name": "SS 2", "address": "Jalan SS 2/67", "opening_hours": "8:00AM - 10:00PM"}]
+        }
+        resp1 = asyncio.run(self.agent.aprocess_turn("Is there an outlet in Petaling Jaya?"))
+        self.assertIn("Which outlet", resp1)
+        resp2 = asyncio.run(self.agent.aprocess_turn("SS 2, whats the opening time?"))
+        self.assertIn("8:00AM", resp2)
+
+    def test_sync_and_async_agree(self):
+        """Test both APIs give the same reply for turns that need no tools"""
+        for text in ["Calculate", "Show me outlets", "hello"]:
+            with self.subTest(text=text):
+                sync_reply = ConversationAgent(llm=MockLLM()).process_turn(text)
+                async_reply = asyncio.run(ConversationAgent(llm=MockLLM()).aprocess_turn(text))
+                self.assertEqual(sync_reply, async_reply)
+
+
+class TestAsyncHTTPTools(unittest.TestCase):
+    """Tests for the async HTTP transport error handling"""
+
+    def test_calculator_success(self):
+        client = mock_client(lambda request: httpx.Response(200, json={"result": 30}))
+        with patch('chatbot.tools.get_async_client', return_value=client):
+            self.assertEqual(asyncio.run(CalculatorTool().arun("5 * 6"))["result"], 30)
+
+    def test_calculator_400(self):
+        client = mock_client(lambda request: httpx.Response(400, json={"detail": "Cannot divide by zero"}))
+        with patch('chatbot.tools.get_async_client', return_value=client):
+            result = asyncio.run(CalculatorTool().arun("5 / 0"))
+        self.assertIn("Cannot divide by zero", result["error"])
+
+    def test_connection_error_falls_back(self):
+        def refuse(request):
+            raise httpx.ConnectError("Connection refused")
+        with patch('chatbot.tools.get_async_client', side_effect=lambda: mock_client(refuse)):
+            calc = asyncio.run(CalculatorTool().arun("5 + 5"))
+            products = asyncio.run(ProductRAGTool().arun("tumbler"))
+            outlets = asyncio.run(OutletSQLTool().arun("ss 2 outlet"))
+        self.assertIn("trouble reaching", calc["error"])
+        self.assertIn("tumbler", products["answer"].lower())
+        self.assertEqual(outlets["results"][0]["name"], "ZUS Coffee - SS 2")
+
+    def test_timeout(self):
+        def slow(request):
+            raise httpx.ReadTimeout("timed out")
+        with patch('chatbot.tools.get_async_client', return_value=mock_client(slow)):
+            result = asyncio.run(OutletSQLTool().arun("Bangsar"))
+        self.assertIn("taking too long", result["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
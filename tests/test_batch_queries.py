@@ -0,0 +1,207 @@
+import unittest
+import asyncio
+import sqlite3
+import tempfile
+import shutil
+import os
+from unittest.mock import patch, Mock
+from fastapi.testclient import TestClient
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from chatbot import services
+from chatbot.outlet_db import OutletDB
+from chatbot.product_index import ProductIndex
+from chatbot.semantic_cache import SemanticAnswerCache
+from chatbot.sql_cache import SQLTranslationCache
+from chatbot.sql_templates import SQLTemplates
+from main import app
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        return self.embed_documents(texts)
+
+
+class FakeChain:
+    """Answers with the question; fails for questions containing 'boom'"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, inputs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if "boom" in inputs["question"]:
+            raise RuntimeError("LLM unavailable")
+        return f"answer: {inputs['question']}"
+
+
+class TestProductBatch(unittest.TestCase):
+    """Tests for batched product retrieval"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "product_kb")
+        docs = [Document(page_content=f"Product {i}", metadata={"title": f"Product {i}", "price": "RM 1"}) for i in range(20)]
+        FAISS.from_documents(docs, DeterministicFakeEmbedding(size=16)).save_local(path)
+        self.embeddings = CountingEmbeddings(size=16)
+        self.index = ProductIndex(path=path, embeddings=self.embeddings)
+        self.chain = FakeChain()
+        self.patches = [
+            patch('chatbot.services.MOCK_MODE', False),
+            patch('chatbot.services.get_product_index', return_value=self.index),
+            patch('chatbot.services.get_semantic_cache', return_value=SemanticAnswerCache()),
+            patch('chatbot.services._product_chain', return_value=self.chain),
+            patch('chatbot.services.BATCH_LLM_CONCURRENCY', 3),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_matrix_search_matches_single_search(self):
+        vectors = [self.index.embed_query(f"Product {i}") for i in range(5)]
+        batched = self.index.search_by_vectors(vectors, k=3)
+        for vector, docs in zip(vectors, batched):
+            single = self.index.search_by_vector(vector, k=3)
+            self.assertEqual([d.metadata["title"] for d in docs], [d.metadata["title"] for d in single])
+
+    def test_batch_order_errors_and_single_embedding_call(self):
+        queries = [f"Product {i}" for i in range(10)] + ["boom", "Product 1"]
+        data = asyncio.run(services.asearch_products_batch(queries))
+        self.assertEqual(self.embeddings.calls, 1)
+        self.assertEqual([item["query"] for item in data["results"]], queries)
+        self.assertEqual(data["results"][0]["answer"], "answer: Product 0")
+        self.assertEqual(data["results"][-1]["answer"], "answer: Product 1")
+        self.assertIn("LLM unavailable", data["results"][10]["error"])
+        self.assertEqual(data["errors"], 1)
+        self.assertLessEqual(self.chain.peak, 3)
+
+    def test_index_failure_is_a_service_error(self):
+        with patch.object(self.index, 'search_by_vectors', side_effect=RuntimeError("FAISS index corrupt")):
+            with self.assertRaises(services.ServiceError) as ctx:
+                asyncio.run(services.asearch_products_batch(["Product 1", "Product 2"]))
+        self.assertEqual(ctx.exception.status_code, 500)
+        self.assertIn("FAISS index corrupt", ctx.exception.detail)
+
+    def test_batch_limits(self):
+        with self.assertRaises(services.ServiceError):
+            asyncio.run(services.asearch_products_batch([]))
+        with patch('chatbot.services.BATCH_MAX_QUERIES', 2):
+            with self.assertRaises(services.ServiceError):
+                asyncio.run(services.asearch_products_batch(["a", "b", "c"]))
+
+
+class FakeSQLLLM:
+    active = 0
+    peak = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def ainvoke(self, prompt):
+        FakeSQLLLM.active += 1
+        FakeSQLLLM.peak = max(FakeSQLLLM.peak, FakeSQLLLM.active)
+        await asyncio.sleep(0.01)
+        FakeSQLLLM.active -= 1
+        if "drop" in prompt:
+            return Mock(content="DROP TABLE outlets")
+        if "broken" in prompt:
+            return Mock(content="SELECT * FROM missing_table")
+        name = prompt.split('Query: "')[1].split('"')[0]
+        return Mock(content=f"SELECT * FROM outlets WHERE name LIKE '%{name}%'")
+
+
+class TestOutletBatch(unittest.TestCase):
+    """Tests for batched outlet queries"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", [
+            ("ZUS Coffee - SS 2", "Jalan SS 2/67, Petaling Jaya", "8:00 AM - 10:00 PM", "Dine-in"),
+            ("ZUS Coffee - Bangsar", "Jalan Telawi 3, Kuala Lumpur", "7:00 AM - 11:00 PM", "Takeaway"),
+        ])
+        conn.commit()
+        conn.close()
+        self.db = OutletDB(db_path=self.db_path)
+        FakeSQLLLM.peak = 0
+        self.patches = [
+            patch('chatbot.services.MOCK_MODE', False),
+            patch('chatbot.services.get_outlet_db', return_value=self.db),
+            patch('chatbot.services.get_sql_cache', return_value=SQLTranslationCache(self.db_path, path=None)),
+            patch('chatbot.services.ChatOpenAI', FakeSQLLLM),
+            patch('chatbot.services.BATCH_LLM_CONCURRENCY', 2),
+            # No places resolve, so every question takes the cache/LLM path
+            patch('chatbot.services.get_sql_templates', return_value=SQLTemplates(resolve=lambda text: {})),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_batch_order_and_item_errors(self):
+        queries = ["SS 2", "drop", "Bangsar", "broken", "SS 2"]
+        data = asyncio.run(services.asearch_outlets_batch(queries))
+        results = data["results"]
+        self.assertEqual([item["query"] for item in results], queries)
+        self.assertEqual(results[0]["results"][0]["name"], "ZUS Coffee - SS 2")
+        self.assertEqual(results[1]["status_code"], 400)
+        self.assertEqual(results[2]["results"][0]["name"], "ZUS Coffee - Bangsar")
+        self.assertEqual(results[3]["status_code"], 500)
+        self.assertEqual(results[4]["results"], results[0]["results"])
+        self.assertEqual(data["errors"], 2)
+        self.assertLessEqual(FakeSQLLLM.peak, 2)
+
+        self.assertEqual(results[0]["path"], "llm")
+
+        again = asyncio.run(services.asearch_outlets_batch(["SS 2"]))
+        self.assertTrue(again["results"][0]["cached"])
+        self.assertEqual(again["results"][0]["path"], "cache")
+
+    def test_execute_many_isolates_failures(self):
+        out = self.db.execute_many(["SELECT name FROM outlets", "SELECT * FROM nope", "SELECT COUNT(*) AS n FROM outlets"])
+        self.assertEqual(len(out[0]), 2)
+        self.assertIsInstance(out[1], Exception)
+        self.assertEqual(out[2], [{"n": 2}])
+
+
+@patch('chatbot.services.MOCK_MODE', True)
+class TestBatchEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_products_batch(self):
+        resp = self.client.post("/products/batch", json={"queries": ["mug", "tumbler"]})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()["results"]
+        self.assertEqual(results[0]["sources"][0]["title"], "Stainless Steel Mug | 420ml")
+        self.assertEqual(results[1]["sources"][0]["title"], "All-Can Tumbler | 600ml")
+
+    def test_outlets_batch(self):
+        resp = self.client.post("/outlets/batch", json={"queries": ["SS 2", "Bangsar"]})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["count"], 2)
+
+    def test_empty_batch_rejected(self):
+        self.assertEqual(self.client.post("/products/batch", json={"queries": []}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
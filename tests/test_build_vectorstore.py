@@ -0,0 +1,141 @@
+import unittest
+import tempfile
+import shutil
+import os
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from ingest.build_product_vectorstore import load_manifest, update_vectorstore
+from chatbot.lexical_index import product_document
+from chatbot.product_index import ProductIndex
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    texts: int = 0
+    fail_on: str = ""
+
+    def embed_documents(self, texts):
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise RuntimeError("rate limited")
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+def catalog(records):
+    return {r["url"]: product_document(r) for r in records}
+
+
+def product(i, price="RM 49.90"):
+    return {"title": f"Cup {i}", "price": price, "description": f"Insulated cup number {i}.", "url": f"/products/cup-{i}"}
+
+
+class TestIncrementalVectorstore(unittest.TestCase):
+    """Tests for manifest-driven incremental product index builds"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "product_kb")
+        self.embeddings = CountingEmbeddings(size=8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def update(self, records, **kwargs):
+        return update_vectorstore(catalog(records), self.embeddings, self.path, batch_size=4, **kwargs)
+
+    def load(self):
+        return FAISS.load_local(self.path, self.embeddings, allow_dangerous_deserialization=True)
+
+    def test_unchanged_catalog_embeds_nothing(self):
+        records = [product(i) for i in range(10)]
+        self.assertEqual(self.update(records)["added"], 10)
+        version = os.stat(os.path.join(self.path, "index.faiss")).st_mtime_ns
+        stats = self.update(records)
+        self.assertEqual(stats["unchanged"], 10)
+        self.assertEqual(self.embeddings.texts, 10)
+        # Nothing changed, so the index is not rewritten
+        self.assertEqual(os.stat(os.path.join(self.path, "index.faiss")).st_mtime_ns, version)
+
+    def test_only_changes_are_embedded(self):
+        self.update([product(i) for i in range(10)])
+        records = [product(i) for i in range(1, 10)] + [product(10)]
+        records[0] = product(1, price="RM 39.90")
+        stats = self.update(records)
+        self.assertEqual((stats["added"], stats["changed"], stats["removed"], stats["unchanged"]), (1, 1, 1, 8))
+        self.assertEqual(self.embeddings.texts, 12)
+
+        vectorstore = self.load()
+        self.assertEqual(vectorstore.index.ntotal, 10)
+        self.assertNotIn("/products/cup-0", vectorstore.index_to_docstore_id.values())
+        self.assertEqual(vectorstore.docstore.search("/products/cup-1").metadata["price"], "RM 39.90")
+        self.assertEqual(set(load_manifest(self.path)), {f"/products/cup-{i}" for i in range(1, 11)})
+        self.assertEqual(vectorstore.similarity_search("Cup 10 - Insulated cup number 10.", k=1)[0].metadata["title"], "Cup 10")
+        self.assertFalse(os.path.lexists(f"{self.path}.tmp"))
+
+    def test_builds_are_swapped_in_through_a_symlink(self):
+        self.update([product(i) for i in range(3)])
+        first = os.path.realpath(self.path)
+        self.update([product(i) for i in range(4)])
+        second = os.path.realpath(self.path)
+        self.update([product(i) for i in range(5)])
+        self.assertTrue(os.path.islink(self.path))
+        self.assertNotEqual(first, second)
+        # The previous build stays for readers still loading it; older ones are removed
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+        self.assertEqual(self.load().index.ntotal, 5)
+
+    def test_running_server_sees_the_new_build(self):
+        self.update([product(i) for i in range(3)])
+        index = ProductIndex(path=self.path, embeddings=self.embeddings)
+        index.load()
+        self.update([product(i) for i in range(4)])
+        self.assertTrue(index.is_stale())
+        index.reload()
+        self.assertEqual(index.size(), 4)
+
+    def test_pre_versioning_directory_is_replaced(self):
+        FAISS.from_texts(["old"], self.embeddings).save_local(self.path)
+        self.update([product(i) for i in range(3)])
+        self.assertTrue(os.path.islink(self.path))
+        self.assertEqual(self.load().index.ntotal, 3)
+
+    def test_failed_batch_keeps_previous_entries(self):
+        self.update([product(i) for i in range(8)])
+        changed = [product(i, price="RM 1.00") for i in range(8)]
+        self.embeddings.fail_on = "number 5."
+        stats = self.update(changed)
+        self.assertEqual((stats["changed"], stats["failed"]), (4, 4))
+        vectorstore = self.load()
+        self.assertEqual(vectorstore.index.ntotal, 8)
+        self.assertEqual(vectorstore.docstore.search("/products/cup-0").metadata["price"], "RM 1.00")
+        self.assertEqual(vectorstore.docstore.search("/products/cup-5").metadata["price"], "RM 49.90")
+
+        # The next run retries just the failed batch
+        self.embeddings.fail_on = ""
+        before = self.embeddings.texts
+        self.assertEqual(self.update(changed)["changed"], 4)
+        self.assertEqual(self.embeddings.texts - before, 4)
+
+    def test_failed_first_build_writes_nothing(self):
+        self.embeddings.fail_on = "Cup"
+        self.assertEqual(self.update([product(i) for i in range(3)])["failed"], 3)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_incomplete_full_rebuild_is_not_saved(self):
+        self.update([product(i) for i in range(8)])
+        build = os.path.realpath(self.path)
+        self.embeddings.fail_on = "number 5."
+        stats = self.update([product(i) for i in range(8)], full=True)
+        self.assertEqual(stats["failed"], 4)
+        self.assertEqual(os.path.realpath(self.path), build)
+        self.assertEqual(self.load().index.ntotal, 8)
+
+    def test_full_rebuild(self):
+        self.update([product(i) for i in range(5)])
+        stats = self.update([product(i) for i in range(5)], full=True)
+        self.assertEqual(stats["added"], 5)
+        self.assertEqual(self.load().index.ntotal, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import random
+from fastapi.testclient import TestClient
+from chatbot import calculator
+from chatbot.calculator import CalculationError
+from main import app
+
+
+class TestCalculatorEngine(unittest.TestCase):
+    """Tests for the AST calculator engine and its limits"""
+
+    def test_arithmetic_matches_python(self):
+        for expr in ["5 * 6", "2 + 3 * 4", "(2 + 3) * 4", "7 / 2", "7 // 2", "-7 // 2", "2 ** 10", "2 ** -1", "-(3 + 4)"]:
+            with self.subTest(expr=expr):
+                result = calculator.calculate(expr)
+                self.assertEqual(result, eval(expr))
+                self.assertIs(type(result), type(eval(expr)))
+
+    def test_rejects_code(self):
+        for expr in ["__import__('os').system('ls')", "1; import os", "5(3)", "1 2"]:
+            with self.subTest(expr=expr):
+                self.assertRaises(CalculationError, calculator.calculate, expr)
+
+    def test_limits(self):
+        cases = {
+            "9**9**9**9": "Exponent too large",
+            "2**1000 * 2**1000 * 2**1000 * 2**1000 * 2**1000": "Result too large",
+            "10.0 ** 400": "Result too large",
+            "1" * 40: "Number too long",
+            "1 + (" * 40 + "1" + ")" * 40: "nested too deeply",
+            "-" * 40 + "1": "nested too deeply",
+            "1 / 0": "Cannot divide by zero",
+            "(-8) ** 0.5": "not a real number",
+        }
+        for expr, message in cases.items():
+            with self.subTest(expr=expr):
+                with self.assertRaisesRegex(CalculationError, message):
+                    calculator.calculate(expr)
+
+    def test_long_flat_chains_are_one_level(self):
+        self.assertEqual(calculator.calculate("+".join(["1"] * 40)), 40)
+        self.assertEqual(calculator.calculate(" - ".join(["2"] * 200)), 2 - 2 * 199)
+        chain = "2 * 3 + 4 * 5 - " * 30 + "1"
+        self.assertEqual(calculator.calculate(chain), eval(chain))
+
+    def test_same_shape_shares_parse(self):
+        calculator.calculate("12 * 34 + 5")
+        before = calculator.cache_stats()["hits"]
+        calculator.calculate("56 * 78 + 9")
+        self.assertEqual(calculator.cache_stats()["hits"], before + 1)
+
+    def test_batch_matches_scalar(self):
+        random.seed(7)
+        ops = ["+", "-", "*", "/", "//"]
+        exprs = [
+            f"({random.randint(-20, 20)} {random.choice(ops)} {random.randint(-3, 3)}) {random.choice(ops)} "
+            f"{random.choice([random.randint(-5, 5), round(random.uniform(-5, 5), 2)])}"
+            for _ in range(2000)
+        ] + ["9007199254740993 - 1"] * 10 + ["99999999999999999999.0 * 1" + " * 99999999999999999999.0" * 16] * 10
+        out = calculator.calculate_batch(exprs)
+        self.assertGreater(out["vectorized"], 0)
+        for expr, item in zip(exprs, out["results"]):
+            try:
+                expected = {"result": calculator.calculate(expr)}
+            except CalculationError as e:
+                expected = {"error": str(e)}
+            expected["expression"] = expr
+            self.assertEqual(item, expected)
+            self.assertIs(type(item.get("result")), type(expected.get("result")))
+
+    def test_batch_limit(self):
+        self.assertRaises(CalculationError, calculator.calculate_batch, ["1"] * (calculator.MAX_BATCH + 1))
+
+
+class TestCalculateEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_calculate(self):
+        resp = self.client.post("/calculate", json={"expr": "5 * 6"})
+        self.assertEqual(resp.json(), {"result": 30, "expression": "5 * 6"})
+        resp = self.client.post("/calculate", json={"expr": "5 / 0"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["detail"], "Cannot divide by zero")
+
+    def test_batch_keeps_order_and_item_errors(self):
+        resp = self.client.post("/calculate/batch", json={"exprs": ["1 + 1", "5 / 0", "abc", "2 * 3"]})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()["results"]
+        self.assertEqual([r["expression"] for r in results], ["1 + 1", "5 / 0", "abc", "2 * 3"])
+        self.assertEqual(results[0]["result"], 2)
+        self.assertEqual(results[1]["error"], "Cannot divide by zero")
+        self.assertEqual(results[2]["error"], "Invalid characters in expression")
+        self.assertEqual(results[3]["result"], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
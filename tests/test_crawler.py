@@ -0,0 +1,147 @@
+import unittest
+import tempfile
+import shutil
+import time
+import os
+from ingest.crawler import Crawler, TokenBucket
+from ingest.scrape_products import handle_page, parse_product, scrape_zus_drinkware
+from ingest.scrape_outlets import parse_outlet_page, scrape_zus_outlets
+from tests.fixture_site import FixtureSite, html, product_page, shop_routes
+
+
+def outlet_page(page: int, pages: int, per_page: int = 6):
+    items = "".join(
+        f'<article class="store-item"><h3 class="store-title">ZUS Coffee - Outlet {page}-{i}</h3>'
+        f'<p class="store-address">No. {i}, Jalan {page}, 47300 Petaling Jaya</p>'
+        f'<span class="store-hours">8:00 AM - 10:00 PM</span></article>'
+        for i in range(per_page)
+    )
+    next_link = f'<a class="next page-numbers" href="/stores/page/{page + 1}/">Next</a>' if page < pages else ""
+    return html(f"<html><body>{items}{next_link}</body></html>")
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for the per-host rate limiter"""
+
+    def test_rate_after_burst(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        # 5 immediately, then 10 more at 50/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+
+class TestRestrictedParsing(unittest.TestCase):
+    """Tests for parsing only the parts of a page the scrapers read"""
+
+    def test_product_theme_classes(self):
+        page = product_page("Cup | 500ml", "RM 49.90", "Keeps drinks hot.")[2]
+        self.assertEqual(parse_product("u", page), {"title": "Cup | 500ml", "price": "RM 49.90",
+                                                    "description": "Keeps drinks hot.", "url": "u"})
+
+    def test_product_without_theme_classes_falls_back_to_the_full_page(self):
+        page = b"<html><body><h1>Plain Cup</h1><p><span>Only RM 12.90</span></p></body></html>"
+        self.assertEqual(parse_product("u", page), {"title": "Plain Cup", "price": "Only RM 12.90",
+                                                    "description": "Quality ZUS Coffee drinkware", "url": "u"})
+
+    def test_outlet_cards_and_pagination(self):
+        outlets, next_pages = parse_outlet_page("https://zus.example/stores/", outlet_page(1, 2)[2])
+        self.assertEqual(len(outlets), 6)
+        self.assertEqual(outlets[0]["address"], "No. 0, Jalan 1, 47300 Petaling Jaya")
+        self.assertEqual(next_pages, ["https://zus.example/stores/page/2/"])
+
+
+class TestCrawler(unittest.TestCase):
+    """Tests for the crawler engine against a local fixture site"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_products_follow_pagination_without_caps(self):
+        with FixtureSite(shop_routes(45, per_page=10)) as site, Crawler(workers=4, rate=1000, burst=100) as crawler:
+            path = os.path.join(self.tmpdir, "drinkware.jsonl")
+            products = scrape_zus_drinkware(shop_url=site.url, output_path=path, crawler=crawler)
+        self.assertEqual(len(products), 45)
+        self.assertEqual(products[0], {"title": "Cup 0 | 500ml", "price": "RM 40.90",
+                                       "description": "Insulated cup number 0.", "url": f"{site.url}/products/cup-0"})
+        # Collection and "#reviews" links to the same product are fetched once
+        self.assertEqual(site.requests["/products/cup-7"], 1)
+        # Output order follows discovery, so it is stable from run to run
+        self.assertEqual([p["title"] for p in products[:3]], ["Cup 0 | 500ml", "Cup 1 | 500ml", "Cup 2 | 500ml"])
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 45)
+
+    def test_keep_alive_connections_are_reused(self):
+        with FixtureSite(shop_routes(30)) as site, Crawler(workers=3, rate=1000, burst=100) as crawler:
+            result = crawler.crawl([f"{site.url}/collections/tumbler"], lambda url, r: ([url], []))
+            crawler.crawl([f"{site.url}/products/cup-{i}" for i in range(30)], lambda url, r: ([url], []))
+        self.assertEqual(result.pages, 1)
+        self.assertLessEqual(site.connections, 3)
+
+    def test_outlets_follow_pagination(self):
+        routes = {"/stores/": outlet_page(1, 3)}
+        routes.update({f"/stores/page/{p}/": outlet_page(p, 3) for p in (2, 3)})
+        with FixtureSite(routes) as site, Crawler(workers=2, rate=1000, burst=100) as crawler:
+            outlets = scrape_zus_outlets(url=f"{site.url}/stores/", output_path=os.path.join(self.tmpdir, "o.csv"),
+                                         crawler=crawler)
+        self.assertEqual(len(outlets), 18)
+        self.assertEqual(outlets[-1]["name"], "ZUS Coffee - Outlet 3-5")
+
+    def test_parse_pool_matches_inline_parsing(self):
+        with FixtureSite(shop_routes(12)) as site:
+            with Crawler(workers=4, rate=1000, burst=100) as crawler:
+                inline = crawler.crawl([f"{site.url}/collections/tumbler"], handle_page)
+            with Crawler(workers=4, rate=1000, burst=100, parse_workers=2) as crawler:
+                pooled = crawler.crawl([f"{site.url}/collections/tumbler"], handle_page)
+        self.assertEqual(len(pooled.items), 12)
+        self.assertEqual(pooled.items, inline.items)
+
+    def test_retries_with_backoff(self):
+        calls = {"flaky": 0}
+
+        def flaky(handler):
+            calls["flaky"] += 1
+            return html("busy", status=503) if calls["flaky"] < 3 else html("ok")
+
+        routes = {"/flaky": flaky, "/limited": html("slow down", status=429, headers={"Retry-After": "0"}),
+                  "/missing": html("gone", status=404)}
+        with FixtureSite(routes) as site, Crawler(workers=2, retries=2, backoff=0.01) as crawler:
+            result = crawler.crawl([f"{site.url}/flaky", f"{site.url}/limited", f"{site.url}/missing"],
+                                   lambda url, r: ([r.text], []))
+        self.assertEqual(result.items, ["ok"])
+        self.assertEqual(site.requests["/flaky"], 3)
+        self.assertEqual(site.requests["/limited"], 3)
+        # Client errors other than 429 are not retried
+        self.assertEqual(site.requests["/missing"], 1)
+        self.assertEqual(set(result.errors), {f"{site.url}/limited", f"{site.url}/missing"})
+        self.assertEqual(result.retries, 4)
+
+    def test_per_host_rate_limit(self):
+        with FixtureSite(shop_routes(12)) as site, Crawler(workers=8, rate=40, burst=1) as crawler:
+            result = crawler.crawl([f"{site.url}/products/cup-{i}" for i in range(12)], lambda url, r: ([url], []))
+        # 12 requests at 40/s from an empty burst take at least 11/40 s despite 8 workers
+        self.assertGreaterEqual(result.elapsed, 0.25)
+        self.assertEqual(result.stats()["pages"], 12)
+
+    def test_concurrency_beats_sequential(self):
+        with FixtureSite(shop_routes(16), latency=0.05) as site, Crawler(workers=8, rate=1000, burst=100) as crawler:
+            result = crawler.crawl([f"{site.url}/products/cup-{i}" for i in range(16)], lambda url, r: ([url], []))
+        # Sequentially this is at least 16 x 50 ms
+        self.assertLess(result.elapsed, 0.5)
+
+    def test_items_are_handed_over_per_page_in_order(self):
+        pages = []
+        seeds = [f"{{}}/products/cup-{i}" for i in range(10)] + ["{}/missing"]
+        with FixtureSite(shop_routes(10), latency=0.01) as site, Crawler(workers=4, rate=1000, burst=100) as crawler:
+            result = crawler.crawl([seed.format(site.url) for seed in seeds], lambda url, r: ([url], []),
+                                   on_items=pages.append)
+        self.assertEqual(len(pages), 10)
+        self.assertEqual([item for page in pages for item in page], result.items)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import threading
+import asyncio
+import tempfile
+import shutil
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from chatbot.embedding_cache import CachedEmbeddings, EmbeddingStore, content_key
+import numpy as np
+import os
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+    texts: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.texts += 1
+        return super().embed_query(text)
+
+
+class TestCachedEmbeddings(unittest.TestCase):
+    """Tests for the disk-backed embedding cache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.inner = CountingEmbeddings(size=8)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_batch_only_embeds_misses(self):
+        """Test a batch with cached texts only sends the new ones"""
+        emb = CachedEmbeddings(self.inner, "test", cache_dir=self.tmpdir)
+        first = emb.embed_documents(["OG CUP 2.0", "All Day Cup"])
+        second = emb.embed_documents(["All Day Cup", "Frozee Cold Cup", "OG CUP 2.0"])
+        self.assertEqual(self.inner.texts, 3)
+        self.assertEqual(second[0], first[1])
+        self.assertEqual(second[2], first[0])
+
+    def test_query_shares_cache_with_documents(self):
+        """Test a query matching an ingested document costs no API call"""
+        emb = CachedEmbeddings(self.inner, "test", cache_dir=self.tmpdir)
+        doc = emb.embed_documents(["tumbler"])[0]
+        calls = self.inner.calls
+        self.assertEqual(emb.embed_query("tumbler"), doc)
+        self.assertEqual(self.inner.calls, calls)
+
+    def test_persists_across_instances(self):
+        """Test a rebuild with unchanged texts makes no embedding calls"""
+        CachedEmbeddings(self.inner, "test", cache_dir=self.tmpdir).embed_documents(["a", "b", "c"])
+        fresh = CountingEmbeddings(size=8)
+        emb = CachedEmbeddings(fresh, "test", cache_dir=self.tmpdir)
+        vectors = emb.embed_documents(["c", "a"])
+        self.assertEqual(fresh.calls, 0)
+        self.assertEqual(len(vectors[0]), 8)
+        self.assertEqual(emb.stats()["entries"], 3)
+
+    def test_async_paths_use_the_store_off_the_event_loop(self):
+        """Test aembed_* read and write the store in worker threads and share the sync cache"""
+        emb = CachedEmbeddings(self.inner, "test", cache_dir=self.tmpdir)
+        threads = []
+        get_many, put_many = emb.store.get_many, emb.store.put_many
+        emb.store.get_many = lambda keys: threads.append(threading.current_thread()) or get_many(keys)
+        emb.store.put_many = lambda keys, vectors: threads.append(threading.current_thread()) or put_many(keys, vectors)
+        docs = asyncio.run(emb.aembed_documents(["mug", "cup"]))
+        query = asyncio.run(emb.aembed_query("cup"))
+        self.assertEqual(query, docs[1])
+        self.assertEqual(emb.embed_query("mug"), docs[0])
+        self.assertEqual(self.inner.texts, 2)
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads[:3])
+
+    def test_namespaces_are_isolated(self):
+        """Test different models never share vectors"""
+        CachedEmbeddings(self.inner, "model-a", cache_dir=self.tmpdir).embed_query("mug")
+        other = CountingEmbeddings(size=4)
+        CachedEmbeddings(other, "model-b", cache_dir=self.tmpdir).embed_query("mug")
+        self.assertEqual(other.calls, 1)
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    """Tests for the on-disk store shared between processes"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_interrupted_append_is_cut_off(self):
+        store = EmbeddingStore(self.tmpdir)
+        store.put_many([content_key("a")], [[1.0, 1.0]])
+        # A crash after the vector append, before the key append
+        with open(store.vectors_path, "ab") as f:
+            f.write(np.asarray([[9.0, 9.0]], dtype=np.float32).tobytes())
+        reopened = EmbeddingStore(self.tmpdir)
+        self.assertEqual(os.path.getsize(reopened.vectors_path), 8)
+        reopened.put_many([content_key("b")], [[2.0, 2.0]])
+        self.assertEqual(EmbeddingStore(self.tmpdir).get_many([content_key("b")])[0].tolist(), [2.0, 2.0])
+
+    def test_two_writers_number_rows_from_the_files(self):
+        ingest, server = EmbeddingStore(self.tmpdir), EmbeddingStore(self.tmpdir)
+        ingest.put_many([content_key("p")], [[5.0, 5.0]])
+        server.put_many([content_key("q")], [[7.0, 7.0]])
+        ingest.put_many([content_key("r")], [[3.0, 3.0]])
+        for store in (server, ingest, EmbeddingStore(self.tmpdir)):
+            self.assertEqual([v.tolist() for v in store.get_many([content_key(k) for k in "pqr"])],
+                             [[5.0, 5.0], [7.0, 7.0], [3.0, 3.0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import sqlite3
+import tempfile
+import shutil
+import os
+import pandas as pd
+from unittest.mock import patch
+from chatbot.agent import ConversationAgent
+from ingest.create_outlets_db import create_outlets_db
+from chatbot.gazetteer import Gazetteer, OutletGazetteer, DEFAULT_CITIES, DEFAULT_OUTLETS, outlet_label, address_city
+
+OUTLETS = [
+    ("ZUS Coffee - SS 2", "No. 75, Jalan SS 2/67, SS 2, 47300 Petaling Jaya, Selangor"),
+    ("ZUS Coffee - Subang Jaya", "G-01, Jalan SS 15/4d, SS 15, 47500 Subang Jaya, Selangor"),
+    ("ZUS Coffee - Binjai 8", "G04, Binjai 8 Premium SOHO, No. 2, Lorong Binjai, 50450 Kuala Lumpur"),
+    ("ZUS Coffee - Wangsa Maju", "Lot F1.11, First Floor, AEON BiG Wangsa Maju, Jalan 8/27A, 53300 Kuala Lumpur"),
+    ("ZUS Coffee - Shah Alam", "No. 5, Jalan Eserina AA U16/AA, City of Elmina, 40150 Shah Alam, Selangor"),
+    ("ZUS Coffee - Sri Petaling", "No. 88, Jalan Radin Anum 1, Bandar Baru Sri Petaling, 57000 Kuala Lumpur"),
+]
+
+
+def write_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE IF EXISTS outlets")
+    conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+    conn.executemany("INSERT INTO outlets VALUES (?, ?, '8:00 AM - 10:00 PM', 'Dine-in')", rows)
+    conn.commit()
+    conn.close()
+
+
+class TestGazetteer(unittest.TestCase):
+    """Tests for the place-name token trie"""
+
+    def setUp(self):
+        self.gazetteer = Gazetteer(DEFAULT_CITIES, DEFAULT_OUTLETS)
+
+    def test_spacing_and_alias_variants(self):
+        cases = {
+            "SS 2 please": "SS 2",
+            "ss2 please": "SS 2",
+            "is SS-2 open": "SS 2",
+            "montkiara hours": "Mont Kiara",
+            "mt kiara hours": "Mont Kiara",
+            "KLCC": "KLCC",
+        }
+        for text, outlet in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(self.gazetteer.resolve(text).get("outlet"), outlet)
+
+    def test_city_aliases(self):
+        self.assertEqual(self.gazetteer.resolve("anything in PJ?"), {"city": "Petaling Jaya"})
+        self.assertEqual(self.gazetteer.resolve("Is there an outlet in Petaling Jaya?"), {"city": "Petaling Jaya"})
+
+    def test_leftmost_longest_and_whole_tokens(self):
+        self.assertEqual(self.gazetteer.resolve("Sentul or Bangsar?")["outlet"], "Sentul")
+        self.assertEqual(self.gazetteer.resolve("klccx"), {})
+        gazetteer = Gazetteer([], ["Subang", "Subang Jaya"])
+        self.assertEqual(gazetteer.resolve("subang jaya outlet")["outlet"], "Subang Jaya")
+        self.assertEqual(gazetteer.resolve("subang outlet")["outlet"], "Subang")
+
+    def test_parses_table_rows(self):
+        self.assertEqual(outlet_label("ZUS Coffee – Binjai 8"), "Binjai 8")
+        self.assertIsNone(outlet_label("Kuala Lumpur/Selangor,Store"))
+        self.assertEqual(address_city(OUTLETS[0][1]), "Petaling Jaya")
+
+    def test_many_outlets(self):
+        gazetteer = Gazetteer([], [f"Outlet {i}" for i in range(20000)] + ["Wangsa Maju"])
+        self.assertEqual(gazetteer.resolve("is wangsa maju open")["outlet"], "Wangsa Maju")
+        self.assertEqual(gazetteer.resolve("outlet 19999 hours")["outlet"], "Outlet 19999")
+
+
+class TestOutletGazetteer(unittest.TestCase):
+    """Tests for the DB-backed gazetteer"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        write_db(self.db_path, OUTLETS)
+        self.gazetteer = OutletGazetteer(db_path=self.db_path, check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_outlets_from_table(self):
+        self.assertEqual(self.gazetteer.resolve("Binjai8 opening hours")["outlet"], "Binjai 8")
+        self.assertEqual(self.gazetteer.resolve("wangsa maju")["outlet"], "Wangsa Maju")
+        self.assertEqual(self.gazetteer.resolve("Sri Petaling")["outlet"], "Sri Petaling")
+        self.assertEqual(self.gazetteer.resolve("outlets in shah alam")["city"], "Shah Alam")
+        self.assertEqual(self.gazetteer.stats()["db_outlets"], len(OUTLETS))
+
+    def test_reloads_when_db_changes(self):
+        self.assertNotIn("outlet", self.gazetteer.resolve("Desa Pandan"))
+        write_db(self.db_path, OUTLETS + [("ZUS Coffee - Desa Pandan", "No. 35, Jalan 3/76D, 55100 Kuala Lumpur")])
+        st = os.stat(self.db_path)
+        os.utime(self.db_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.gazetteer.resolve("Desa Pandan")["outlet"], "Desa Pandan")
+        self.assertEqual(self.gazetteer.stats()["reloads"], 2)
+
+    def test_db_checked_once_per_interval_and_results_cached(self):
+        gazetteer = OutletGazetteer(db_path=self.db_path, check_interval=3600)
+        self.assertEqual(gazetteer.resolve("wangsa maju")["outlet"], "Wangsa Maju")
+        with patch('chatbot.gazetteer.os.stat', side_effect=AssertionError("stat within the interval")):
+            gazetteer.resolve("wangsa maju")["outlet"] = "changed by the caller"
+            self.assertEqual(gazetteer.resolve("wangsa maju")["outlet"], "Wangsa Maju")
+        self.assertEqual(gazetteer.stats()["cache_hits"], 2)
+
+    def test_db_seeded_from_scraped_csv(self):
+        csv_path = os.path.join(self.tmpdir, "outlets.csv")
+        pd.DataFrame([{"name": name, "address": address, "opening_hours": "8:00 AM - 10:00 PM", "services": "Dine-in"}
+                      for name, address in OUTLETS]).to_csv(csv_path, index=False)
+        db_path = os.path.join(self.tmpdir, "seeded.db")
+        create_outlets_db(db_path, csv_path=csv_path)
+        gazetteer = OutletGazetteer(db_path=db_path)
+        self.assertEqual(gazetteer.resolve("binjai 8")["outlet"], "Binjai 8")
+        self.assertEqual(gazetteer.stats()["db_outlets"], len(OUTLETS))
+
+    def test_missing_db_uses_defaults(self):
+        gazetteer = OutletGazetteer(db_path=os.path.join(self.tmpdir, "missing.db"))
+        self.assertEqual(gazetteer.resolve("ss2")["outlet"], "SS 2")
+
+    @patch('chatbot.tools.OutletSQLTool.run')
+    def test_agent_resolves_table_outlets(self, mock_outlet):
+        mock_outlet.return_value = {"results": [
+            {"name": "ZUS Coffee - Wangsa Maju", "address": "AEON BiG Wangsa Maju", "opening_hours": "9:00 AM - 10:00 PM"}
+        ]}
+        with patch('chatbot.agent.get_gazetteer', return_value=self.gazetteer):
+            agent = ConversationAgent()
+            self.assertEqual(agent.parse_intent("Wangsa Maju?"), "outlet")
+            resp = agent.process_turn("Wangsa Maju?")
+        self.assertEqual(agent.slots["current_outlet"], "Wangsa Maju")
+        mock_outlet.assert_called_once_with("Wangsa Maju outlet")
+        self.assertIn("9:00 AM", resp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import tempfile
+import hashlib
+import shutil
+import os
+from ingest.crawler import Crawler
+from ingest.http_cache import CacheMiss, ResponseCache
+from ingest.scrape_products import PARSER, scrape_zus_drinkware
+from tests.fixture_site import FixtureSite, shop_routes
+
+
+def with_etags(routes):
+    """Serve each route with a content ETag and answer 304 when the client already has it"""
+    def serve(response):
+        status, headers, body = response
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+
+        def route(handler):
+            if handler.headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return status, {**headers, "ETag": etag}, body
+        return route
+    return {path: serve(response) for path, response in routes.items()}
+
+
+class TestResponseCache(unittest.TestCase):
+    """Tests for the content-addressed response store"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.tmpdir)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_identical_bodies_are_stored_once(self):
+        first = self.cache.store("http://a/1", b"same", etag='"x"', content_type="text/html")
+        second = self.cache.store("http://a/2", b"same")
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.body(first), b"same")
+        self.assertEqual(self.cache.lookup("http://a/1").validators(), {"If-None-Match": '"x"'})
+        self.assertEqual(self.cache.stats(), {"urls": 2, "bodies": 1, "parsed": 0})
+
+    def test_parses_are_keyed_by_body(self):
+        sha = self.cache.store("http://a/1", b"v1")
+        self.cache.store_parsed("p.v1", "http://a/1", sha, [{"title": "Cup"}], ["http://a/2"])
+        self.assertEqual(self.cache.parsed("p.v1", "http://a/1", sha), ([{"title": "Cup"}], ["http://a/2"]))
+        self.assertIsNone(self.cache.parsed("p.v2", "http://a/1", sha))
+        self.assertIsNone(self.cache.parsed("p.v1", "http://a/1", self.cache.store("http://a/1", b"v2")))
+
+
+class TestCachedCrawl(unittest.TestCase):
+    """Tests for conditional re-crawls and offline replay"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ResponseCache(os.path.join(self.tmpdir, "http"))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmpdir)
+
+    def scrape(self, site_url, name, replay=False):
+        path = os.path.join(self.tmpdir, name)
+        with Crawler(workers=4, rate=1000, burst=100, cache=self.cache, replay=replay) as crawler:
+            products = scrape_zus_drinkware(shop_url=site_url, output_path=path, crawler=crawler)
+        with open(path, "rb") as f:
+            return products, f.read()
+
+    def test_unchanged_pages_are_revalidated_not_reparsed(self):
+        routes = with_etags(shop_routes(20, per_page=10))
+        with FixtureSite(routes) as site:
+            first, first_bytes = self.scrape(site.url, "first.jsonl")
+            headers_seen = len(site.request_headers["/products/cup-3"])
+            with Crawler(workers=4, rate=1000, burst=100, cache=self.cache) as crawler:
+                result = crawler.crawl([f"{site.url}/collections/tumbler"], lambda url, r: self.fail("re-parsed"),
+                                       parser=PARSER)
+            second, second_bytes = self.scrape(site.url, "second.jsonl")
+        self.assertEqual(len(first), 20)
+        self.assertEqual(result.not_modified, result.pages)
+        self.assertEqual(result.parsed, 0)
+        self.assertEqual(len(result.items), 20)
+        self.assertIn("If-None-Match", site.request_headers["/products/cup-3"][headers_seen])
+        self.assertEqual(first_bytes, second_bytes)
+
+    def test_changed_page_is_reparsed(self):
+        routes = shop_routes(5)
+        with FixtureSite(with_etags(routes)) as site:
+            self.scrape(site.url, "first.jsonl")
+            site.routes.update(with_etags({"/products/cup-2": shop_routes(5)["/products/cup-4"]}))
+            with Crawler(workers=2, rate=1000, burst=100, cache=self.cache) as crawler:
+                result = crawler.crawl([f"{site.url}/collections/tumbler"], lambda url, r: ([url], []),
+                                       parser=PARSER)
+        self.assertEqual(result.parsed, 1)
+        self.assertIn(f"{site.url}/products/cup-2", result.items)
+
+    def test_replay_is_offline_and_reproducible(self):
+        with FixtureSite(with_etags(shop_routes(12))) as site:
+            online, online_bytes = self.scrape(site.url, "online.jsonl")
+        # The site is gone; replay rebuilds the same file from the cache
+        replayed, replayed_bytes = self.scrape(site.url, "replayed.jsonl", replay=True)
+        self.assertEqual(online_bytes, replayed_bytes)
+        with Crawler(cache=self.cache, replay=True) as crawler:
+            with self.assertRaises(CacheMiss):
+                crawler.fetch(f"{site.url}/products/never-fetched")
+
+    def test_replay_needs_a_cache(self):
+        with self.assertRaises(ValueError):
+            Crawler(replay=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
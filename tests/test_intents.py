@@ -0,0 +1,51 @@
+import unittest
+import random
+from chatbot.intents import recognize, INTENT_KEYWORDS
+from chatbot.gazetteer import DEFAULT_CITIES, DEFAULT_OUTLETS
+from benchmarks.legacy_intents import legacy_parse_intent, legacy_extract_calculation
+
+
+def random_message(rng: random.Random) -> str:
+    words = [w for ws in INTENT_KEYWORDS.values() for w in ws] + DEFAULT_CITIES + DEFAULT_OUTLETS + [
+        "hi", "the", "is", "what", "addr", "klc", "ss", "2", "5", "12", "3.5", "+", "-", "*", "/", "(", ")",
+        "  ", "?", ",", "ZUS", "coffee", "kuala", "mont", "x",
+    ]
+    parts = []
+    for _ in range(rng.randint(0, 10)):
+        word = rng.choice(words)
+        word = rng.choice([word, word.upper(), word.title(), word.lower()])
+        parts.append(word + rng.choice(["", " ", "  ", ", "]))
+    return "".join(parts)
+
+
+class TestIntentRecognizer(unittest.TestCase):
+    """The compiled recognizer must agree with the keyword scans it replaced (slots: see test_gazetteer)"""
+
+    CASES = [
+        "Calculate 5 * 6", "Calculate", "Tell me about ZUS tumblers", "Is there an outlet in Petaling Jaya?",
+        "SS 2, whats the opening time?", "What are the opening hours?", "What about Bangsar?", "What's the address?",
+        "what is 5*6", "klcc", "KL", "ss2 store", "10 / 2 in Damansara", "buy a mug", "Hello!", "", "   ", "(3+4)*2",
+    ]
+
+    def assertMatchesLegacy(self, text):
+        result = recognize(text)
+        self.assertEqual(result.intent, legacy_parse_intent(text), text)
+        self.assertEqual(result.calc_expr, legacy_extract_calculation(text), text)
+
+    def test_known_cases(self):
+        for text in self.CASES:
+            with self.subTest(text=text):
+                self.assertMatchesLegacy(text)
+
+    def test_random_messages(self):
+        rng = random.Random(12)
+        for _ in range(5000):
+            self.assertMatchesLegacy(random_message(rng))
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(recognize("address").intent, "calculate")
+        self.assertEqual(recognize("klcc").intent, "outlet")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import tempfile
+import json
+import os
+from unittest.mock import patch
+from langchain_core.documents import Document
+from chatbot import services
+from chatbot.lexical_index import LexicalIndex, ProductLexicalIndex, fuse, tokenize
+
+CATALOG = [
+    {"title": "OG Cup 2.0 | 500ml", "price": "RM 49.90", "description": "Quality ZUS Coffee drinkware"},
+    {"title": "All Day Cup | 500ml", "price": "RM 49.90", "description": "Quality ZUS Coffee drinkware"},
+    {"title": "All Day Cup Aqua | 500ml", "price": "N/A", "description": "Quality ZUS Coffee drinkware"},
+    {"title": "All-Can Tumbler | 600ml", "price": "RM 59.90", "description": "Quality ZUS Coffee drinkware"},
+    {"title": "Stainless Steel Mug | 420ml", "price": "N/A", "description": "Double-wall insulated mug"},
+    {"title": "Frozee Cold Cup | 650ml", "price": "N/A", "description": "Quality ZUS Coffee drinkware"},
+]
+
+
+def titles(index, hits):
+    return [index.records[doc_id]["title"] for doc_id, _ in hits]
+
+
+class TestLexicalIndex(unittest.TestCase):
+    """Tests for BM25 product retrieval"""
+
+    def setUp(self):
+        self.index = LexicalIndex(CATALOG)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("OG CUP 2.0 | 500ml tumblers"), ["og", "cup", "2.0", "500", "ml", "tumbler"])
+        self.assertEqual(tokenize("glass"), ["glass"])
+
+    def test_exact_name_ranks_first(self):
+        self.assertEqual(titles(self.index, self.index.search("OG CUP 2.0"))[0], "OG Cup 2.0 | 500ml")
+        self.assertEqual(titles(self.index, self.index.search("price of the og cup 2.0?"))[0], "OG Cup 2.0 | 500ml")
+
+    def test_longest_name_wins(self):
+        self.assertEqual(titles(self.index, self.index.search("all day cup aqua", k=2)),
+                         ["All Day Cup Aqua | 500ml", "All Day Cup | 500ml"])
+
+    def test_plural_query(self):
+        self.assertEqual(titles(self.index, self.index.search("What tumblers do you have?")), ["All-Can Tumbler | 600ml"])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("hello"), [])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "bm25.json")
+            self.index.save(path)
+            loaded = LexicalIndex.load(path)
+        for query in ["og cup", "mug", "all day cup aqua"]:
+            self.assertEqual(loaded.search(query), self.index.search(query))
+
+    def test_fuse_keeps_exact_name_first(self):
+        dense = [Document(page_content=r["title"], metadata={"title": r["title"], "price": r["price"]})
+                 for r in (CATALOG[5], CATALOG[1], CATALOG[0])]
+        query = "OG CUP 2.0"
+        fused = fuse(query, self.index, self.index.search(query, 10), dense)
+        self.assertEqual(fused[0].metadata["title"], "OG Cup 2.0 | 500ml")
+        self.assertEqual(len(fused), 3)
+
+    def test_fuse_rewards_agreement(self):
+        dense = [Document(page_content="x", metadata={"title": "Stainless Steel Mug | 420ml"}),
+                 Document(page_content="y", metadata={"title": "Unrelated"})]
+        fused = fuse("insulated", self.index, self.index.search("insulated", 10), dense, k=2)
+        self.assertEqual(fused[0].metadata["title"], "Stainless Steel Mug | 420ml")
+
+
+class TestProductLexicalIndex(unittest.TestCase):
+    """Tests for loading the BM25 index and the offline product answer"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_path = os.path.join(self.tmpdir.name, "drinkware.jsonl")
+        with open(self.data_path, "w") as f:
+            f.write("\n".join(json.dumps(r) for r in CATALOG))
+        self.path = os.path.join(self.tmpdir.name, "bm25.json")
+        self.lexical = ProductLexicalIndex(path=self.path, data_path=self.data_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_falls_back_to_catalog_then_prefers_saved_index(self):
+        self.assertEqual(self.lexical.search("mug")[0].metadata["title"], "Stainless Steel Mug | 420ml")
+        self.assertEqual(self.lexical.stats()["source"], self.data_path)
+        LexicalIndex(CATALOG[:1]).save(self.path)
+        self.assertEqual(len(self.lexical.load()), 1)
+        self.assertEqual(self.lexical.stats()["source"], self.path)
+
+    def test_missing_catalog(self):
+        lexical = ProductLexicalIndex(path="missing.json", data_path="missing.jsonl")
+        self.assertEqual(lexical.search("mug"), [])
+        dense = [Document(page_content="a", metadata={"title": "A"})] * 5
+        self.assertEqual(len(lexical.hybrid_search("mug", dense)), 3)
+
+    def test_offline_answer(self):
+        with patch('chatbot.services.get_lexical_index', return_value=self.lexical):
+            data = services.lexical_products("og cup 2.0")
+            self.assertEqual(data["sources"][0], {"title": "OG Cup 2.0 | 500ml", "price": "RM 49.90"})
+            self.assertIn("OG Cup 2.0 | 500ml** (RM 49.90)", data["answer"])
+            self.assertEqual(services.lexical_products("hello")["answer"], services.NO_PRODUCT_MATCH)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import tempfile
+import sqlite3
+import shutil
+import os
+from chatbot.outlet_db import OutletDB
+
+
+class TestOutletDB(unittest.TestCase):
+    """Tests for the pooled outlet data-access layer"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", [
+            ("ZUS Coffee - SS 2", "Jalan SS 2/67, Petaling Jaya", "8:00 AM - 10:00 PM", "Dine-in, Takeaway"),
+            ("ZUS Coffee - Bangsar", "Jalan Telawi 3, Bangsar Baru", "7:00 AM - 11:00 PM", "Dine-in, Delivery"),
+        ])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_missing_db(self):
+        """Test a missing DB file is reported instead of created"""
+        db = OutletDB(db_path=os.path.join(self.tmpdir, "missing.db"))
+        self.assertFalse(db.connect())
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "missing.db")))
+
+    def test_search_on_disk(self):
+        """Test LIKE lookup against the on-disk database"""
+        db = OutletDB(db_path=self.db_path)
+        rows = db.search("Bangsar")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "ZUS Coffee - Bangsar")
+        db.close()
+
+    def test_search_in_memory_replica(self):
+        """Test the in-memory replica serves the same rows as the file"""
+        db = OutletDB(db_path=self.db_path, in_memory=True)
+        self.assertEqual(len(db.search("ZUS")), 2)
+        os.remove(self.db_path)
+        self.assertEqual(db.search("SS 2")[0]["name"], "ZUS Coffee - SS 2")
+        db.close()
+
+    def test_connections_are_read_only(self):
+        """Test writes are rejected in both modes"""
+        for in_memory in (False, True):
+            with self.subTest(in_memory=in_memory):
+                db = OutletDB(db_path=self.db_path, in_memory=in_memory)
+                with self.assertRaises(Exception):
+                    db.execute("DELETE FROM outlets")
+                self.assertEqual(len(db.search("ZUS")), 2)
+                db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import sqlite3
+import shutil
+import os
+from chatbot.outlet_db import OutletDB, create_fts_index, fts_match
+
+ROWS = [
+    ("ZUS Coffee - SS 2", "Jalan SS 2/67, 47300 Petaling Jaya", "8:00 AM - 10:00 PM", "Dine-in, Takeaway, Drive-thru"),
+    ("ZUS Coffee - Bangsar", "Jalan Telawi 3, Bangsar Baru, 59100 Kuala Lumpur", "7:00 AM - 11:00 PM", "Dine-in, Delivery"),
+    ("ZUS Coffee - Damansara", "Damansara Uptown, Jalan SS21/1, 47400 Petaling Jaya", "8:00 AM - 10:00 PM", "Takeaway"),
+]
+
+
+class TestOutletFullText(unittest.TestCase):
+    """Tests for the FTS5 outlet index"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", ROWS)
+        create_fts_index(conn)
+        conn.close()
+        self.db = OutletDB(db_path=self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def names(self, query):
+        return [row["name"] for row in self.db.search(query)]
+
+    def test_multi_token(self):
+        """Test words that are not one contiguous substring still match"""
+        self.assertEqual(self.names("bangsar hours"), ["ZUS Coffee - Bangsar"])
+        self.assertEqual(self.names("telawi kuala lumpur"), ["ZUS Coffee - Bangsar"])
+
+    def test_prefix(self):
+        self.assertEqual(self.names("bangs"), ["ZUS Coffee - Bangsar"])
+        self.assertEqual(self.names("drive"), ["ZUS Coffee - SS 2"])
+
+    def test_name_hit_ranks_first(self):
+        self.assertEqual(self.names("damansara")[0], "ZUS Coffee - Damansara")
+        self.assertEqual(self.names("ss2")[0], "ZUS Coffee - SS 2")
+
+    def test_no_match(self):
+        self.assertEqual(self.names("penang"), [])
+        self.assertEqual(self.names("!!!"), [])
+
+    def test_fts_syntax_is_quoted(self):
+        self.assertEqual(fts_match('bangsar" OR name:*'), '"bangsar"* AND "or"* AND "name"*')
+        self.assertEqual(self.names('"bangsar" NEAR('), ["ZUS Coffee - Bangsar"])
+
+    def test_triggers_keep_index_in_sync(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO outlets VALUES ('ZUS Coffee - Sentul', 'Jalan Ipoh, Sentul', '7:00 AM - 9:00 PM', 'Dine-in')")
+        conn.execute("UPDATE outlets SET address = 'Jalan Bukit Bintang' WHERE name = 'ZUS Coffee - Bangsar'")
+        conn.execute("DELETE FROM outlets WHERE name = 'ZUS Coffee - Damansara'")
+        conn.commit()
+        conn.close()
+        self.assertEqual(self.names("sentul"), ["ZUS Coffee - Sentul"])
+        self.assertEqual(self.names("bintang"), ["ZUS Coffee - Bangsar"])
+        self.assertEqual(self.names("telawi"), [])
+        self.assertEqual(self.names("uptown"), [])
+
+    def test_in_memory_replica(self):
+        db = OutletDB(db_path=self.db_path, in_memory=True)
+        self.assertEqual([r["name"] for r in db.search("bangsar hours")], ["ZUS Coffee - Bangsar"])
+        self.assertTrue(db.stats()["full_text"])
+        db.close()
+
+    def test_search_many(self):
+        self.assertEqual([[r["name"] for r in rows] for rows in self.db.search_many(["bangsar hours", "drive"])],
+                         [["ZUS Coffee - Bangsar"], ["ZUS Coffee - SS 2"]])
+
+    def test_like_fallback_without_index(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE outlets_fts")
+        conn.commit()
+        conn.close()
+        self.assertFalse(self.db.stats()["full_text"])
+        self.assertEqual(self.names("Bangsar"), ["ZUS Coffee - Bangsar"])
+        self.assertEqual(self.names("bangsar hours"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import tempfile
+import sqlite3
+import random
+import shutil
+import os
+import numpy as np
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from chatbot.outlet_db import OutletDB
+from chatbot.geo import (bounding_box, create_geo_index, geocode, haversine_km, insert_locations, load_postcodes,
+                         nearest, GEO_SCHEMA)
+from main import app
+
+POSTCODES = {"47300": (3.1180, 101.6220), "59100": (3.1300, 101.6710), "50088": (3.1580, 101.7120),
+             "80000": (1.4655, 103.7578)}
+ROWS = [
+    ("ZUS Coffee - SS 2", "No. 1, Jalan SS 2/72, SS 2, 47300 Petaling Jaya, Selangor"),
+    ("ZUS Coffee - Bangsar", "No. 2, Jalan Telawi 3, Bangsar, 59100 Kuala Lumpur"),
+    ("ZUS Coffee - KLCC", "L2-15, Suria KLCC, Jalan Ampang, 50088 Kuala Lumpur"),
+    ("ZUS Coffee - Johor Bahru", "Jalan Wong Ah Fook, 80000 Johor Bahru"),
+    ("ZUS Coffee - Unknown", "Somewhere without a postcode"),
+]
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+    conn.executemany("INSERT INTO outlets VALUES (?, ?, '8:00 AM - 10:00 PM', 'Dine-in')", ROWS)
+    located = create_geo_index(conn, POSTCODES)
+    conn.close()
+    return located
+
+
+class TestGeo(unittest.TestCase):
+    """Tests for geocoding and the nearest-neighbour search"""
+
+    def test_haversine(self):
+        # KLCC to Johor Bahru is about 300 km in a straight line
+        km = haversine_km(3.1580, 101.7120, np.array([1.4655, 3.1580]), np.array([103.7578, 101.7120]))
+        self.assertAlmostEqual(km[0], 297, delta=5)
+        self.assertEqual(km[1], 0.0)
+        # One degree of longitude on the equator
+        self.assertAlmostEqual(haversine_km(0, 0, np.array([0.0]), np.array([1.0]))[0], 111.19, places=1)
+
+    def test_geocode(self):
+        self.assertEqual(geocode(ROWS[1][1], POSTCODES), ("59100", (3.1300, 101.6710)))
+        self.assertEqual(geocode("Lot 12345, Jalan Ampang, 50088 Kuala Lumpur", POSTCODES)[0], "50088")
+        self.assertIsNone(geocode("Jalan SS 2/72, 99999 Nowhere", POSTCODES))
+        self.assertIsNone(geocode(None, POSTCODES))
+
+    def test_bundled_postcodes(self):
+        postcodes = load_postcodes()
+        self.assertIn("47300", postcodes)
+        for lat, lon in postcodes.values():
+            self.assertTrue(0 < lat < 8 and 99 < lon < 120)
+
+    def test_bounding_box_contains_radius(self):
+        box = bounding_box(3.0, 101.0, 50)
+        for bearing in np.linspace(0, 2 * np.pi, 16):
+            lat = 3.0 + 0.449 * np.cos(bearing)
+            lon = 101.0 + 0.449 * np.sin(bearing)
+            if haversine_km(3.0, 101.0, np.array([lat]), np.array([lon]))[0] <= 50:
+                self.assertTrue(box["min_lat"] <= lat <= box["max_lat"] and box["min_lon"] <= lon <= box["max_lon"])
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(0)
+        conn = sqlite3.connect(":memory:")
+        for statement in GEO_SCHEMA:
+            conn.execute(statement)
+        points = [(i, rng.uniform(1, 7), rng.uniform(100, 119), None) for i in range(1, 2001)]
+        insert_locations(conn, points)
+        fetch = lambda sql, params: conn.execute(sql, params).fetchall()
+        lats = np.array([p[1] for p in points])
+        lons = np.array([p[2] for p in points])
+        for _ in range(20):
+            lat, lon, k = rng.uniform(0, 8), rng.uniform(99, 120), rng.randint(1, 30)
+            expected = np.argsort(haversine_km(lat, lon, lats, lons), kind="stable")[:k] + 1
+            self.assertEqual([i for i, _ in nearest(fetch, lat, lon, k)], expected.tolist())
+        # A point far from every outlet still finds them
+        self.assertEqual(len(nearest(fetch, -40.0, -70.0, 3)), 3)
+        # Asking for more than exist returns them all
+        self.assertEqual(len(nearest(fetch, 3.0, 101.0, 5000)), 2000)
+        conn.close()
+
+
+class TestNearbyEndpoint(unittest.TestCase):
+    """Tests for OutletDB.nearby and GET /outlets/nearby"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        self.assertEqual(make_db(self.db_path), (4, 5))
+        self.db = OutletDB(db_path=self.db_path)
+        self.patch = patch('chatbot.services.get_outlet_db', return_value=self.db)
+        self.patch.start()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.patch.stop()
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_nearest_first(self):
+        resp = self.client.get("/outlets/nearby", params={"lat": 3.1390, "lon": 101.6869, "k": 3})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([r["name"] for r in data["results"]],
+                         ["ZUS Coffee - Bangsar", "ZUS Coffee - KLCC", "ZUS Coffee - SS 2"])
+        distances = [r["distance_km"] for r in data["results"]]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(data["results"][0]["address"], ROWS[1][1])
+
+    def test_unlocated_outlets_are_skipped(self):
+        rows = self.db.nearby(1.5, 103.7, 10)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["name"], "ZUS Coffee - Johor Bahru")
+
+    def test_bad_input_is_422(self):
+        self.assertEqual(self.client.get("/outlets/nearby", params={"lat": 91, "lon": 101}).status_code, 422)
+        self.assertEqual(self.client.get("/outlets/nearby", params={"lat": 3, "lon": 101, "k": 0}).status_code, 422)
+        self.assertEqual(self.client.get("/outlets/nearby", params={"lat": 3}).status_code, 422)
+
+    def test_not_indexed_is_503(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE outlet_rtree")
+        conn.commit()
+        conn.close()
+        self.assertFalse(self.db.stats()["geo"])
+        self.assertEqual(self.client.get("/outlets/nearby", params={"lat": 3, "lon": 101}).status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import tempfile
+import sqlite3
+import shutil
+import os
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from chatbot import services
+from chatbot.outlet_db import OutletDB
+from chatbot.outlet_schema import (create_structured_index, parse_hours, parse_services, parse_time,
+                                   services_mask, SERVICE_BITS)
+from main import app
+
+ROWS = [
+    ("ZUS Coffee - SS 2", "Jalan SS 2/67", "8:00 AM - 10:00 PM", "Dine-in, Takeaway, Delivery, Drive-thru"),
+    ("ZUS Coffee - Bangsar", "Jalan Telawi 3", "7:00 AM - 11:00 PM", "Dine-in, Takeaway, Delivery"),
+    ("ZUS Coffee - Night Owl", "Jalan Ampang", "6pm - 2am", "Takeaway"),
+    ("ZUS Coffee - Weekday", "Jalan Ipoh", "Mon-Fri 9am-5pm, Sat & Sun: Closed", "Dine-in"),
+]
+
+
+class TestParsing(unittest.TestCase):
+    """Tests for parsing free-text hours and services"""
+
+    def test_single_range_every_day(self):
+        self.assertEqual(parse_hours("7:30 AM - 10:00 PM"), [(450, 1320)] * 7)
+
+    def test_day_ranges(self):
+        week = parse_hours("Mon-Fri 8am-10pm, Sat & Sun 9am-11pm")
+        self.assertEqual(week[:5], [(480, 1320)] * 5)
+        self.assertEqual(week[5:], [(540, 1380)] * 2)
+        self.assertEqual(parse_hours("Mon-Sat: 10:00-22:00; Sun: Closed")[6], None)
+        self.assertEqual(parse_hours("Weekends 8am to 10pm")[:5], [None] * 5)
+
+    def test_past_midnight_and_all_day(self):
+        self.assertEqual(parse_hours("6pm - 2am")[0], (1080, 1560))
+        self.assertEqual(parse_hours("24 hours")[3], (0, 1440))
+
+    def test_unparseable(self):
+        self.assertEqual(parse_hours(""), [None] * 7)
+        self.assertEqual(parse_hours("Call for hours"), [None] * 7)
+
+    def test_times(self):
+        self.assertEqual(parse_time("10pm"), 1320)
+        self.assertEqual(parse_time("22:00"), 1320)
+        self.assertEqual(parse_time("12am"), 0)
+        self.assertEqual(parse_time("12:30 PM"), 750)
+        with self.assertRaises(ValueError):
+            parse_time("noon")
+
+    def test_services(self):
+        self.assertEqual(parse_services("Dine-in, Takeaway, Delivery, Drive-thru"), 15)
+        self.assertEqual(parse_services("Drive Thru and delivery"), SERVICE_BITS["drive-thru"] | SERVICE_BITS["delivery"])
+        self.assertEqual(parse_services("Wifi"), 0)
+        self.assertEqual(services_mask(["drive thru", "Take-away"]), 10)
+        with self.assertRaises(ValueError):
+            services_mask(["valet"])
+
+
+class TestStructuredQueries(unittest.TestCase):
+    """Tests for SQL filtering on the parsed hours and services"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", ROWS)
+        self.assertEqual(create_structured_index(conn), 4)
+        conn.close()
+        self.db = OutletDB(db_path=self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def names(self, **filters):
+        return [row["name"].split(" - ")[1] for row in self.db.find(**filters)]
+
+    def test_open_at(self):
+        self.assertEqual(self.names(open_at=(0, 7 * 60 + 30)), ["Bangsar"])
+        self.assertEqual(self.names(open_at=(2, 12 * 60)), ["SS 2", "Bangsar", "Weekday"])
+        self.assertEqual(self.names(open_at=(6, 12 * 60)), ["SS 2", "Bangsar"])
+
+    def test_open_past_midnight(self):
+        """Test hours from the night before count after midnight"""
+        self.assertEqual(self.names(open_at=(1, 60)), ["Night Owl"])
+        self.assertEqual(self.names(open_at=(1, 3 * 60)), [])
+
+    def test_open_until(self):
+        self.assertEqual(self.names(open_until=(4, 22 * 60 + 30)), ["Bangsar", "Night Owl"])
+        self.assertEqual(self.names(open_until=(4, 60)), ["Night Owl"])
+
+    def test_services(self):
+        self.assertEqual(self.names(services=SERVICE_BITS["drive-thru"]), ["SS 2"])
+        self.assertEqual(self.names(services=SERVICE_BITS["delivery"] | SERVICE_BITS["dine-in"]), ["SS 2", "Bangsar"])
+
+    def test_combined_and_limit(self):
+        self.assertEqual(self.names(open_at=(0, 21 * 60), services=SERVICE_BITS["takeaway"]), ["SS 2", "Bangsar", "Night Owl"])
+        self.assertEqual(self.names(limit=2), ["SS 2", "Bangsar"])
+
+    def test_not_indexed(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE outlet_hours")
+        conn.commit()
+        conn.close()
+        with self.assertRaises(LookupError):
+            self.db.find(open_at=(0, 600))
+
+
+class TestFilterEndpoint(unittest.TestCase):
+    """Tests for GET /outlets/filter"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", ROWS)
+        create_structured_index(conn)
+        conn.close()
+        self.db = OutletDB(db_path=db_path)
+        self.patch = patch('chatbot.services.get_outlet_db', return_value=self.db)
+        self.patch.start()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.patch.stop()
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_filters(self):
+        resp = self.client.get("/outlets/filter", params={"day": "sat", "until": "10:30pm", "service": ["takeaway"]})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual([r["name"] for r in data["results"]], ["ZUS Coffee - Bangsar", "ZUS Coffee - Night Owl"])
+        self.assertEqual(data["filters"]["open_until"], {"day": "sat", "minute": 1350})
+        self.assertEqual(data["filters"]["services"], ["takeaway"])
+
+    def test_open_now(self):
+        with patch('chatbot.outlet_schema.now', return_value=(6, 60)):
+            data = self.client.get("/outlets/filter", params={"open_now": True}).json()
+        self.assertEqual([r["name"] for r in data["results"]], ["ZUS Coffee - Night Owl"])
+
+    def test_bad_input_is_400(self):
+        self.assertEqual(self.client.get("/outlets/filter", params={"service": "valet"}).status_code, 400)
+        self.assertEqual(self.client.get("/outlets/filter", params={"at": "noon"}).status_code, 400)
+        self.assertEqual(self.client.get("/outlets/filter", params={"day": "someday", "at": "9am"}).status_code, 400)
+        self.assertEqual(self.client.get("/outlets/filter", params={"open_now": True, "at": "9am"}).status_code, 400)
+
+    def test_service_function(self):
+        data = services.find_outlets(at="8:30", day="monday", services=["drive-thru"])
+        self.assertEqual(data["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,7 @@ class TestOutletsAPI(unittest.TestCase):
 
             health_data = resp.json()
             if not health_data.get("outlet_db_exists"):
-                raise unittest.SkipTest("Outlet database not initialized. Run: python ingest/create_outlets_db.py")
+                raise unittest.SkipTest("Outlet database not initialized. Run: python -m ingest.create_outlets_db")
         except requests.exceptions.RequestException:
             raise unittest.SkipTest("API server not available")
     
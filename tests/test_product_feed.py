@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import shutil
+import json
+import os
+from ingest.crawler import Crawler
+from ingest.scrape_products import parse_feed, scrape_zus_drinkware
+from tests.fixture_site import FixtureSite, feed_product, products_feed, shop_routes
+
+
+class TestParseFeed(unittest.TestCase):
+    """Tests for reading one products.json page"""
+
+    def test_product_fields(self):
+        data = json.dumps({"products": [feed_product(3, prices=("59.90", "49.90"))]})
+        products, next_pages = parse_feed("https://shop.example/products.json?limit=250&page=1", data)
+        self.assertEqual(products, [{
+            "title": "Cup 3 | 500ml", "price": "RM 49.90 - RM 59.90", "description": "Insulated cup number 3.",
+            "url": "https://shop.example/products/cup-3", "variants": ["Colour 0", "Colour 1"],
+        }])
+        # A short page is the last one
+        self.assertEqual(next_pages, [])
+
+    def test_full_page_links_the_next(self):
+        data = json.dumps({"products": [feed_product(i) for i in range(2)]})
+        products, next_pages = parse_feed("https://shop.example/collections/tumbler/products.json?limit=2&page=4", data)
+        self.assertEqual(products[0]["price"], "RM 49.90")
+        self.assertEqual(products[0]["variants"], [])
+        self.assertEqual(next_pages, ["https://shop.example/collections/tumbler/products.json?limit=2&page=5"])
+
+
+class TestFeedIngestion(unittest.TestCase):
+    """Tests for catalog ingestion from the feed against a local fixture shop"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "drinkware.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def scrape(self, routes):
+        with FixtureSite(routes) as site, Crawler(workers=4, rate=1000, burst=100) as crawler:
+            products = scrape_zus_drinkware(shop_url=site.url, output_path=self.path, crawler=crawler)
+        return site, products
+
+    def test_collection_feed_in_a_few_requests(self):
+        routes = {"/collections/tumbler/products.json": products_feed([feed_product(i) for i in range(600)])}
+        site, products = self.scrape(routes)
+        self.assertEqual(len(products), 600)
+        self.assertEqual(site.requests, {
+            f"/collections/tumbler/products.json?limit=250&page={page}": 1 for page in (1, 2, 3)
+        })
+        with open(self.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([p["url"] for p in lines[:2]], [f"{site.url}/products/cup-0", f"{site.url}/products/cup-1"])
+        self.assertEqual(lines[-1]["title"], "Cup 599 | 500ml")
+
+    def test_exact_multiple_of_the_page_size_stops_on_an_empty_page(self):
+        site, products = self.scrape({"/products.json": products_feed([feed_product(i) for i in range(500)])})
+        self.assertEqual(len(products), 500)
+        # The collection feed 404s, then the shop feed takes pages 1-2 and an empty page 3
+        self.assertEqual(sum(n for path, n in site.requests.items() if path.startswith("/products.json")), 3)
+
+    def test_html_fallback_without_a_feed(self):
+        site, products = self.scrape(shop_routes(5))
+        self.assertEqual(len(products), 5)
+        self.assertNotIn("variants", products[0])
+        self.assertEqual(site.requests["/products/cup-4"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
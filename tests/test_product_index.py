@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+import shutil
+import os
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from chatbot.product_index import ProductIndex
+
+
+class TestProductIndex(unittest.TestCase):
+    """Tests for the shared product index service"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "product_kb")
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        docs = [
+            Document(page_content="OG CUP 2.0 - Screw-on lid tumbler", metadata={"title": "OG CUP 2.0", "price": "RM 49.90"}),
+            Document(page_content="OG Ceramic Mug - Microwave safe", metadata={"title": "OG Ceramic Mug", "price": "RM 39.90"}),
+        ]
+        FAISS.from_documents(docs, self.embeddings).save_local(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_missing_index(self):
+        """Test a missing KB is reported instead of raising on load"""
+        index = ProductIndex(path=os.path.join(self.tmpdir, "missing"), embeddings=self.embeddings)
+        self.assertFalse(index.load())
+        self.assertEqual(index.stats()["size"], 0)
+        with self.assertRaises(FileNotFoundError):
+            index.search("tumbler")
+
+    def test_loads_once_and_reports_stats(self):
+        """Test the index is loaded once and shared by later searches"""
+        index = ProductIndex(path=self.path, embeddings=self.embeddings)
+        self.assertTrue(index.load())
+        vectorstore = index.vectorstore
+        index.search("OG CUP 2.0 - Screw-on lid tumbler", k=1)
+        self.assertIs(index.vectorstore, vectorstore)
+
+        stats = index.stats()
+        self.assertTrue(stats["loaded"])
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["dimension"], 16)
+        self.assertIsNotNone(stats["load_time_ms"])
+
+    def test_search_returns_documents(self):
+        """Test search returns top-k documents with metadata"""
+        index = ProductIndex(path=self.path, embeddings=self.embeddings)
+        docs = index.search("OG Ceramic Mug - Microwave safe", k=1)
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0].metadata["title"], "OG Ceramic Mug")
+
+    def test_reload_swaps_in_a_rebuild(self):
+        """Test a rebuild is detected and the old index serves until the new one is loaded"""
+        index = ProductIndex(path=self.path, embeddings=self.embeddings)
+        index.load()
+        old = index.vectorstore
+        docs = [Document(page_content="Frozee Cold Cup - Iced drinks", metadata={"title": "Frozee", "price": "RM 44.90"})]
+        FAISS.from_documents(docs, self.embeddings).save_local(self.path)
+        os.utime(os.path.join(self.path, "index.faiss"), ns=(1, 1))
+        self.assertTrue(index.is_stale())
+        self.assertTrue(index.reload())
+        self.assertIsNot(index.vectorstore, old)
+        self.assertFalse(index.is_stale())
+        self.assertEqual(index.search("Frozee Cold Cup - Iced drinks", k=1)[0].metadata["title"], "Frozee")
+
+    def test_failed_reload_keeps_the_loaded_index(self):
+        """Test a reload that cannot read the new build leaves searches working"""
+        index = ProductIndex(path=self.path, embeddings=self.embeddings)
+        index.load()
+        with open(os.path.join(self.path, "index.faiss"), "wb") as f:
+            f.write(b"truncated")
+        self.assertTrue(index.is_stale())
+        self.assertTrue(index.reload())
+        self.assertEqual(len(index.search("OG Ceramic Mug - Microwave safe", k=1)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
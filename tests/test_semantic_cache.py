@@ -0,0 +1,70 @@
+import unittest
+import time
+import numpy as np
+from chatbot.semantic_cache import SemanticAnswerCache
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """Tests for the product RAG semantic answer cache"""
+
+    def setUp(self):
+        self.cache = SemanticAnswerCache(threshold=0.95, max_entries=8, ttl=3600)
+        self.cache.check_version(1)
+        self.sources = [{"title": "OG CUP 2.0", "price": "RM 49.90"}]
+
+    def test_similar_query_hits(self):
+        """Test a near-identical embedding returns the cached answer"""
+        self.cache.store([1.0, 0.0, 0.0], "Tumblers!", self.sources)
+        hit = self.cache.lookup([0.99, 0.05, 0.0])
+        self.assertEqual(hit["answer"], "Tumblers!")
+        self.assertEqual(hit["sources"], self.sources)
+
+    def test_dissimilar_query_misses(self):
+        """Test embeddings below the threshold are misses"""
+        self.cache.store([1.0, 0.0, 0.0], "Tumblers!", self.sources)
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_version_change_invalidates(self):
+        """Test a rebuilt product KB clears the cache"""
+        self.cache.store([1.0, 0.0, 0.0], "Tumblers!", self.sources)
+        self.cache.check_version(2)
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0, 0.0]))
+
+    def test_expired_entries_ignored(self):
+        """Test entries older than the TTL are not returned"""
+        cache = SemanticAnswerCache(threshold=0.95, max_entries=8, ttl=0)
+        cache.store([1.0, 0.0], "Mugs!", [])
+        time.sleep(0.01)
+        self.assertIsNone(cache.lookup([1.0, 0.0]))
+
+    def test_size_bounded(self):
+        """Test the cache never grows past max_entries and keeps the newest"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(40, 16))
+        for i, v in enumerate(vectors):
+            self.cache.store(v, f"answer {i}", [])
+        self.assertLessEqual(len(self.cache), 8)
+        self.assertEqual(self.cache.lookup(vectors[-1])["answer"], "answer 39")
+
+
+    def test_small_capacities(self):
+        """Test caches smaller than four entries still evict the oldest, and size 0 disables caching"""
+        vectors = np.eye(6)
+        for max_entries in (1, 2, 3):
+            with self.subTest(max_entries=max_entries):
+                cache = SemanticAnswerCache(threshold=0.95, max_entries=max_entries, ttl=3600)
+                for i, v in enumerate(vectors):
+                    cache.store(v, f"answer {i}", [])
+                self.assertEqual(len(cache), max_entries)
+                self.assertEqual(cache.lookup(vectors[-1])["answer"], "answer 5")
+                self.assertIsNone(cache.lookup(vectors[0]))
+        disabled = SemanticAnswerCache(max_entries=0)
+        disabled.store(vectors[0], "answer", [])
+        self.assertEqual(len(disabled), 0)
+        self.assertIsNone(disabled.lookup(vectors[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import Mock
+from chatbot.agent import ConversationAgent
+from chatbot.sessions import SessionManager
+
+
+class MockLLM:
+    def invoke(self, prompt: str):
+        return Mock(content="I'm a friendly coffee bot!")
+
+
+class TestSessionManager(unittest.TestCase):
+    """Tests for per-session agent state"""
+
+    def setUp(self):
+        self.prototype = ConversationAgent(llm=MockLLM())
+
+    def test_sessions_are_isolated(self):
+        """Test slots set in one session do not leak into another"""
+        sessions = SessionManager(self.prototype)
+        a = sessions.get("a")
+        a.agent.update_slots("SS 2 please")
+        self.assertEqual(sessions.get("a").agent.slots["current_outlet"], "SS 2")
+        self.assertIsNone(sessions.get("b").agent.slots["current_outlet"])
+
+    def test_heavy_objects_are_shared(self):
+        """Test sessions reuse the prototype's LLM and tools"""
+        sessions = SessionManager(self.prototype)
+        a, b = sessions.get("a").agent, sessions.get("b").agent
+        self.assertIs(a.llm, b.llm)
+        self.assertIs(a.tools, self.prototype.tools)
+        self.assertIsNot(a.memory, b.memory)
+
+    def test_lru_eviction(self):
+        """Test the least recently used session is evicted at the cap"""
+        sessions = SessionManager(self.prototype, max_sessions=2)
+        sessions.get("a")
+        sessions.get("b")
+        sessions.get("a")
+        sessions.get("c")
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(sessions.stats()["evictions"], 1)
+        self.assertIsNone(sessions.get("b").agent.slots["current_outlet"])
+
+    def test_idle_sessions_expire(self):
+        """Test sessions idle past the TTL are dropped"""
+        sessions = SessionManager(self.prototype, ttl=0)
+        sessions.get("a").agent.update_slots("Bangsar")
+        time.sleep(0.01)
+        self.assertIsNone(sessions.get("a").agent.slots["current_outlet"])
+
+    def test_memory_cap(self):
+        """Test sessions are evicted once tracked memory exceeds the cap"""
+        sessions = SessionManager(self.prototype, max_memory_bytes=1)
+        sessions.get("a")
+        sessions.get("b")
+        self.assertEqual(len(sessions), 1)
+
+    def test_reset_only_affects_caller(self):
+        """Test resetting one session leaves others intact"""
+        sessions = SessionManager(self.prototype)
+        sessions.get("a").agent.update_slots("Bangsar")
+        sessions.get("b").agent.update_slots("KLCC")
+        asyncio.run(sessions.reset("a"))
+        self.assertIsNone(sessions.get("a").agent.slots["current_outlet"])
+        self.assertEqual(sessions.get("b").agent.slots["current_outlet"], "KLCC")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import tempfile
+import sqlite3
+import shutil
+import time
+import os
+from chatbot.sql_cache import SQLTranslationCache, normalize_question
+
+
+class TestSQLTranslationCache(unittest.TestCase):
+    """Tests for the persistent Text2SQL translation cache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        self.cache_path = os.path.join(self.tmpdir, "text2sql.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_normalize_question(self):
+        """Test case, whitespace, punctuation and aliases collapse to one key"""
+        self.assertEqual(normalize_question("  SS2   opening hours? "), "ss 2 opening hours")
+        self.assertEqual(normalize_question("Outlets in KL"), normalize_question("outlets in kuala lumpur"))
+
+    def test_hit_and_miss_counters(self):
+        """Test variants of a cached question hit the same entry"""
+        cache = SQLTranslationCache(self.db_path, path=self.cache_path)
+        self.assertIsNone(cache.get("SS 2 opening hours"))
+        cache.put("SS 2 opening hours", "SELECT opening_hours FROM outlets WHERE name LIKE '%SS 2%'")
+        self.assertIsNotNone(cache.get("ss2 OPENING hours"))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted first"""
+        cache = SQLTranslationCache(self.db_path, path=None, max_entries=2)
+        cache.put("a", "SELECT 1")
+        cache.put("b", "SELECT 2")
+        cache.get("a")
+        cache.put("c", "SELECT 3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "SELECT 1")
+
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are treated as misses"""
+        cache = SQLTranslationCache(self.db_path, path=None, ttl=0)
+        cache.put("bangsar", "SELECT 1")
+        time.sleep(0.01)
+        self.assertIsNone(cache.get("bangsar"))
+
+    def test_persists_across_instances(self):
+        """Test entries survive a restart"""
+        SQLTranslationCache(self.db_path, path=self.cache_path).put("outlets in bangsar", "SELECT 1")
+        reloaded = SQLTranslationCache(self.db_path, path=self.cache_path)
+        self.assertEqual(reloaded.get("Outlets in Bangsar"), "SELECT 1")
+
+    def test_invalidated_on_schema_change(self):
+        """Test a schema change drops cached SQL, in memory and on disk"""
+        cache = SQLTranslationCache(self.db_path, path=self.cache_path)
+        cache.put("outlets in bangsar", "SELECT 1")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("ALTER TABLE outlets ADD COLUMN city TEXT")
+        conn.commit()
+        conn.close()
+        self.assertIsNone(cache.get("outlets in bangsar"))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+        self.assertIsNone(SQLTranslationCache(self.db_path, path=self.cache_path).get("outlets in bangsar"))
+
+
+if __name__ == "__main__":
+    unittest.main()
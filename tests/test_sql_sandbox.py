@@ -0,0 +1,114 @@
+import unittest
+import tempfile
+import sqlite3
+import shutil
+import time
+import os
+from unittest.mock import AsyncMock, patch, Mock
+from fastapi.testclient import TestClient
+from chatbot.outlet_db import OutletDB
+from chatbot.sql_cache import SQLTranslationCache
+from chatbot.sql_templates import SQLTemplates
+from chatbot.sql_sandbox import (ForbiddenStatement, RowLimitExceeded, TimeBudgetExceeded, check_statement,
+                                 split_statements)
+from main import app
+
+CARTESIAN = "SELECT COUNT(*) FROM outlets a, outlets b, outlets c"
+
+
+class TestStatementCheck(unittest.TestCase):
+    """Tests for splitting and checking statements before they run"""
+
+    def test_split_respects_strings_and_comments(self):
+        self.assertEqual(split_statements("SELECT 1; DROP TABLE outlets;"), ["SELECT 1", "DROP TABLE outlets"])
+        self.assertEqual(split_statements("SELECT ';' AS s; -- done"), ["SELECT ';' AS s"])
+        self.assertEqual(split_statements("/* a; b */ SELECT 1"), ["/* a; b */ SELECT 1"])
+
+    def test_check(self):
+        self.assertEqual(check_statement("  SELECT name FROM outlets; "), "SELECT name FROM outlets")
+        self.assertEqual(check_statement("-- note\nWITH x AS (SELECT 1) SELECT * FROM x"),
+                         "-- note\nWITH x AS (SELECT 1) SELECT * FROM x")
+        for sql in ["DELETE FROM outlets", "SELECT 1; DROP TABLE outlets", "", "PRAGMA table_info(outlets)"]:
+            with self.subTest(sql=sql), self.assertRaises(ForbiddenStatement):
+                check_statement(sql)
+
+
+class TestSandboxedExecution(unittest.TestCase):
+    """Tests for read-only, row-limited, time-boxed execution of generated SQL"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT, created_at TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, 'Jalan Update 1', '8:00 AM - 10:00 PM', 'Dine-in', '2024')",
+                         [(f"ZUS Coffee - {i}",) for i in range(500)])
+        conn.commit()
+        conn.close()
+        self.db = OutletDB(db_path=self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_keywords_inside_reads_are_allowed(self):
+        """Test column and literal text that merely contains DML keywords is not rejected"""
+        rows = self.db.execute("SELECT name, created_at FROM outlets WHERE address LIKE '%Update%' LIMIT 3")
+        self.assertEqual(len(rows), 3)
+
+    def test_authorizer_denies_side_effects(self):
+        for sql in ["WITH x AS (SELECT 1) DELETE FROM outlets", "SELECT load_extension('evil')"]:
+            with self.subTest(sql=sql), self.assertRaises(ForbiddenStatement):
+                self.db.execute(sql)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) AS n FROM outlets"), [{"n": 500}])
+
+    def test_row_limit(self):
+        self.assertEqual(len(self.db.execute("SELECT * FROM outlets", max_rows=500)), 500)
+        with self.assertRaises(RowLimitExceeded):
+            self.db.execute("SELECT * FROM outlets", max_rows=499)
+
+    def test_time_budget(self):
+        start = time.perf_counter()
+        with self.assertRaises(TimeBudgetExceeded):
+            self.db.execute(CARTESIAN, time_budget_ms=50)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        # The connection goes back to the pool usable, without the handler or authorizer
+        self.assertEqual(len(self.db.search("ZUS")), 5)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) AS n FROM outlets"), [{"n": 500}])
+
+    def test_execute_many_reports_each_limit(self):
+        with patch('chatbot.sql_sandbox.SQL_TIME_BUDGET_MS', 50):
+            out = self.db.execute_many(["SELECT * FROM outlets", CARTESIAN, "SELECT name FROM outlets LIMIT 1",
+                                        "DROP TABLE outlets"])
+        self.assertIsInstance(out[0], RowLimitExceeded)
+        self.assertIsInstance(out[1], TimeBudgetExceeded)
+        self.assertEqual(len(out[2]), 1)
+        self.assertIsInstance(out[3], ForbiddenStatement)
+
+    def test_endpoint_maps_limits_to_4xx(self):
+        llm = Mock(ainvoke=AsyncMock())
+        patches = [
+            patch('chatbot.services.MOCK_MODE', False),
+            patch('chatbot.services.get_outlet_db', return_value=self.db),
+            patch('chatbot.services.get_sql_cache', return_value=SQLTranslationCache(self.db_path, path=None)),
+            patch('chatbot.services.get_sql_templates', return_value=SQLTemplates(resolve=lambda text: {})),
+            patch('chatbot.services.ChatOpenAI', return_value=llm),
+        ]
+        for p in patches:
+            p.start()
+        self.addCleanup(lambda: [p.stop() for p in patches])
+        client = TestClient(app)
+        cases = [("SELECT * FROM outlets", 413), ("SELECT name FROM outlets; DELETE FROM outlets", 400)]
+        for sql, status in cases:
+            llm.ainvoke.return_value = Mock(content=sql)
+            with self.subTest(sql=sql):
+                self.assertEqual(client.get("/outlets", params={"query": sql}).status_code, status)
+        llm.ainvoke.return_value = Mock(content=CARTESIAN)
+        with patch('chatbot.sql_sandbox.SQL_TIME_BUDGET_MS', 50):
+            start = time.perf_counter()
+            self.assertEqual(client.get("/outlets", params={"query": "cartesian"}).status_code, 408)
+            self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import tempfile
+import asyncio
+import sqlite3
+import shutil
+import os
+from unittest.mock import patch, Mock
+from chatbot import services
+from chatbot.gazetteer import Gazetteer
+from chatbot.outlet_db import OutletDB
+from chatbot.outlet_schema import create_structured_index
+from chatbot.sql_cache import SQLTranslationCache
+from chatbot.sql_templates import SQLTemplates, match_template, mentioned_services
+
+ROWS = [
+    ("ZUS Coffee - SS 2", "Jalan SS 2/67, 47300 Petaling Jaya", "8:00 AM - 10:00 PM", "Dine-in, Takeaway, Drive-thru"),
+    ("ZUS Coffee - Bangsar", "Jalan Telawi 3, 59100 Kuala Lumpur", "7:00 AM - 11:00 PM", "Dine-in, Delivery"),
+    ("ZUS Coffee - KLCC", "Suria KLCC, 50088 Kuala Lumpur", "10:00 AM - 10:00 PM", "Takeaway, Delivery"),
+]
+
+GAZETTEER = Gazetteer(cities=["Petaling Jaya", "Kuala Lumpur", "SS 2", "Bangsar"], outlets=["SS 2", "Bangsar", "KLCC"])
+
+
+def template(question, structured=False):
+    matched = match_template(question, GAZETTEER.resolve(question), structured)
+    return matched[0] if matched else None
+
+
+class FailingLLM:
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("The LLM should not be called for a templated question")
+
+
+class TestTemplateMatching(unittest.TestCase):
+    """Tests for choosing a SQL template from the question"""
+
+    def test_patterns(self):
+        self.assertEqual(template("SS 2 outlet"), "outlet_by_name")
+        self.assertEqual(template("what are the opening hours for ss2?"), "outlet_hours")
+        self.assertEqual(template("outlets in KL"), "outlets_in_city")
+        self.assertEqual(template("Petaling Jaya"), "outlets_in_city")
+        self.assertEqual(template("which outlets have drive thru"), "outlets_with_service")
+        self.assertEqual(template("list all outlets"), "all_outlets")
+
+    def test_needs_llm(self):
+        self.assertIsNone(template("how many outlets are in Kuala Lumpur"))
+        self.assertIsNone(template("which outlets close after 10pm"))
+        self.assertIsNone(template("outlets in Bangsar without delivery"))
+        self.assertIsNone(template("what is the best coffee"))
+
+    def test_parameters_not_inlined(self):
+        name, sql, params = match_template("outlets in KL", {"city": "Kuala Lumpur"})
+        self.assertNotIn("Kuala Lumpur", sql)
+        self.assertEqual(params["city"], "%Kuala Lumpur%")
+
+    def test_services(self):
+        self.assertEqual(mentioned_services("drive-thru or take away?"), ["drive-thru", "takeaway"])
+        _, sql, params = match_template("delivery in Kuala Lumpur", {"city": "Kuala Lumpur"}, structured=True)
+        self.assertIn("outlet_services", sql)
+        self.assertEqual(params["services"], 4)
+
+
+class TestTemplatePath(unittest.TestCase):
+    """Tests for search_outlets answering templated questions without the LLM"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "outlets.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE outlets (name TEXT, address TEXT, opening_hours TEXT, services TEXT)")
+        conn.executemany("INSERT INTO outlets VALUES (?, ?, ?, ?)", ROWS)
+        conn.commit()
+        conn.close()
+        self.db = OutletDB(db_path=self.db_path)
+        self.templates = SQLTemplates(resolve=GAZETTEER.resolve)
+        self.patches = [
+            patch('chatbot.services.MOCK_MODE', False),
+            patch('chatbot.services.get_outlet_db', return_value=self.db),
+            patch('chatbot.services.get_sql_cache', return_value=SQLTranslationCache(self.db_path, path=None)),
+            patch('chatbot.services.get_sql_templates', return_value=self.templates),
+            patch('chatbot.services.ChatOpenAI', FailingLLM),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def names(self, data):
+        return [row["name"] for row in data["results"]]
+
+    def test_templates_skip_llm(self):
+        data = services.search_outlets("outlets in KL")
+        self.assertEqual(data["path"], "template")
+        self.assertEqual(data["template"], "outlets_in_city")
+        self.assertEqual(self.names(data), ["ZUS Coffee - Bangsar", "ZUS Coffee - KLCC"])
+        data = asyncio.run(services.asearch_outlets("SS2 opening hours"))
+        self.assertEqual(self.names(data), ["ZUS Coffee - SS 2"])
+        self.assertEqual(data["template"], "outlet_hours")
+
+    def test_service_like_and_structured(self):
+        self.assertEqual(self.names(services.search_outlets("drive thru outlets")), ["ZUS Coffee - SS 2"])
+        conn = sqlite3.connect(self.db_path)
+        create_structured_index(conn)
+        conn.close()
+        self.db.close()
+        data = services.search_outlets("delivery in Kuala Lumpur")
+        self.assertIn("outlet_services", data["sql"])
+        self.assertEqual(self.names(data), ["ZUS Coffee - Bangsar", "ZUS Coffee - KLCC"])
+
+    def test_llm_fallback_and_avoidance_rate(self):
+        llm = Mock()
+        llm.invoke.return_value = Mock(content="SELECT * FROM outlets WHERE opening_hours LIKE '%11:00 PM%'")
+        services.search_outlets("SS 2")
+        with patch('chatbot.services.ChatOpenAI', return_value=llm):
+            data = services.search_outlets("which outlets close after 10:30 PM")
+            self.assertEqual(data["path"], "llm")
+            self.assertEqual(services.search_outlets("which outlets close after 10:30 PM")["path"], "cache")
+        self.assertEqual(llm.invoke.call_count, 1)
+        stats = self.templates.stats()
+        self.assertEqual((stats["template_hits"], stats["cache_hits"], stats["llm_calls"]), (1, 1, 1))
+        self.assertEqual(stats["llm_avoidance_rate"], 0.667)
+        self.assertEqual(stats["templates"], {"outlet_by_name": 1})
+
+    def test_batch_mixes_paths(self):
+        llm = Mock()
+        llm.ainvoke = Mock(side_effect=lambda prompt: asyncio.sleep(0, Mock(content="SELECT * FROM outlets")))
+        with patch('chatbot.services.ChatOpenAI', return_value=llm):
+            data = asyncio.run(services.asearch_outlets_batch(["Bangsar outlet", "how many outlets are there"]))
+        self.assertEqual([item["path"] for item in data["results"]], ["template", "llm"])
+        self.assertEqual(self.names(data["results"][0]), ["ZUS Coffee - Bangsar"])
+        self.assertEqual(data["results"][1]["count"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
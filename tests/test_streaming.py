@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import json
+from unittest.mock import patch, Mock
+from fastapi.testclient import TestClient
+from chatbot.agent import ConversationAgent
+from chatbot.tools import INPROCESS, build_tools
+from main import app
+
+
+def parse_events(body: str):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class StreamingLLM:
+    def invoke(self, prompt: str):
+        return Mock(content="Hello there")
+
+    async def astream(self, prompt: str):
+        for chunk in ["Hello", " there"]:
+            yield Mock(content=chunk)
+
+
+class TestStreamingAgent(unittest.TestCase):
+    """Tests for the token-streaming conversation pipeline"""
+
+    def collect(self, agent, user_input):
+        async def run():
+            return [item async for item in agent.astream_turn(user_input)]
+        return asyncio.run(run())
+
+    def test_fallback_streams_tokens_and_saves_memory(self):
+        agent = ConversationAgent()
+        agent.mock_mode = False
+        agent.llm = StreamingLLM()
+        self.assertEqual(self.collect(agent, "Tell me a joke"), [("token", "Hello"), ("token", " there")])
+        self.assertEqual(agent.memory.messages[-1], ("bot", "Hello there"))
+
+    @patch('chatbot.tools.CalculatorTool.arun')
+    def test_tool_result_is_one_message(self, mock_calc):
+        mock_calc.return_value = {"result": 30}
+        agent = ConversationAgent(llm=StreamingLLM())
+        self.assertEqual(self.collect(agent, "Calculate 5 * 6"), [("message", "The result is 30")])
+
+
+    def test_product_stream_failing_midway_ends_with_a_message(self):
+        async def failing(query):
+            yield "token", "Our mugs"
+            raise RuntimeError("LLM unavailable")
+
+        agent = ConversationAgent(llm=StreamingLLM(), tools=build_tools(INPROCESS))
+        with patch('chatbot.services.astream_products', failing):
+            events = self.collect(agent, "What mugs do you sell?")
+        self.assertEqual(events[0], ("token", "Our mugs"))
+        self.assertEqual(events[1][0], "message")
+        self.assertIn("LLM unavailable", events[1][1])
+
+
+@patch('chatbot.services.MOCK_MODE', True)
+class TestStreamingEndpoints(unittest.TestCase):
+    """Tests for the SSE endpoints"""
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_chat_stream(self):
+        resp = self.client.post("/chat/stream", json={"message": "Calculate 2 + 3"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers["content-type"].startswith("text/event-stream"))
+        self.assertIn("session_id", resp.cookies)
+        events = parse_events(resp.text)
+        self.assertEqual(events[0], ("message", {"text": "The result is 5"}))
+        self.assertEqual(events[-1][0], "done")
+        self.assertIn("ttfb_ms", events[-1][1])
+
+    def test_chat_stream_products_as_tokens(self):
+        events = parse_events(self.client.post("/chat/stream", json={"message": "What tumblers do you sell?"}).text)
+        text = "".join(data["text"] for event, data in events if event == "token")
+        self.assertIn("All-Can Tumbler", text)
+
+    def test_products_stream(self):
+        events = parse_events(self.client.get("/products/stream", params={"query": "mug"}).text)
+        self.assertEqual(events[0][0], "sources")
+        self.assertEqual(events[0][1][0]["title"], "Stainless Steel Mug | 420ml")
+        self.assertEqual(events[1][0], "token")
+        self.assertEqual(events[-1][0], "done")
+
+
+if __name__ == '__main__':
+    unittest.main()
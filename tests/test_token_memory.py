@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import Mock
+from chatbot.agent import ConversationAgent
+from chatbot.memory import TokenBudgetMemory, count_tokens
+
+
+class EchoLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt: str):
+        self.prompts.append(prompt)
+        return Mock(content="Sure, here is a longer answer to keep the history growing.")
+
+
+class TestTokenBudgetMemory(unittest.TestCase):
+    """Tests for the sliding-window memory with a rolling summary"""
+
+    def test_recent_turns_are_verbatim(self):
+        memory = TokenBudgetMemory(max_tokens=1000)
+        memory.save_turn("Hi", "Hello!")
+        prompt, tokens = memory.prompt("How are you?")
+        self.assertEqual(prompt, "User: Hi\nBot: Hello!\nUser: How are you?\nBot:")
+        self.assertEqual(tokens, count_tokens("User: Hi\nBot: Hello!\n") + count_tokens("User: How are you?\nBot:"))
+
+    def test_stays_within_budget(self):
+        memory = TokenBudgetMemory(max_tokens=200, summary_tokens=50)
+        for i in range(200):
+            memory.save_turn(f"Question number {i} about coffee", f"Answer number {i} about coffee")
+            self.assertLessEqual(memory.stats()["tokens"], 200)
+        self.assertEqual(memory.turns, 200)
+        self.assertEqual(memory.summarized + len(memory.window), 200)
+
+    def test_evicted_turns_are_summarized(self):
+        memory = TokenBudgetMemory(max_tokens=60, summary_tokens=30)
+        for i in range(5):
+            memory.save_turn(f"Question {i}", "x" * 40)
+        prefix = memory.prefix()
+        self.assertIn("Earlier in this conversation", prefix)
+        self.assertIn("- Question 2", prefix)
+        self.assertNotIn("- Question 3", prefix)
+        self.assertTrue(prefix.endswith("User: Question 4\nBot: " + "x" * 40 + "\n"))
+
+    def test_prefix_matches_full_rebuild(self):
+        """Test the incrementally maintained prefix equals one rebuilt from scratch"""
+        memory = TokenBudgetMemory(max_tokens=120, summary_tokens=40)
+        for i in range(50):
+            memory.save_turn(f"Q{i} " * (i % 7 + 1), f"A{i}")
+            rebuilt = "".join(turn.text for turn in memory.window)
+            self.assertTrue(memory.prefix().endswith(rebuilt))
+            self.assertEqual(memory.window_tokens, sum(turn.tokens for turn in memory.window))
+
+    def test_oversized_turn_is_kept(self):
+        memory = TokenBudgetMemory(max_tokens=10)
+        memory.save_turn("a" * 100, "b" * 100)
+        self.assertEqual(len(memory.window), 1)
+
+    def test_clear(self):
+        memory = TokenBudgetMemory(max_tokens=30)
+        for i in range(10):
+            memory.save_turn(f"Question {i}", "Answer")
+        memory.clear()
+        self.assertEqual(memory.prefix(), "")
+        self.assertEqual(memory.stats()["tokens"], 0)
+
+
+class TestAgentPromptTokens(unittest.TestCase):
+    """Tests that the LLM fallback reports a bounded prompt size per turn"""
+
+    def test_prompt_tokens_stay_flat(self):
+        agent = ConversationAgent()
+        agent.mock_mode = False
+        agent.llm = EchoLLM()
+        agent.memory = TokenBudgetMemory(max_tokens=300, summary_tokens=60)
+
+        sizes = []
+        for i in range(200):
+            agent.process_turn(f"Tell me a joke number {i}")
+            sizes.append(agent.last_prompt_tokens)
+        self.assertLessEqual(max(sizes), 300 + count_tokens("User: Tell me a joke number 199\nBot:"))
+        self.assertLess(max(sizes[100:]) - min(sizes[100:]), 40)
+
+    def test_tool_turns_report_no_prompt(self):
+        agent = ConversationAgent()
+        agent.process_turn("Calculate 2 + 2")
+        self.assertIsNone(agent.last_prompt_tokens)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import asyncio
+import httpx
+from unittest.mock import patch
+from chatbot.tools import CalculatorTool, ProductRAGTool, OutletSQLTool, INPROCESS, build_tools
+
+
+@patch('requests.get', side_effect=AssertionError("in-process tools must not use HTTP"))
+@patch('requests.post', side_effect=AssertionError("in-process tools must not use HTTP"))
+class TestInProcessTools(unittest.TestCase):
+    """Tests for tools calling the services directly instead of over HTTP"""
+
+    def test_calculator(self, *_):
+        tool = CalculatorTool(transport=INPROCESS)
+        self.assertEqual(tool.run("5 * 6")["result"], 30)
+
+    def test_calculator_errors_match_http(self, *_):
+        tool = CalculatorTool(transport=INPROCESS)
+        self.assertIn("Cannot divide by zero", tool.run("5 / 0")["error"])
+        self.assertIn("Invalid characters", tool.run("5 + x")["error"])
+
+    @patch('chatbot.services.MOCK_MODE', True)
+    def test_products(self, *_):
+        result = ProductRAGTool(transport=INPROCESS).run("What tumblers do you have?")
+        self.assertIn("All-Can Tumbler", result["answer"])
+        self.assertTrue(result["sources"])
+
+    @patch('chatbot.services.MOCK_MODE', True)
+    def test_outlets(self, *_):
+        result = OutletSQLTool(transport=INPROCESS).run("Sentul")
+        self.assertIn("results", result)
+
+    def test_product_stream_failures(self, *_):
+        async def failing(query, after=()):
+            for token in after:
+                yield "token", token
+            raise RuntimeError("index unavailable")
+
+        async def collect(tool, query):
+            return [chunk async for chunk in tool.astream(query)]
+
+        tool = ProductRAGTool(transport=INPROCESS)
+        with patch('chatbot.services.astream_products', lambda q: failing(q)):
+            self.assertEqual(asyncio.run(collect(tool, "mugs")),
+                             ["I'm having trouble fetching product info. Please try again later."])
+        with patch('chatbot.services.astream_products', side_effect=httpx.ConnectError("down")), \
+                patch('chatbot.services.lexical_products', return_value={"answer": "Local mugs", "sources": []}):
+            self.assertEqual(asyncio.run(collect(tool, "mugs")), ["Local mugs"])
+        with patch('chatbot.services.astream_products', lambda q: failing(q, ["Our mugs"])):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(collect(tool, "mugs"))
+
+    def test_build_tools(self, *_):
+        tools = build_tools(INPROCESS)
+        self.assertEqual({t.transport for t in tools.values()}, {INPROCESS})
+
+
+if __name__ == "__main__":
+    unittest.main()